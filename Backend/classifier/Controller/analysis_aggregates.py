@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+from functools import cached_property
+from Controller.problem_catalog import ProblemCatalog
+from Controller.tag_cooccurrence import TagCooccurrence
+
+
+class AnalysisAggregates:
+    """
+    Aggregates shared by the charts of one analysis, computed once from the catalog.
+
+    Every (problem, tag) incidence of the catalog's CSR tag arrays is visited
+    by a single `bincount` per aggregate, instead of each chart exploding and
+    re-grouping the problem frame on its own. Each aggregate is built on first
+    use, so rendering one chart only pays for what that chart needs.
+    """
+
+    def __init__(self, catalog: ProblemCatalog):
+        """
+        Args:
+            catalog: The columnar problem catalog.
+        """
+        self.catalog = catalog
+
+    @cached_property
+    def problem_of_tag(self) -> np.ndarray:
+        """
+        The problem of every tag incidence, aligned with `catalog.tag_ids`.
+        """
+        return np.repeat(np.arange(len(self.catalog)), np.diff(self.catalog.tag_ptr))
+
+    @cached_property
+    def difficulty_counts(self) -> pd.Series:
+        """
+        Number of problems per difficulty, in difficulty order, for the difficulties that occur.
+        """
+        counts = np.bincount(self.catalog.difficulty, minlength=len(self.catalog.difficulty_labels))
+        return pd.Series(counts, index=self.catalog.difficulty_labels)[counts > 0]
+
+    def acceptance_histogram(self, bins: int = 20) -> dict:
+        """
+        Histogram of the acceptance rates.
+
+        Returns:
+            The `bins + 1` bin edges and the problem count of every bin.
+        """
+        counts, edges = np.histogram(self.catalog.acceptance.astype(np.float64), bins=bins)
+        return {"edges": [round(float(edge), 4) for edge in edges], "counts": counts.tolist()}
+
+    @cached_property
+    def acceptance_quartiles_by_difficulty(self) -> dict:
+        """
+        Box-plot statistics of the acceptance rate per difficulty.
+
+        The whiskers extend to the furthest rates within 1.5 IQR of the box, as in
+        the rendered box plot, and the rates beyond them are returned as outliers.
+        """
+        quartiles = {}
+        for code in np.flatnonzero(np.bincount(self.catalog.difficulty, minlength=len(self.catalog.difficulty_labels))):
+            rates = np.sort(self.catalog.acceptance[self.catalog.difficulty == code].astype(np.float64))
+            q1, median, q3 = np.percentile(rates, [25, 50, 75])
+            iqr = q3 - q1
+            inside = rates[(rates >= q1 - 1.5 * iqr) & (rates <= q3 + 1.5 * iqr)]
+            outliers = rates[(rates < inside[0]) | (rates > inside[-1])]
+            quartiles[self.catalog.difficulty_labels[code]] = {
+                "count": int(len(rates)),
+                "min": round(float(rates[0]), 2),
+                "lower_whisker": round(float(inside[0]), 2),
+                "q1": round(float(q1), 2),
+                "median": round(float(median), 2),
+                "q3": round(float(q3), 2),
+                "upper_whisker": round(float(inside[-1]), 2),
+                "max": round(float(rates[-1]), 2),
+                "outliers": [round(float(rate), 2) for rate in outliers],
+            }
+        return quartiles
+
+    @cached_property
+    def year_acceptance_means(self) -> pd.Series:
+        """
+        Average acceptance rate per year, for problems with a known year; empty without year data.
+        """
+        if self.catalog.year is None:
+            return pd.Series(dtype=np.float64)
+        known = ~np.isnan(self.catalog.year)
+        years = pd.Series(self.catalog.acceptance[known].astype(np.float64), index=self.catalog.year[known].astype(np.int64))
+        return years.groupby(level=0).mean()
+
+    @cached_property
+    def tag_frequencies(self) -> pd.Series:
+        """
+        Number of problems per tag, most frequent first.
+        """
+        counts = np.bincount(self.catalog.tag_ids, minlength=len(self.catalog.tag_names))
+        frequencies = pd.Series(counts, index=self.catalog.tag_names)
+        return frequencies[frequencies > 0].sort_values(ascending=False, kind="stable")
+
+    @cached_property
+    def tag_acceptance_means(self) -> pd.Series:
+        """
+        Average acceptance rate per tag, highest first.
+        """
+        tag_count = len(self.catalog.tag_names)
+        acceptance = self.catalog.acceptance.astype(np.float64)[self.problem_of_tag]
+        sums = np.bincount(self.catalog.tag_ids, weights=acceptance, minlength=tag_count)
+        counts = np.bincount(self.catalog.tag_ids, minlength=tag_count)
+        used = counts > 0
+        means = pd.Series(sums[used] / counts[used], index=np.asarray(self.catalog.tag_names, dtype=object)[used])
+        return means.sort_values(ascending=False, kind="stable")
+
+    @cached_property
+    def tag_difficulty_counts(self) -> pd.DataFrame:
+        """
+        Problem counts per difficulty (rows) and tag (columns), for the difficulties and
+        tags that occur, with tags in alphabetical order.
+        """
+        tag_count = len(self.catalog.tag_names)
+        difficulty_count = len(self.catalog.difficulty_labels)
+        difficulty = self.catalog.difficulty.astype(np.int64)[self.problem_of_tag]
+        counts = np.bincount(
+            difficulty * tag_count + self.catalog.tag_ids,
+            minlength=difficulty_count * tag_count,
+        ).reshape(difficulty_count, tag_count)
+
+        rows = np.flatnonzero(counts.sum(axis=1))
+        columns = np.flatnonzero(counts.sum(axis=0))
+        columns = columns[np.argsort(np.asarray(self.catalog.tag_names, dtype=object)[columns], kind="stable")]
+        return pd.DataFrame(
+            counts[np.ix_(rows, columns)],
+            index=pd.Index([self.catalog.difficulty_labels[i] for i in rows], name="difficulty"),
+            columns=pd.Index([self.catalog.tag_names[i] for i in columns], name="tags"),
+        )
+
+    @cached_property
+    def tag_cooccurrence(self) -> TagCooccurrence:
+        """
+        Tag co-occurrence counts, computed from the catalog's sparse tag membership.
+        """
+        return TagCooccurrence(self.catalog)
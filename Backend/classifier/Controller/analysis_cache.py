@@ -0,0 +1,282 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import AsyncIterator, BinaryIO, List, Optional, Tuple
+from config import params
+from Controller.report_zip import iter_chunks
+
+# Bump whenever the charts or the report layout change, so stale reports are not served.
+ANALYZER_VERSION = "3"
+
+
+class AnalysisCache:
+    """
+    Content-addressed cache of rendered analysis results.
+
+    Results are keyed by a hash of the problem set contents, the analyzer
+    version and the kind of result, so the same problem set saved twice (or
+    by different users) maps to the same entry. A bounded in-memory LRU tier
+    sits in front of a size-bounded directory on disk, which survives
+    restarts and is shared by every worker on the box.
+
+    The size of the disk tier is tracked as a running total, seeded by one
+    scan of the directory on the first write, so a write costs a couple of
+    syscalls. The directory is only scanned again to evict entries once the
+    total crosses `max_disk_bytes`, which also picks up what other workers wrote.
+    """
+
+    def __init__(self, max_entries: int = 64, max_bytes: int = 64 * 1024 * 1024,
+                 directory: Optional[str] = None, max_disk_bytes: int = 1024 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        # Bytes in the disk tier, None until the directory was first scanned
+        self._disk_bytes: Optional[int] = None
+        self._disk_lock = threading.Lock()
+
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def digest(problems: List[dict]) -> str:
+        """
+        Returns a hash of the contents of a problem set.
+        """
+        canonical = json.dumps(problems, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def key(problems: List[dict], variant: str = "report", digest: str = None) -> str:
+        """
+        Returns the cache key of an analysis result for a problem set.
+
+        Args:
+            problems: The problem dictionaries of the set, in order.
+            variant: The kind of result, e.g. "report" or "chart:tag_frequency".
+            digest: The precomputed `digest(problems)`, when several keys are needed.
+        """
+        digest = digest or AnalysisCache.digest(problems)
+        return hashlib.sha256(f"{ANALYZER_VERSION}:{variant}:{digest}".encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+            self._memory_hits += 1
+            return value
+
+        if self.directory:
+            value = await asyncio.get_running_loop().run_in_executor(None, self._read, key)
+            if value is not None:
+                self._disk_hits += 1
+                self._remember(key, value)
+                return value
+
+        self._misses += 1
+        return None
+
+    async def open(self, key: str, chunk_size: int = 64 * 1024) -> Optional[Tuple[AsyncIterator[bytes], int]]:
+        """
+        Looks up an entry like `get`, but returns it as a stream of chunks.
+
+        An entry that is only on disk is read chunk by chunk as the stream is consumed,
+        rather than loaded into memory first.
+
+        Returns:
+            The chunks and the size of the entry, or None on a miss.
+        """
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+            self._memory_hits += 1
+            return iter_chunks(value, chunk_size), len(value)
+
+        if self.directory:
+            file = await asyncio.get_running_loop().run_in_executor(None, self._open, key)
+            if file is not None:
+                self._disk_hits += 1
+                return self._iter_file(file, chunk_size), os.fstat(file.fileno()).st_size
+
+        self._misses += 1
+        return None
+
+    async def put(self, key: str, value: bytes) -> None:
+        self._remember(key, value)
+        if self.directory:
+            await asyncio.get_running_loop().run_in_executor(None, self._write, key, value)
+
+    async def tee(self, key: str, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """
+        Passes `chunks` through and caches them under `key` once the stream is complete.
+
+        The chunks are written to a temporary file of the disk tier as they pass, which
+        is renamed into place at the end. They are only buffered for the memory tier while
+        the entry still fits in `max_bytes`. A stream that is not consumed to the end
+        (e.g. the client disconnected) is not cached.
+        """
+        loop = asyncio.get_running_loop()
+        file, tmp_path = (await loop.run_in_executor(None, self._create, key)) if self.directory else (None, None)
+        buffered: Optional[list] = []
+        size = 0
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if buffered is not None and size <= self.max_bytes:
+                    buffered.append(chunk)
+                else:
+                    # Too large for the memory tier; drop what was buffered so far
+                    buffered = None
+                if file is not None:
+                    await loop.run_in_executor(None, file.write, chunk)
+                yield chunk
+        except BaseException:
+            if file is not None:
+                self._discard(file, tmp_path)
+            raise
+
+        if file is not None:
+            await loop.run_in_executor(None, self._commit, key, file, tmp_path, size)
+        if buffered is not None:
+            self._remember(key, b"".join(buffered))
+
+    def _remember(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous)
+        self._entries[key] = value
+        self._bytes += len(value)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def _read(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                value = file.read()
+        except OSError:
+            return None
+        # Touch the file so disk eviction is least-recently-used as well.
+        os.utime(path)
+        return value
+
+    def _open(self, key: str) -> Optional[BinaryIO]:
+        path = self._path(key)
+        try:
+            file = open(path, "rb")
+        except OSError:
+            return None
+        os.utime(path)
+        return file
+
+    @staticmethod
+    async def _iter_file(file: BinaryIO, chunk_size: int) -> AsyncIterator[bytes]:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, file.read, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            file.close()
+
+    def _write(self, key: str, value: bytes) -> None:
+        file, tmp_path = self._create(key)
+        file.write(value)
+        self._commit(key, file, tmp_path, len(value))
+
+    def _create(self, key: str) -> Tuple[BinaryIO, str]:
+        """
+        Opens a temporary file next to the entry, which `_commit` renames into place.
+        """
+        directory = os.path.dirname(self._path(key))
+        os.makedirs(directory, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial entry.
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        return os.fdopen(fd, "wb"), tmp_path
+
+    @staticmethod
+    def _discard(file: BinaryIO, tmp_path: str) -> None:
+        file.close()
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+    def _commit(self, key: str, file: BinaryIO, tmp_path: str, size: int) -> None:
+        file.close()
+        path = self._path(key)
+        try:
+            replaced = os.stat(path).st_size
+        except OSError:
+            replaced = 0
+        os.replace(tmp_path, path)
+
+        with self._disk_lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk()[0]
+            else:
+                self._disk_bytes += size - replaced
+            if self._disk_bytes > self.max_disk_bytes:
+                self._prune_disk()
+
+    def _scan_disk(self):
+        """
+        Returns the total size of the disk tier and its files as (mtime, size, path), oldest first.
+        """
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        return sum(size for _, size, _ in files), sorted(files)
+
+    def _prune_disk(self) -> None:
+        total, files = self._scan_disk()
+        for _, size, path in files:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._disk_bytes = total
+
+    def stats(self) -> dict:
+        lookups = self._memory_hits + self._disk_hits + self._misses
+        return {
+            "memory_hits": self._memory_hits,
+            "disk_hits": self._disk_hits,
+            "misses": self._misses,
+            "hit_rate": round((self._memory_hits + self._disk_hits) / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._entries),
+            "memory_bytes": self._bytes,
+            "disk_bytes": self._disk_bytes or 0,
+        }
+
+
+analysis_cache = AnalysisCache(
+    max_entries=int(params.get("ANALYSIS_CACHE_MAX_ENTRIES", 64)),
+    max_bytes=int(params.get("ANALYSIS_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+    directory=params.get("ANALYSIS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "problems-analyzer-cache")),
+    max_disk_bytes=int(params.get("ANALYSIS_CACHE_MAX_DISK_BYTES", 1024 * 1024 * 1024)),
+)
@@ -0,0 +1,476 @@
+import asyncio
+import cProfile
+import logging
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, Callable, Iterable, List, Optional, Tuple
+from fastapi import FastAPI, HTTPException, Request
+from starlette.concurrency import iterate_in_threadpool
+from config import params
+from Controller.metrics import metrics, span
+from Controller.plot_renderer import renderer_health, start_renderer
+from Controller.profiler import active_profile
+from Controller.report_zip import iter_chunks
+
+logger = logging.getLogger(__name__)
+
+
+def init_worker() -> None:
+    """
+    Analysis worker initializer: exports the worker's stage spans and starts its renderer.
+    """
+    metrics.export_spans = True
+    start_renderer()
+
+
+def run_job(func: Callable, submitted_at: float, profile: bool, *args) -> Tuple[object, float, list, list, Optional[dict]]:
+    """
+    Runs `func(*args)` in a worker process and measures it.
+
+    Returns:
+        The result, the seconds the job waited for a worker, the (engine, seconds)
+        latencies of the images the job rendered, the (stage, seconds) spans it recorded
+        and, if `profile` is set, the cProfile statistics of the job.
+    """
+    from Controller.plot_renderer import plot_renderer
+
+    queue_wait = max(time.time() - submitted_at, 0.0)
+    plot_renderer.drain_latencies()
+    metrics.drain_spans()
+    if not profile:
+        result = func(*args)
+        return result, queue_wait, plot_renderer.drain_latencies(), metrics.drain_spans(), None
+
+    profiler = cProfile.Profile()
+    try:
+        result = profiler.runcall(func, *args)
+    finally:
+        profiler.create_stats()
+    return result, queue_wait, plot_renderer.drain_latencies(), metrics.drain_spans(), profiler.stats
+
+
+def run_analysis_report(problems) -> Tuple[bytes, dict]:
+    """
+    Renders the full analysis report in one worker process.
+
+    Returns:
+        The report as a ZIP file and the errors of the charts that failed.
+    """
+    from Controller.analysis_problems import LeetCodeProblemAnalyzerEnhanced
+
+    analyzer = LeetCodeProblemAnalyzerEnhanced(problems, binary_images=True)
+    analysis_results = analyzer.analyze_all()
+    return LeetCodeProblemAnalyzerEnhanced.generate_zip(analysis_results), analyzer.errors
+
+
+def render_chart_batch(problems, charts: List[str]) -> List[Tuple[Optional[bytes], Optional[str]]]:
+    """
+    Renders several charts from one analyzer in a worker process, so they share its frame and aggregates.
+
+    Returns:
+        One (PNG image, or None and the error if the chart failed) tuple per chart, in order.
+    """
+    from Controller.analysis_problems import LeetCodeProblemAnalyzerEnhanced
+
+    analyzer = LeetCodeProblemAnalyzerEnhanced(problems, binary_images=True)
+    return [analyzer.analyze_chart(chart) for chart in charts]
+
+
+def run_analysis_data(problems) -> dict:
+    """
+    Computes the data behind the report charts in a worker process.
+    """
+    from Controller.analysis_problems import LeetCodeProblemAnalyzerEnhanced
+
+    with span("analysis_data"):
+        return LeetCodeProblemAnalyzerEnhanced(problems).analyze_data()
+
+
+class LatencyStats:
+    """
+    Count, mean, maximum and recent percentiles of a latency, in seconds.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._recent = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self._recent.append(seconds)
+
+    def percentile(self, fraction: float) -> float:
+        if not self._recent:
+            return 0.0
+        recent = sorted(self._recent)
+        return recent[min(int(fraction * len(recent)), len(recent) - 1)]
+
+    def stats(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.5) * 1000, 2),
+            "p95_ms": round(self.percentile(0.95) * 1000, 2),
+            "max_ms": round(self.max * 1000, 2),
+        }
+
+
+class AnalysisPool:
+    """
+    Process pool that runs analysis jobs off the event loop.
+
+    At most `max_queue` jobs are admitted at once (running or waiting for a
+    worker); further jobs are rejected with 503 instead of piling up. Each job
+    has a timeout, and a job whose client disconnects is cancelled. A job that
+    already started in a worker runs to completion there and its result is
+    discarded, but it keeps its admission slot until the worker is done, so
+    abandoned work still counts against `max_queue`.
+
+    If a worker dies (e.g. killed by the OOM killer) the executor is broken;
+    it is then replaced by a new one and the job is retried once.
+
+    Every worker owns a warm Kaleido renderer (see `PlotRenderer`), started in
+    the background when the worker starts, so the workers double as the
+    renderer pool without holding up data-only jobs. The renderers are
+    health-checked periodically while the pool is idle.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.max_workers = 0
+        self.max_queue = 0
+        self.job_timeout = 0.0
+        self._admitted = 0
+        self.health_check_interval = 0.0
+        self._health_task: Optional[asyncio.Task] = None
+        self._renderers: dict = {}
+        self._restarts = 0
+        self.queue_wait = LatencyStats()
+        self.render_latency = {"plotly": LatencyStats(), "matplotlib": LatencyStats()}
+
+    def start(self, max_workers: int = None, max_queue: int = None, job_timeout: float = None) -> None:
+        if self._executor is not None:
+            return
+        # Per API process: every uvicorn worker has its own pool, and every analysis worker
+        # its own Kaleido (Chromium) renderer, so size this as cores / uvicorn workers.
+        self.max_workers = max_workers or int(params.get("ANALYSIS_WORKERS", 0)) or 2
+        self.max_queue = max_queue or int(params.get("ANALYSIS_MAX_QUEUE", 0)) or self.max_workers * 4
+        self.job_timeout = job_timeout or float(params.get("ANALYSIS_JOB_TIMEOUT_SECONDS", 120))
+        self.health_check_interval = float(params.get("RENDERER_HEALTH_CHECK_SECONDS", 60))
+        # Workers are spawned rather than forked so they never inherit the event loop,
+        # the Mongo client or other threads of the API process.
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+        )
+
+    def warm_up(self) -> None:
+        """
+        Starts every worker and its renderer in the background, then keeps health-checking them.
+
+        Workers are otherwise spawned on demand, so without a warm-up the first reports
+        after a start pay for spawning the workers, importing pandas and the plotting
+        libraries and launching Kaleido.
+        """
+        if self._health_task is None:
+            self._health_task = asyncio.ensure_future(self._health_check_loop())
+
+    async def _health_check_loop(self) -> None:
+        check = True
+        while True:
+            if check:
+                try:
+                    await self.check_renderers()
+                except Exception:
+                    # One failed round must not end the loop; the next round retries.
+                    logger.exception("Renderer health check failed")
+            if self.health_check_interval <= 0:
+                return
+            await asyncio.sleep(self.health_check_interval)
+            # Only check an idle pool, so health checks never delay analysis jobs.
+            check = self._admitted == 0
+
+    async def check_renderers(self) -> dict:
+        """
+        Checks the renderer of every worker, restarting the ones that died.
+
+        Returns:
+            The health of the renderers keyed by worker process ID.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        # Submitting one job per worker at once makes the executor spawn all of them.
+        jobs = [loop.run_in_executor(executor, renderer_health) for _ in range(self.max_workers)]
+        results = await asyncio.gather(*jobs, return_exceptions=True)
+        if any(isinstance(health, BrokenProcessPool) for health in results):
+            self._restart(executor)
+        self._renderers = {
+            health["pid"]: health for health in results if not isinstance(health, BaseException)
+        }
+        return self._renderers
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        """
+        Replaces a broken executor; concurrent callers that saw the same executor break restart it only once.
+        """
+        if self._executor is not broken:
+            return
+        self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._renderers = {}
+        self._restarts += 1
+        self.start(self.max_workers, self.max_queue, self.job_timeout)
+
+    def close(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self.start()
+        return self._executor
+
+    async def run(self, func: Callable, *args, request: Request = None):
+        """
+        Runs `func(*args)` in a worker process.
+
+        Args:
+            func: A picklable, module-level function.
+            request: The incoming request; the job is cancelled if its client disconnects.
+
+        Raises:
+            HTTPException: 503 if the queue is full or the workers keep crashing, 504 on timeout,
+                499 if the client went away.
+        """
+        results = await self.map(func, [args], request=request)
+        return results[0]
+
+    async def map(self, func: Callable, args_list: Iterable[tuple], request: Request = None) -> List:
+        """
+        Runs `func(*args)` for every tuple of `args_list` concurrently across the workers.
+
+        The calls share one admission slot and one timeout, and results are returned in
+        the order of `args_list`. While the calling request is being profiled, the calls
+        are profiled in the workers and added to its profile.
+
+        Raises:
+            HTTPException: 503 if the queue is full or the workers keep crashing, 504 on timeout,
+                499 if the client went away.
+        """
+        # Resolving the executor starts a pool that was never started, which also sets max_queue.
+        executor = self.executor
+        if self._admitted >= self.max_queue:
+            raise HTTPException(status_code=503, detail="Analysis queue is full, please retry later")
+
+        args_list = list(args_list)
+        profile = active_profile.get()
+        for attempt in range(2):
+            if attempt:
+                executor = self.executor
+            try:
+                futures = self._submit(executor, func, args_list, profile is not None)
+                return await self._wait(futures, request, profile)
+            except BrokenProcessPool:
+                self._restart(executor)
+        raise HTTPException(status_code=503, detail="Analysis workers crashed, please retry later")
+
+    def _submit(self, executor: ProcessPoolExecutor, func: Callable, args_list: List[tuple], profile: bool) -> List[Future]:
+        """
+        Submits the calls as one admitted job, which holds its admission slot until every call finished.
+        """
+        futures = []
+        try:
+            for args in args_list:
+                futures.append(executor.submit(run_job, func, time.time(), profile, *args))
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+        self._admitted += 1
+        loop = asyncio.get_running_loop()
+        remaining = len(futures)
+
+        def release() -> None:
+            nonlocal remaining
+            remaining -= 1
+            if remaining == 0:
+                self._admitted -= 1
+
+        def on_done(_: Future) -> None:
+            # Runs in the executor's thread, or here if the future is already done.
+            try:
+                loop.call_soon_threadsafe(release)
+            except RuntimeError:
+                pass  # The event loop is closed at shutdown
+
+        for future in futures:
+            future.add_done_callback(on_done)
+        return futures
+
+    async def _wait(self, futures: List[Future], request: Optional[Request], profile) -> List:
+        job = asyncio.gather(*[asyncio.wrap_future(future) for future in futures])
+        watcher = asyncio.ensure_future(self._watch_disconnect(request)) if request is not None else None
+        try:
+            waiting = {job} if watcher is None else {job, watcher}
+            done, _ = await asyncio.wait(waiting, timeout=self.job_timeout, return_when=asyncio.FIRST_COMPLETED)
+            if job in done:
+                return [self._record(*measured, profile=profile) for measured in job.result()]
+            # Only calls still waiting for a worker can be cancelled; running ones finish
+            # in the background and keep the job admitted until then.
+            for future in futures:
+                future.cancel()
+            job.cancel()
+            job.add_done_callback(lambda cancelled: cancelled.cancelled() or cancelled.exception())
+            if watcher is not None and watcher in done:
+                raise HTTPException(status_code=499, detail="Client disconnected, analysis cancelled")
+            raise HTTPException(status_code=504, detail="Analysis timed out")
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+
+    def _record(self, result, queue_wait: float, latencies: list, spans: list, job_stats: Optional[dict], profile=None):
+        if profile is not None and job_stats is not None:
+            profile.add_worker_stats(job_stats)
+        self.queue_wait.observe(queue_wait)
+        metrics.observe_stage("analysis_queue_wait", queue_wait)
+        for engine, seconds in latencies:
+            self.render_latency[engine].observe(seconds)
+        for stage, seconds in spans:
+            metrics.observe_stage(stage, seconds)
+        return result
+
+    @staticmethod
+    async def _watch_disconnect(request: Request, interval: float = 0.5) -> None:
+        while not await request.is_disconnected():
+            await asyncio.sleep(interval)
+
+    async def render_report(self, problems, request: Request = None) -> Tuple[bytes, dict]:
+        """
+        Renders the full analysis report as a ZIP file.
+
+        In the default "charts" mode (ANALYSIS_MODE) the charts are split into one batch
+        per worker, so one report is spread over all workers while each worker builds
+        the analyzer data only once. In "report" mode the whole report is rendered by a
+        single worker.
+
+        Returns:
+            The ZIP file and the errors of the charts that failed.
+        """
+        if params.get("ANALYSIS_MODE", "charts") == "report":
+            return await self.run(run_analysis_report, problems, request=request)
+
+        from Controller.analysis_problems import LeetCodeProblemAnalyzerEnhanced
+
+        analysis_results, errors = await self._render_report_charts(problems, request)
+        zip_file = await asyncio.get_running_loop().run_in_executor(
+            None, LeetCodeProblemAnalyzerEnhanced.generate_zip, analysis_results
+        )
+        return zip_file, errors
+
+    async def stream_report(self, problems, request: Request = None) -> Tuple[AsyncIterator[bytes], dict]:
+        """
+        Renders the full analysis report and streams it as a ZIP file.
+
+        In "charts" mode the archive is written entry by entry in a thread while it is
+        sent, so it is never assembled in memory. In "report" mode the worker returns
+        the finished archive, which is sent in chunks.
+
+        Returns:
+            The chunks of the ZIP file and the errors of the charts that failed.
+        """
+        if params.get("ANALYSIS_MODE", "charts") == "report":
+            zip_file, errors = await self.run(run_analysis_report, problems, request=request)
+            return iter_chunks(zip_file), errors
+
+        from Controller.analysis_problems import LeetCodeProblemAnalyzerEnhanced
+
+        analysis_results, errors = await self._render_report_charts(problems, request)
+        return iterate_in_threadpool(LeetCodeProblemAnalyzerEnhanced.iter_zip(analysis_results)), errors
+
+    async def _render_report_charts(self, problems, request: Optional[Request]) -> Tuple[dict, dict]:
+        from Controller.analysis_problems import LeetCodeProblemAnalyzerEnhanced
+
+        return await self.render_charts(
+            problems, list(LeetCodeProblemAnalyzerEnhanced.CHARTS), request=request, batches=self.max_workers
+        )
+
+    async def render_charts(
+        self, problems, charts: List[str], request: Request = None, batches: int = None
+    ) -> Tuple[dict, dict]:
+        """
+        Renders the given charts in `batches` concurrent jobs (default: one).
+
+        Each job renders its charts from a single analyzer, so the problem frame and the
+        aggregates are built once per job rather than once per chart. By default all the
+        charts of a request share one analyzer; the full report spreads them over the workers.
+
+        Returns:
+            The PNG images keyed by chart, in the order of `charts` (None for failed charts),
+            and the errors of the charts that failed.
+        """
+        if not charts:
+            return {}, {}
+        batches = min(batches or 1, len(charts))
+        # Round-robin, so the expensive charts that come first in report order are spread out
+        chart_batches = [charts[start::batches] for start in range(batches)]
+        rendered_batches = await self.map(
+            render_chart_batch, [(problems, batch) for batch in chart_batches], request=request
+        )
+        rendered = {
+            chart: result
+            for batch, results in zip(chart_batches, rendered_batches)
+            for chart, result in zip(batch, results)
+        }
+        images = {chart: rendered[chart][0] for chart in charts}
+        errors = {chart: rendered[chart][1] for chart in charts if rendered[chart][1]}
+        return images, errors
+
+    async def analysis_data(self, problems, request: Request = None) -> dict:
+        """
+        Computes the chart data of a problem set, without rendering any image.
+        """
+        return await self.run(run_analysis_data, problems, request=request)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "admitted_jobs": self._admitted,
+            "pool_restarts": self._restarts,
+            "queue_wait": self.queue_wait.stats(),
+            "render_latency": {engine: latency.stats() for engine, latency in self.render_latency.items()},
+            "renderers": {
+                "checked": len(self._renderers),
+                "healthy": sum(1 for health in self._renderers.values() if health["healthy"]),
+                "restarts": sum(health["restarts"] for health in self._renderers.values()),
+            },
+        }
+
+
+analysis_pool = AnalysisPool()
+
+
+async def start_analysis_pool(app: FastAPI):
+    analysis_pool.start()
+    # Config values may be strings, where "false" would otherwise count as set
+    if str(params.get("ANALYSIS_WARM_UP", True)).lower() not in ("0", "false", "no", ""):
+        analysis_pool.warm_up()
+    app.state.analysis_pool = analysis_pool
+
+
+async def close_analysis_pool(app: FastAPI):
+    analysis_pool.close()
@@ -1,28 +1,64 @@
 import pandas as pd
 import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
-import io
+import importlib
+import sys
 import base64
-import zipfile
-from io import BytesIO
-import plotly.express as px
-import plotly.graph_objects as go
+from functools import cached_property
+from Controller.problem_catalog import ProblemCatalog
+from Controller.report_zip import image_bytes, iter_zip
+from Controller.analysis_aggregates import AnalysisAggregates
+from Controller.metrics import span
+from Controller.plot_renderer import plot_renderer
+
+# The plotting libraries take most of the import time of this module, so they are
+# imported by the methods that draw. The data-only analysis never loads them, and
+# `preload_plotting` loads them ahead of the first report.
+PLOTTING_MODULES = ("matplotlib.pyplot", "seaborn", "plotly.express", "plotly.graph_objects")
+
+
+def preload_plotting():
+    """
+    Imports the plotting libraries, so the first chart does not pay for them.
+    """
+    for module in PLOTTING_MODULES:
+        importlib.import_module(module)
+
 
 class LeetCodeProblemAnalyzer:
     """
     Analyzes a list of LeetCode problems using pandas, numpy, and seaborn.
     """
 
-    def __init__(self, problems):
+    def __init__(self, problems, binary_images=False):
         """
         Initializes the analyzer with a list of LeetCode problems.
 
         Args:
-            problems: A list of dictionaries, where each dictionary represents a LeetCode problem
-                      and contains keys like 'title', 'difficulty', 'acceptance_rate', 'tags'.
+            problems: A ProblemCatalog, or a list of dictionaries where each dictionary represents
+                      a LeetCode problem and contains keys like 'title', 'difficulty',
+                      'acceptance_rate', 'tags'.
+            binary_images: Return charts as raw PNG bytes instead of base64 strings.
         """
-        self.problems = pd.DataFrame(problems)
+        self.binary_images = binary_images
+        if not isinstance(problems, ProblemCatalog):
+            problems = ProblemCatalog.from_problems(problems)
+        self.catalog = problems
+        self.errors = {}
+
+    @cached_property
+    def problems(self):
+        """
+        The problems as a DataFrame, built on first use: only the pandas-based charts need it.
+        """
+        with span("analysis_frame"):
+            return self.catalog.frame()
+
+    @cached_property
+    def aggregates(self):
+        """
+        The aggregates shared by the charts, built once per analyzer.
+        """
+        return AnalysisAggregates(self.catalog)
 
     def plot_to_base64(self, plot_func, is_plotly=False):
         """
@@ -35,25 +71,40 @@ class LeetCodeProblemAnalyzer:
         Returns:
             A base64-encoded string of the plot.
         """
-        buf = io.BytesIO()
+        return base64.b64encode(self.plot_to_png(plot_func, is_plotly)).decode('utf-8')
+
+    def render_plot(self, plot_func, is_plotly=False):
+        """
+        Renders a plot as PNG bytes or as a base64 string, depending on `binary_images`.
+        """
+        if self.binary_images:
+            return self.plot_to_png(plot_func, is_plotly)
+        return self.plot_to_base64(plot_func, is_plotly)
 
+    def plot_to_png(self, plot_func, is_plotly=False):
+        """
+        Renders a plot to PNG bytes.
+
+        Args:
+            plot_func: The function to generate the plot.
+            is_plotly: Whether the plot is a Plotly figure.
+
+        Returns:
+            The PNG image as bytes.
+        """
         if is_plotly:
             # Handle Plotly figure
-            plot_func.write_image(buf, format="png")
-        else:
-            # Handle Matplotlib figure
-            plot_func()
-            plt.savefig(buf, format="png")
-            plt.close()
-
-        buf.seek(0)
-        return base64.b64encode(buf.read()).decode('utf-8')
+            return plot_renderer.render_plotly(plot_func)
+        # Handle Matplotlib figure
+        return plot_renderer.render_matplotlib(plot_func)
 
 
     def analyze_difficulties(self):
         """
         Analyzes the distribution of problem difficulties with an interactive bar plot.
         """
+        import plotly.express as px
+
         fig = px.histogram(
             self.problems,
             x="difficulty",
@@ -64,12 +115,14 @@ class LeetCodeProblemAnalyzer:
             text_auto=True,
         )
         fig.update_layout(yaxis_title="Number of Problems")
-        return self.plot_to_base64(fig,is_plotly=True)
+        return self.render_plot(fig,is_plotly=True)
 
     def analyze_acceptance_rates(self):
         """
         Analyzes the distribution of acceptance rates with a dynamic histogram.
         """
+        import plotly.express as px
+
         fig = px.histogram(
             self.problems,
             x="acceptance_rate",
@@ -79,39 +132,35 @@ class LeetCodeProblemAnalyzer:
             color_discrete_sequence=["#1f77b4"],
         )
         fig.update_layout(yaxis_title="Number of Problems")
-        return self.plot_to_base64(fig,is_plotly=True)
+        return self.render_plot(fig,is_plotly=True)
 
     def analyze_tag_correlations(self):
         """
         Analyzes the correlations between problem tags.
         """
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
         def plot():
-            self.problems['all_tags'] = self.problems['tags'].apply(lambda x: ','.join(x).lower())
-            tag_mapping = {tag.lower(): i for i, tag in enumerate(self.problems['all_tags'].unique())}
-            tag_matrix = np.zeros((len(tag_mapping), len(tag_mapping)))
-
-            for _, row in self.problems.iterrows():
-                if pd.isna(row['all_tags']):
-                    continue
-                for tag1 in row['all_tags'].split(','):
-                    for tag2 in row['all_tags'].split(','):
-                        if tag1 != tag2:
-                            tag1_lower = tag1.lower()
-                            tag2_lower = tag2.lower()
-                            if tag1_lower in tag_mapping and tag2_lower in tag_mapping:
-                                tag_matrix[tag_mapping[tag1_lower], tag_mapping[tag2_lower]] += 1
-            tag_df = pd.DataFrame(tag_matrix, index=tag_mapping.keys(), columns=tag_mapping.keys())
+            # Pairs of distinct tags only, so the diagonal is cleared.
+            tag_matrix = self.aggregates.tag_cooccurrence.counts.copy()
+            np.fill_diagonal(tag_matrix, 0)
+            tag_names = self.aggregates.tag_cooccurrence.tag_names
+            tag_df = pd.DataFrame(tag_matrix, index=tag_names, columns=tag_names)
 
             plt.figure(figsize=(10, 8))
             sns.heatmap(tag_df, annot=True, cmap="YlGnBu")
             plt.title("Tag Co-occurrence Matrix")
 
-        return self.plot_to_base64(plot, is_plotly=True)
+        return self.render_plot(plot)
 
     def recommend_problem(self):
         """
         Recommends the easiest problem based on acceptance rate.
         """
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
         def plot():
             easiest_problem = self.problems.loc[self.problems['acceptance_rate'].idxmax()]
             plt.figure(figsize=(8, 6))
@@ -120,12 +169,14 @@ class LeetCodeProblemAnalyzer:
             plt.ylabel("Acceptance Rate")
             plt.xlabel("Problem")
 
-        return self.plot_to_base64(plot)
+        return self.render_plot(plot)
 
     def analyze_difficulty_vs_acceptance(self):
         """
         Analyzes the relationship between difficulty and acceptance rate with a scatter plot.
         """
+        import plotly.express as px
+
         fig = px.scatter(
             self.problems,
             x="difficulty",
@@ -135,14 +186,15 @@ class LeetCodeProblemAnalyzer:
             labels={"difficulty": "Difficulty", "acceptance_rate": "Acceptance Rate"},
             color_discrete_sequence=px.colors.qualitative.Set1,
         )
-        return self.plot_to_base64(fig,is_plotly=True)
+        return self.render_plot(fig,is_plotly=True)
 
     def analyze_tag_frequency(self):
         """
         Analyzes the frequency of problem tags with an enhanced horizontal bar plot.
         """
-        all_tags = [tag for tags in self.problems['tags'] for tag in tags]
-        tag_counts = pd.Series(all_tags).value_counts()
+        import plotly.express as px
+
+        tag_counts = self.aggregates.tag_frequencies
 
         fig = px.bar(
             x=tag_counts.values,
@@ -154,7 +206,7 @@ class LeetCodeProblemAnalyzer:
             color_continuous_scale="Blues",
         )
         fig.update_layout(xaxis_title="Count", yaxis_title="Tag")
-        return self.plot_to_base64(fig,is_plotly=True)
+        return self.render_plot(fig,is_plotly=True)
 
     def analyze_acceptance_rate_by_difficulty(self):
         """
@@ -177,21 +229,17 @@ class LeetCodeProblemAnalyzer:
             height=600,
         )
 
-        return self.plot_to_base64(fig,True)
+        return self.render_plot(fig,True)
 
     def analyze_average_acceptance_rate_by_tag(self):
         """
         Analyzes the average acceptance rate for each tag using Plotly.
         """
+        import plotly.graph_objects as go
+
         def plot():
             # Calculate the average acceptance rate for each tag
-            tag_avg_ac_rate = (
-                self.problems
-                .explode('tags')
-                .groupby('tags')['acceptance_rate']
-                .mean()
-                .sort_values(ascending=False)
-            )
+            tag_avg_ac_rate = self.aggregates.tag_acceptance_means
 
             # Create a Plotly bar chart
             fig = go.Figure(
@@ -217,15 +265,16 @@ class LeetCodeProblemAnalyzer:
 
         # Generate the Plotly figure
         fig = plot()
-        return self.plot_to_base64(fig,True)
+        return self.render_plot(fig,True)
 
 
     def analyze_problem_count_by_difficulty_and_tag(self):
         """
         Analyzes the problem count by difficulty and tag with an interactive heatmap.
         """
-        exploded_data = self.problems.explode('tags')
-        tag_difficulty_counts = exploded_data.groupby(['difficulty', 'tags']).size().unstack(fill_value=0)
+        import plotly.graph_objects as go
+
+        tag_difficulty_counts = self.aggregates.tag_difficulty_counts
 
         fig = go.Figure(
             data=go.Heatmap(
@@ -241,51 +290,105 @@ class LeetCodeProblemAnalyzer:
             yaxis_title="Difficulty",
             xaxis=dict(tickangle=45),
         )
-        return self.plot_to_base64(fig,is_plotly=True)
+        return self.render_plot(fig,is_plotly=True)
+
+    # Chart key -> analysis method, in report order.
+    CHARTS = {
+        "difficulty_distribution": "analyze_difficulties",
+        "acceptance_rate_distribution": "analyze_acceptance_rates",
+        "tag_correlations": "analyze_tag_correlations",
+        "recommended_problem": "recommend_problem",
+        "difficulty_vs_acceptance": "analyze_difficulty_vs_acceptance",
+        "tag_frequency": "analyze_tag_frequency",
+        "acceptance_rate_by_difficulty": "analyze_acceptance_rate_by_difficulty",
+        "average_acceptance_rate_by_tag": "analyze_average_acceptance_rate_by_tag",
+        "problem_count_by_difficulty_and_tag": "analyze_problem_count_by_difficulty_and_tag",
+    }
+
+    def analyze_chart(self, chart):
+        """
+        Renders a single chart, isolating its failure from the rest of the report.
+
+        Args:
+            chart: A key of `CHARTS`.
+
+        Returns:
+            A (base64 image or None, error message or None) tuple.
+        """
+        try:
+            with span(f"analysis_chart:{chart}"):
+                return getattr(self, self.CHARTS[chart])(), None
+        except Exception as e:
+            # Close any half-drawn Matplotlib figure, if Matplotlib was loaded at all
+            plt = sys.modules.get("matplotlib.pyplot")
+            if plt is not None:
+                plt.close("all")
+            return None, f"{type(e).__name__}: {e}"
+
+    def analyze(self, charts):
+        """
+        Renders only the given charts.
+
+        Args:
+            charts: Keys of `CHARTS`.
+
+        Returns:
+            The rendered charts keyed by chart name; failed charts are None and their
+            errors are kept in `self.errors`.
+        """
+        results = {}
+        self.errors = {}
+        for chart in charts:
+            results[chart], error = self.analyze_chart(chart)
+            if error:
+                self.errors[chart] = error
+        return results
 
     def analyze_all(self):
         """
         Performs all analyses and returns the results as base64 images.
+
+        A chart that fails to render is returned as None and its error is kept in `self.errors`.
         """
-        return {
-            "difficulty_distribution": self.analyze_difficulties(),
-            "acceptance_rate_distribution": self.analyze_acceptance_rates(),
-            "tag_correlations": self.analyze_tag_correlations(),
-            "recommended_problem": self.recommend_problem(),
-            "difficulty_vs_acceptance": self.analyze_difficulty_vs_acceptance(),
-            "tag_frequency": self.analyze_tag_frequency(),
-            "acceptance_rate_by_difficulty": self.analyze_acceptance_rate_by_difficulty(),
-            "average_acceptance_rate_by_tag": self.analyze_average_acceptance_rate_by_tag(),
-            "problem_count_by_difficulty_and_tag": self.analyze_problem_count_by_difficulty_and_tag(),
-        }
+        return self.analyze(self.CHARTS)
 
     @staticmethod
-    def generate_zip(analysis_results):
-        zip_buffer = BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for file_name, img_data in analysis_results.items():
-                img_binary = base64.b64decode(img_data)
-                zip_file.writestr(f"{file_name}.png", img_binary)
-        zip_buffer.seek(0)
-        return zip_buffer.getvalue()
+    def zip_entries(analysis_results):
+        """
+        Yields the (file name, data, compress) entries of the report ZIP file.
+
+        PNG images are already compressed, so they are stored rather than deflated.
+        """
+        for file_name, img_data in analysis_results.items():
+            if img_data:
+                yield f"{file_name}.png", image_bytes(img_data), False
+
+    @classmethod
+    def iter_zip(cls, analysis_results):
+        """
+        Streams the report ZIP file chunk by chunk.
+        """
+        return iter_zip(cls.zip_entries(analysis_results))
+
+    @classmethod
+    def generate_zip(cls, analysis_results):
+        with span("analysis_zip"):
+            return b"".join(cls.iter_zip(analysis_results))
 
 
 
 class LeetCodeProblemAnalyzerEnhanced(LeetCodeProblemAnalyzer):
     def analyze_tag_correlations(self):
         """
-        Analyzes the correlations between problem tags using a binary matrix and Plotly heatmap.
+        Analyzes the correlations between problem tags using the co-occurrence matrix and a Plotly heatmap.
         """
-        all_tags = list(set(tag for tags in self.problems["tags"] for tag in tags))
-        tag_binary_matrix = pd.DataFrame(
-            [[1 if tag in tags else 0 for tag in all_tags] for tags in self.problems["tags"]],
-            columns=all_tags,
-        )
-        co_occurrence_matrix = tag_binary_matrix.T.dot(tag_binary_matrix)
+        import plotly.graph_objects as go
+
+        all_tags = self.aggregates.tag_cooccurrence.tag_names
 
         fig = go.Figure(
             data=go.Heatmap(
-                z=co_occurrence_matrix.values,
+                z=self.aggregates.tag_cooccurrence.counts,
                 x=all_tags,
                 y=all_tags,
                 colorscale="viridis",
@@ -302,7 +405,7 @@ class LeetCodeProblemAnalyzerEnhanced(LeetCodeProblemAnalyzer):
             width=1000,
         )
 
-        return self.plot_to_base64(fig, is_plotly=True)
+        return self.render_plot(fig, is_plotly=True)
 
 
 
@@ -310,11 +413,11 @@ class LeetCodeProblemAnalyzerEnhanced(LeetCodeProblemAnalyzer):
         """
         Analyzes the popularity of tags within each difficulty level using Plotly heatmap.
         """
+        import plotly.graph_objects as go
+
         def plot():
-            # Explode tags into separate rows
-            exploded_data = self.problems.explode('tags')
             # Count occurrences of tags grouped by difficulty
-            tag_difficulty_counts = exploded_data.groupby(['difficulty', 'tags']).size().unstack(fill_value=0)
+            tag_difficulty_counts = self.aggregates.tag_difficulty_counts
 
             # Create a Plotly heatmap
             fig = go.Figure(
@@ -338,17 +441,18 @@ class LeetCodeProblemAnalyzerEnhanced(LeetCodeProblemAnalyzer):
 
         # Generate the Plotly figure
         fig = plot()
-        return self.plot_to_base64(fig,True)
+        return self.render_plot(fig,True)
 
 
     def analyze_acceptance_rate_trends(self):
         """
         Analyzes acceptance rate trends over years using Plotly if year data is available.
         """
-        if "year" not in self.problems.columns:
-            return None
+        import plotly.graph_objects as go
 
-        year_acceptance = self.problems.groupby("year")["acceptance_rate"].mean()
+        year_acceptance = self.aggregates.year_acceptance_means
+        if not len(year_acceptance):
+            return None
 
         fig = go.Figure(
             data=go.Scatter(
@@ -370,46 +474,81 @@ class LeetCodeProblemAnalyzerEnhanced(LeetCodeProblemAnalyzer):
             width=900,
         )
 
-        return self.plot_to_base64(fig, is_plotly=True)
+        return self.render_plot(fig, is_plotly=True)
 
 
 
-    def analyze_all(self):
+    def analyze_data(self):
         """
-        Performs all analyses, including new features, and returns results as base64 images.
+        Returns the data behind the charts instead of rendered images, for client-side charting.
+
+        Everything is aggregated, so the result stays small regardless of the number of problems.
         """
-        results = super().analyze_all()
-        results["tag_popularity_by_difficulty"] = self.analyze_tag_popularity_by_difficulty()
-        results["acceptance_rate_trends"] = self.analyze_acceptance_rate_trends()
-        return results
+        aggregates = self.aggregates
+        cooccurrence = aggregates.tag_cooccurrence
+        tag_difficulty_counts = aggregates.tag_difficulty_counts
+        easiest_problem = self.catalog.problem(int(np.argmax(self.catalog.acceptance))) if len(self.catalog) else None
+
+        return {
+            "problem_count": len(self.catalog),
+            "difficulty_distribution": {
+                "labels": aggregates.difficulty_counts.index.tolist(),
+                "counts": aggregates.difficulty_counts.tolist(),
+            },
+            "acceptance_rate_histogram": aggregates.acceptance_histogram(),
+            "acceptance_rate_by_difficulty": aggregates.acceptance_quartiles_by_difficulty,
+            "tag_cooccurrence": {
+                "tags": cooccurrence.tag_names,
+                "counts": cooccurrence.counts.tolist(),
+            },
+            "tag_frequency": {
+                "tags": aggregates.tag_frequencies.index.tolist(),
+                "counts": aggregates.tag_frequencies.tolist(),
+            },
+            "average_acceptance_rate_by_tag": {
+                "tags": aggregates.tag_acceptance_means.index.tolist(),
+                "averages": [round(float(mean), 2) for mean in aggregates.tag_acceptance_means],
+            },
+            "problem_count_by_difficulty_and_tag": {
+                "difficulties": tag_difficulty_counts.index.tolist(),
+                "tags": tag_difficulty_counts.columns.tolist(),
+                "counts": tag_difficulty_counts.values.tolist(),
+            },
+            "recommended_problem": easiest_problem and {
+                "title": easiest_problem["title"],
+                "acceptance_rate": easiest_problem["acceptance_rate"],
+            },
+            "acceptance_rate_trends": {
+                "years": aggregates.year_acceptance_means.index.tolist(),
+                "averages": [round(float(mean), 2) for mean in aggregates.year_acceptance_means],
+            },
+        }
+
+    CHARTS = {
+        **LeetCodeProblemAnalyzer.CHARTS,
+        "tag_popularity_by_difficulty": "analyze_tag_popularity_by_difficulty",
+        "acceptance_rate_trends": "analyze_acceptance_rate_trends",
+    }
 
     @staticmethod
-    def generate_zip(analysis_results):
-        """
-        Generates a zip file containing images and a textual summary.
-        """
-        zip_buffer = BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            # Add images
-            for file_name, img_data in analysis_results.items():
-                if img_data:
-                    img_binary = base64.b64decode(img_data)
-                    zip_file.writestr(f"{file_name}.png", img_binary)
-
-            # Add textual summary
-            summary = "LeetCode Problem Analysis\n\n"
-            summary += "1. Difficulty Distribution: Shows the count of problems by difficulty.\n"
-            summary += "2. Acceptance Rate Distribution: Shows the range of acceptance rates.\n"
-            summary += "3. Tag Correlations: Highlights relationships between tags.\n"
-            summary += "4. Recommended Problem: Suggests the easiest problem.\n"
-            summary += "5. Difficulty vs Acceptance Rate: Visualizes their relationship.\n"
-            summary += "6. Tag Frequency: Displays the count of each tag.\n"
-            summary += "7. Acceptance Rate by Difficulty: Boxplot of rates by difficulty.\n"
-            summary += "8. Average Acceptance Rate by Tag: Highlights tags with high acceptance.\n"
-            summary += "9. Problem Count by Difficulty and Tag: Heatmap of counts.\n"
-            summary += "10. Tag Popularity by Difficulty: Heatmap of tags by difficulty.\n"
-            summary += "11. Acceptance Rate Trends Over Years: Line chart of trends.\n"
-            zip_file.writestr("analysis_summary.txt", summary)
-
-        zip_buffer.seek(0)
-        return zip_buffer.getvalue()
+    def zip_entries(analysis_results):
+        """
+        Yields the entries of a zip file containing images and a textual summary.
+        """
+        # Add images
+        yield from LeetCodeProblemAnalyzer.zip_entries(analysis_results)
+
+        # Add textual summary
+        summary = "LeetCode Problem Analysis\n\n"
+        summary += "1. Difficulty Distribution: Shows the count of problems by difficulty.\n"
+        summary += "2. Acceptance Rate Distribution: Shows the range of acceptance rates.\n"
+        summary += "3. Tag Correlations: Highlights relationships between tags.\n"
+        summary += "4. Recommended Problem: Suggests the easiest problem.\n"
+        summary += "5. Difficulty vs Acceptance Rate: Visualizes their relationship.\n"
+        summary += "6. Tag Frequency: Displays the count of each tag.\n"
+        summary += "7. Acceptance Rate by Difficulty: Boxplot of rates by difficulty.\n"
+        summary += "8. Average Acceptance Rate by Tag: Highlights tags with high acceptance.\n"
+        summary += "9. Problem Count by Difficulty and Tag: Heatmap of counts.\n"
+        summary += "10. Tag Popularity by Difficulty: Heatmap of tags by difficulty.\n"
+        summary += "11. Acceptance Rate Trends Over Years: Line chart of trends.\n"
+        yield "analysis_summary.txt", summary.encode("utf-8"), True
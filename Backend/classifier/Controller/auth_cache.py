@@ -0,0 +1,82 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+from config import params
+
+
+class AuthCache:
+    """
+    Bounded TTL cache of the user IDs verified to exist in the database.
+
+    A token's signature and expiry are checked on every request, but once its
+    user was found in the database the lookup is skipped until the entry
+    expires. An entry lives for at most `ttl` seconds and never past the `exp`
+    of the token that verified it. Entries must be invalidated when a user is
+    updated or deleted, see `invalidate`.
+    """
+
+    def __init__(self, ttl: float = 300, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def get(self, user_id: str) -> bool:
+        """
+        Returns whether `user_id` was verified recently and the entry has not expired.
+        """
+        expires_at = self._entries.get(user_id)
+        if expires_at is not None:
+            if expires_at > time.time():
+                self._entries.move_to_end(user_id)
+                self._hits += 1
+                return True
+            del self._entries[user_id]
+        self._misses += 1
+        return False
+
+    def put(self, user_id: str, token_exp: Optional[float] = None) -> None:
+        """
+        Remembers that `user_id` exists.
+
+        Args:
+            user_id: The user ID of the token.
+            token_exp: The token's `exp` claim as a Unix timestamp, if any.
+        """
+        expires_at = time.time() + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, float(token_exp))
+        self._entries[user_id] = expires_at
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        """
+        Forgets `user_id`; call it whenever the user is updated or deleted.
+        """
+        if self._entries.pop(str(user_id), None) is not None:
+            self._invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self._invalidations,
+            "entries": len(self._entries),
+            "ttl_seconds": self.ttl,
+        }
+
+
+auth_cache = AuthCache(
+    ttl=float(params.get("AUTH_CACHE_TTL_SECONDS", 300)),
+    max_entries=int(params.get("AUTH_CACHE_MAX_ENTRIES", 10000)),
+)
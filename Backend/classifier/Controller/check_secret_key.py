@@ -1,4 +1,10 @@
+import hmac
 from config import params
 
 def authenticate_api_key(api_key):
-    return api_key == params['API_KEY']
\ No newline at end of file
+    return api_key == params['API_KEY']
+
+def authenticate_admin_key(admin_key):
+    # Admin features are disabled unless an ADMIN_KEY is configured
+    expected = params.get('ADMIN_KEY')
+    return bool(expected and admin_key) and hmac.compare_digest(str(admin_key), str(expected))
\ No newline at end of file
@@ -1,8 +1,8 @@
 import bcrypt
 #hashed password
-def hash_password(password):
-    #generate salt
-    salt = bcrypt.gensalt()
+def hash_password(password, rounds=12):
+    #generate salt with the given work factor
+    salt = bcrypt.gensalt(rounds=rounds)
 
     #hash the password using the generated salt
     hashed_password = bcrypt.hashpw(password.encode('utf-8'),salt)
@@ -0,0 +1,207 @@
+import bisect
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+from starlette.routing import Match
+
+# Latency buckets in seconds, from a cache hit up to a full cold analysis report.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # labels -> (per-bucket counts, +Inf count, sum)
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, *labels: str, value: float) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0, 0.0]
+            position = bisect.bisect_left(self.buckets, value)
+            if position < len(self.buckets):
+                series[0][position] += 1
+            series[1] += 1
+            series[2] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, value_sum) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                bucket = _labels(self.labelnames, labels, 'le="%g"' % bound)
+                lines.append(f"{self.name}_bucket{bucket} {cumulative}")
+            bucket = _labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{bucket} {total}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {value_sum:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {total}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics rendered in the Prometheus text exposition format.
+
+    Besides the request and stage histograms, components that already keep
+    their own counters (caches, pools) are exported as gauges through
+    collectors, so their `stats()` stay the single source of truth.
+    """
+
+    def __init__(self, prefix: str = "problems_analyzer"):
+        self.prefix = prefix
+        self.requests = Counter(
+            f"{prefix}_http_requests_total", "HTTP requests by route, method and status.", ("method", "route", "status")
+        )
+        self.request_duration = Histogram(
+            f"{prefix}_http_request_duration_seconds", "HTTP request latency by route, method and status.",
+            ("method", "route", "status"),
+        )
+        self.stage_duration = Histogram(
+            f"{prefix}_stage_duration_seconds", "Latency of internal stages (upstream, Mongo, analysis).", ("stage",)
+        )
+        self._collectors: Dict[str, Callable[[], dict]] = {}
+        # Spans recorded in analysis workers, shipped back to the API process with each job.
+        self.export_spans = False
+        self._exported: List[Tuple[str, float]] = []
+
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        self.stage_duration.observe(stage, value=seconds)
+        if self.export_spans:
+            self._exported.append((stage, seconds))
+
+    def drain_spans(self) -> List[Tuple[str, float]]:
+        spans, self._exported = self._exported, []
+        return spans
+
+    def register_collector(self, name: str, collect: Callable[[], dict]) -> None:
+        """
+        Exports the numeric values of `collect()` (nested dictionaries are flattened) as gauges.
+        """
+        self._collectors[name] = collect
+
+    def _collected(self) -> List[str]:
+        lines = []
+        for name, collect in self._collectors.items():
+            try:
+                values = collect()
+            except Exception:
+                continue
+            for key, value in self._flatten(values):
+                metric = re.sub(r"[^a-zA-Z0-9_]", "_", f"{self.prefix}_{name}_{key}")
+                lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric} {float(value):g}")
+        return lines
+
+    @classmethod
+    def _flatten(cls, values: dict, prefix: str = ""):
+        for key, value in values.items():
+            if isinstance(value, dict):
+                yield from cls._flatten(value, f"{prefix}{key}_")
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield f"{prefix}{key}", value
+
+    def render(self) -> str:
+        lines = self.requests.render() + self.request_duration.render() + self.stage_duration.render()
+        lines += self._collected()
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+@contextmanager
+def span(stage: str):
+    """
+    Times the enclosed block as `stage` in the stage latency histogram.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe_stage(stage, time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the latency and status of every HTTP request.
+
+    Requests are labelled with the route template (e.g. /user/analysis/{id}) rather
+    than the raw path, so IDs do not create new series; paths that match no route
+    are labelled "unmatched". The latency runs until the last body chunk is sent,
+    so streamed downloads are measured in full.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = metrics):
+        self.app = app
+        self.registry = registry
+        self._router = None
+
+    def route_of(self, scope) -> str:
+        router = self._router
+        if router is None:
+            router = self._router = scope["app"].router
+        for route in router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", "unmatched")
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status: Optional[int] = None
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            labels = (scope["method"], self.route_of(scope), str(status or 500))
+            self.registry.requests.inc(*labels)
+            self.registry.request_duration.observe(*labels, value=elapsed)
@@ -0,0 +1,127 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from fastapi import FastAPI, HTTPException
+from config import params
+from Controller.check_password import verify_password
+from Controller.hash_password import hash_password
+from response_error import ErrorResponseModel
+
+
+class PasswordService:
+    """
+    Hashes and verifies passwords with bcrypt off the event loop.
+
+    bcrypt releases the GIL, so a dedicated thread pool spreads hashing over
+    the cores while the event loop keeps serving other routes. At most
+    `max_pending` hashing operations are admitted at once (running or queued);
+    further logins and registrations are rejected with 503 instead of building
+    an unbounded backlog during a burst.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.rounds = 12
+        self.max_workers = 0
+        self.max_pending = 0
+        self._pending = 0
+
+        self._hashes = 0
+        self._verifications = 0
+        self._rehashes = 0
+        self._rejected = 0
+
+    def start(self, rounds: int = None, max_workers: int = None, max_pending: int = None) -> None:
+        if self._executor is not None:
+            return
+        self.rounds = rounds or int(params.get("BCRYPT_ROUNDS", 12))
+        self.max_workers = max_workers or int(params.get("PASSWORD_WORKERS", 0)) or os.cpu_count() or 1
+        self.max_pending = max_pending or int(params.get("PASSWORD_MAX_PENDING", 0)) or self.max_workers * 8
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password")
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self.start()
+        return self._executor
+
+    def has_capacity(self) -> bool:
+        """
+        Whether another hashing operation would be admitted right now.
+        """
+        if self._executor is None:
+            self.start()
+        return self._pending < self.max_pending
+
+    async def _run(self, func, *args):
+        executor = self.executor
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            error_response = ErrorResponseModel(status=False, detail="Too many login attempts, please retry later")
+            raise HTTPException(status_code=503, detail=dict(error_response))
+
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        """
+        Hashes a password with the configured work factor.
+        """
+        self._hashes += 1
+        return await self._run(hash_password, password, self.rounds)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """
+        Checks a password against its bcrypt hash.
+        """
+        self._verifications += 1
+        return await self._run(verify_password, password, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """
+        Whether a hash was made with a different work factor than the configured one.
+        """
+        try:
+            return int(hashed_password.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    async def rehash(self, password: str) -> str:
+        """
+        Hashes a just-verified password again with the configured work factor.
+        """
+        self._rehashes += 1
+        return await self.hash(password)
+
+    def stats(self) -> dict:
+        return {
+            "rounds": self.rounds,
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "hashes": self._hashes,
+            "verifications": self._verifications,
+            "rehashes": self._rehashes,
+            "rejected": self._rejected,
+        }
+
+
+password_service = PasswordService()
+
+
+async def start_password_service(app: FastAPI):
+    password_service.start()
+    app.state.password_service = password_service
+
+
+async def close_password_service(app: FastAPI):
+    password_service.close()
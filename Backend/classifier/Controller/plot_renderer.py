@@ -0,0 +1,254 @@
+import io
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+from config import params
+
+
+class KaleidoScope:
+    """
+    Narrow adapter over the Kaleido scope that exports Plotly figures.
+
+    Watching and stopping the Kaleido subprocess relies on members that are
+    private in kaleido 0.2.1, the version pinned in requirements.txt: the
+    `_proc` subprocess handle and `_shutdown_kaleido()`. They are only used
+    here and looked up with getattr, so with a kaleido release that renamed
+    them the renderer falls back to replacing the scope with a new one (whose
+    first export launches a new subprocess) instead of failing every chart.
+    """
+
+    def __init__(self, scope=None):
+        self._scope = scope
+
+    @property
+    def scope(self):
+        if self._scope is None:
+            import plotly.io as pio
+
+            self._scope = pio.kaleido.scope
+        return self._scope
+
+    def transform(self, figure: dict, format: str = "png") -> bytes:
+        return self.scope.transform(figure, format=format)
+
+    def process(self):
+        """
+        Returns the Kaleido subprocess, or None if it is not running or cannot be seen.
+        """
+        return getattr(self.scope, "_proc", None)
+
+    def visible(self) -> bool:
+        """
+        Whether this kaleido exposes its subprocess, so it can be health-checked and killed.
+        """
+        return hasattr(self.scope, "_proc")
+
+    def running(self) -> bool:
+        """
+        Whether the Kaleido subprocess is running; assumed so when it cannot be seen.
+        """
+        if not self.visible():
+            return True
+        process = self.process()
+        return process is not None and process.poll() is None
+
+    def kill(self) -> bool:
+        """
+        Kills the Kaleido subprocess, failing an export blocked on it.
+
+        Returns:
+            Whether a running subprocess was killed.
+        """
+        process = self.process()
+        if process is None or process.poll() is not None:
+            return False
+        process.kill()
+        return True
+
+    def shutdown(self) -> None:
+        """
+        Stops Kaleido, so the next export launches a new subprocess.
+        """
+        shutdown = getattr(self.scope, "_shutdown_kaleido", None)
+        if callable(shutdown):
+            shutdown()
+        else:
+            self.recreate()
+
+    def recreate(self) -> None:
+        """
+        Replaces the scope with a new one; the old one stops its subprocess when it is collected.
+        """
+        self._scope = type(self.scope)()
+
+
+class PlotRenderer:
+    """
+    Keeps one warm Kaleido renderer per analysis worker process.
+
+    Plotly exports images through a Kaleido subprocess that is expensive to
+    launch and slow on its first export (it loads plotly.js into a headless
+    browser). The renderer is started in the background when the worker
+    starts, health-checked before every export and restarted when it died,
+    and every export is bound by a timeout: a hung export kills the
+    subprocess, which is started again for the next chart.
+
+    The latency of every export is recorded, and handed back to the API
+    process with each job result by `drain_latencies`.
+    """
+
+    def __init__(self, render_timeout: float = 30, start_timeout: float = 60, kaleido: KaleidoScope = None):
+        self.render_timeout = render_timeout
+        self.start_timeout = start_timeout
+        self.started = False
+        self.starting = False
+        self.restarts = 0
+        self.kaleido = kaleido or KaleidoScope()
+        # Held while Kaleido is started or used, so an export waits for a start in progress
+        self._lock = threading.RLock()
+        self._latencies: List[Tuple[str, float]] = []
+
+    def healthy(self) -> bool:
+        """
+        Whether the Kaleido subprocess is running.
+        """
+        return self.kaleido.running()
+
+    def start(self) -> None:
+        """
+        Launches Kaleido and renders a blank figure, so plotly.js is loaded before the first chart.
+        """
+        import plotly.graph_objects as go
+
+        with self._lock:
+            self.starting = True
+            try:
+                self._with_timeout(self.start_timeout, self.kaleido.transform, go.Figure().to_dict(), format="png")
+                self.started = True
+            finally:
+                self.starting = False
+
+    def ensure_healthy(self) -> None:
+        """
+        Starts Kaleido if it was never started, and restarts it if its subprocess exited.
+        """
+        with self._lock:
+            if not self.started:
+                self.start()
+            elif not self.healthy():
+                self.kaleido.shutdown()
+                self.restarts += 1
+                self.start()
+
+    def render_plotly(self, fig) -> bytes:
+        """
+        Exports a Plotly figure as PNG bytes with the warm renderer.
+        """
+        with self._lock:
+            self.ensure_healthy()
+            start = time.perf_counter()
+            try:
+                image = self._with_timeout(self.render_timeout, self.kaleido.transform, fig.to_dict(), format="png")
+            except Exception:
+                # A dead subprocess that cannot be seen is not caught by the health check,
+                # so start from a new scope after any failed export instead.
+                if not self.kaleido.visible():
+                    self.kaleido.recreate()
+                    self.started = False
+                raise
+        self._latencies.append(("plotly", time.perf_counter() - start))
+        return image
+
+    def render_matplotlib(self, plot_func) -> bytes:
+        """
+        Draws a Matplotlib plot with `plot_func` and returns it as PNG bytes.
+        """
+        import matplotlib.pyplot as plt
+
+        start = time.perf_counter()
+        buf = io.BytesIO()
+        plot_func()
+        plt.savefig(buf, format="png")
+        plt.close()
+        self._latencies.append(("matplotlib", time.perf_counter() - start))
+        return buf.getvalue()
+
+    def _with_timeout(self, timeout: float, func, *args, **kwargs):
+        # Kaleido blocks on a pipe read without a timeout, so a watchdog kills the
+        # subprocess instead; the blocked read then fails and Kaleido is restarted.
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            if not self.kaleido.kill():
+                timed_out.clear()
+
+        watchdog = threading.Timer(timeout, kill)
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            if timed_out.is_set():
+                raise TimeoutError(f"Image export timed out after {timeout:g}s") from None
+            raise
+        finally:
+            watchdog.cancel()
+
+    def drain_latencies(self) -> List[Tuple[str, float]]:
+        """
+        Returns and clears the (engine, seconds) latencies recorded since the last call.
+        """
+        latencies, self._latencies = self._latencies, []
+        return latencies
+
+    def health(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "started": self.started,
+            "starting": self.starting,
+            "healthy": self.started and self.healthy(),
+            "restarts": self.restarts,
+        }
+
+
+plot_renderer = PlotRenderer(
+    render_timeout=float(params.get("RENDER_TIMEOUT_SECONDS", 30)),
+    start_timeout=float(params.get("RENDERER_START_TIMEOUT_SECONDS", 60)),
+)
+
+
+def start_renderer() -> None:
+    """
+    Analysis worker initializer: loads the plotting stack and starts the renderer in a background thread.
+
+    The worker takes jobs straight away, so data-only jobs never wait for Kaleido;
+    a chart job that arrives while it starts waits for the start to finish.
+    """
+    threading.Thread(target=_start_renderer, name="renderer-start", daemon=True).start()
+
+
+def _start_renderer() -> None:
+    # A failure is not raised; the renderer is started again on the first export instead.
+    try:
+        from Controller.analysis_problems import preload_plotting
+
+        preload_plotting()
+        plot_renderer.start()
+    except Exception:
+        pass
+
+
+def renderer_health() -> Optional[dict]:
+    """
+    Checks the renderer of the worker process it runs in, starting or restarting it if needed.
+
+    A renderer that is still starting is reported as it is, rather than waited for.
+    """
+    if not plot_renderer.starting:
+        try:
+            plot_renderer.ensure_healthy()
+        except Exception:
+            pass
+    return plot_renderer.health()
@@ -0,0 +1,190 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+from config import params
+from Controller.problem_catalog import ProblemCatalog
+from Controller.problem_index import ProblemIndex
+from Controller.single_flight import SingleFlight
+from Controller.tag_cooccurrence import TagCooccurrence
+
+
+class ProblemCatalogCache:
+    """
+    Process-wide, TTL-refreshed cache of the upstream problem catalog.
+
+    Entries are served from memory while fresh. Once an entry is older than
+    `refresh_after` seconds a background refresh is started and callers keep
+    getting the cached catalog; once it is older than `ttl` it is stale and is
+    still served (stale-while-revalidate) for up to `max_stale` more seconds
+    while the refresh runs. Only when no usable entry exists does a caller
+    wait for the upstream fetch.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[int], Awaitable[ProblemCatalog]],
+        ttl: float = 600,
+        refresh_ahead: float = 0.8,
+        max_stale: float = 3600,
+    ):
+        """
+        Args:
+            loader: Coroutine function returning a catalog with at least the first `limit` problems.
+            ttl: Seconds after which a cached catalog is considered stale.
+            refresh_ahead: Fraction of `ttl` after which a background refresh starts.
+            max_stale: Seconds past `ttl` during which a stale catalog may still be served.
+        """
+        self.loader = loader
+        self.ttl = ttl
+        self.refresh_after = ttl * refresh_ahead
+        self.max_stale = max_stale
+
+        self._catalog: Optional[ProblemCatalog] = None
+        # Views derived from the cached catalog, keyed by their type.
+        self._views: Dict[type, object] = {}
+        self._views_of: Optional[ProblemCatalog] = None
+        self._limit = 0
+        self._loaded_at = 0.0
+        self._flight = SingleFlight()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        self._hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._refreshes = 0
+        self._refresh_errors = 0
+
+    def _age(self) -> float:
+        return time.monotonic() - self._loaded_at
+
+    def _usable(self, limit: int) -> bool:
+        return (
+            self._catalog is not None
+            and self._limit >= limit
+            and self._age() < self.ttl + self.max_stale
+        )
+
+    async def get(self, limit: int) -> List[Dict]:
+        """
+        Returns the first `limit` problems of the catalog.
+
+        Args:
+            limit: Number of problems the caller needs.
+
+        Returns:
+            A list of problem dictionaries, materialised from the cached catalog.
+        """
+        catalog = await self.get_catalog(limit)
+        return catalog.to_records(limit)
+
+    async def get_index(self, limit: int) -> ProblemIndex:
+        """
+        Returns the index over the cached catalog, built once per loaded snapshot.
+
+        Args:
+            limit: Number of problems the catalog must cover.
+        """
+        return await self._get_view(ProblemIndex, limit)
+
+    async def get_tag_cooccurrence(self, limit: int) -> TagCooccurrence:
+        """
+        Returns the tag co-occurrence counts of the cached catalog, built once per loaded snapshot.
+
+        Args:
+            limit: Number of problems the catalog must cover.
+        """
+        return await self._get_view(TagCooccurrence, limit)
+
+    async def _get_view(self, view_type: type, limit: int):
+        catalog = await self.get_catalog(limit)
+        if self._views_of is not catalog:
+            # Only keep views of the current catalog; a refresh may have swapped it meanwhile.
+            if catalog is not self._catalog:
+                return view_type(catalog)
+            self._views = {}
+            self._views_of = catalog
+        view = self._views.get(view_type)
+        if view is None:
+            view = self._views[view_type] = view_type(catalog)
+        return view
+
+    async def get_catalog(self, limit: int) -> ProblemCatalog:
+        """
+        Returns the cached columnar catalog covering at least `limit` problems.
+        """
+        if self._usable(limit):
+            age = self._age()
+            if age < self.ttl:
+                self._hits += 1
+            else:
+                self._stale_hits += 1
+            if age >= self.refresh_after:
+                self._schedule_refresh()
+            return self._catalog
+
+        self._misses += 1
+        # Concurrent misses share one upstream load, and all of them get its error if it
+        # fails. A caller needing more problems than the load in flight covers waits for
+        # it and then starts the next one.
+        while not self._usable(limit):
+            await self._flight.do("catalog", lambda: self._load(max(limit, self._limit)))
+        return self._catalog
+
+    async def _load(self, limit: int) -> None:
+        catalog = await self.loader(limit)
+        self._catalog = catalog
+        # The loader may return more than asked for (e.g. the whole catalog).
+        self._limit = max(limit, len(catalog))
+        self._loaded_at = time.monotonic()
+
+    def _schedule_refresh(self) -> None:
+        if self._refresh_task and not self._refresh_task.done():
+            return
+        self._refresh_task = asyncio.get_running_loop().create_task(self._refresh())
+
+    async def _refresh(self) -> None:
+        if self._age() < self.refresh_after:
+            return
+        try:
+            await self._flight.do("catalog", lambda: self._load(self._limit))
+            self._refreshes += 1
+        except Exception:
+            # Keep serving the previous catalog; the next request retries.
+            self._refresh_errors += 1
+
+    def invalidate(self) -> None:
+        """
+        Drops the cached catalog so the next request fetches it again.
+        """
+        self._catalog = None
+        self._views = {}
+        self._views_of = None
+        self._limit = 0
+        self._loaded_at = 0.0
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters and the age of the cached catalog.
+        """
+        lookups = self._hits + self._stale_hits + self._misses
+        return {
+            "hits": self._hits,
+            "stale_hits": self._stale_hits,
+            "misses": self._misses,
+            "hit_rate": round((self._hits + self._stale_hits) / lookups, 4) if lookups else 0.0,
+            "refreshes": self._refreshes,
+            "refresh_errors": self._refresh_errors,
+            "cached_problems": len(self._catalog) if self._catalog is not None else 0,
+            "age_seconds": round(self._age(), 2) if self._catalog is not None else None,
+            "ttl_seconds": self.ttl,
+            "upstream_loads": self._flight.stats(),
+        }
+
+
+def create_problem_catalog_cache(loader: Callable[[int], Awaitable[ProblemCatalog]]) -> ProblemCatalogCache:
+    return ProblemCatalogCache(
+        loader,
+        ttl=float(params.get("CATALOG_TTL_SECONDS", 600)),
+        refresh_ahead=float(params.get("CATALOG_REFRESH_AHEAD", 0.8)),
+        max_stale=float(params.get("CATALOG_MAX_STALE_SECONDS", 3600)),
+    )
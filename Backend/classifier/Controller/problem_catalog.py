@@ -0,0 +1,226 @@
+import numpy as np
+from typing import Dict, Iterable, List, Optional
+
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+
+
+class ProblemCatalog:
+    """
+    Compact columnar representation of a list of problems.
+
+    Instead of one dictionary per problem the catalog keeps parallel columns:
+    titles and slugs as lists of strings, the difficulty as an int8 code into
+    `difficulty_labels`, the acceptance rate as float32 and the tags in CSR
+    form (`tag_ptr[i]:tag_ptr[i + 1]` slices `tag_ids`), with tag names
+    interned in `tag_names`. Problem dictionaries are only materialised on
+    demand, e.g. for API responses.
+    """
+
+    DETAILS_URL_TEMPLATE = ""
+
+    def __init__(
+        self,
+        titles: List[str],
+        slugs: List[str],
+        difficulty: np.ndarray,
+        acceptance: np.ndarray,
+        tag_ptr: np.ndarray,
+        tag_ids: np.ndarray,
+        tag_names: List[str],
+        difficulty_labels: List[str] = None,
+        year: Optional[np.ndarray] = None,
+    ):
+        self.titles = titles
+        self.slugs = slugs
+        self.difficulty = difficulty
+        self.acceptance = acceptance
+        self.tag_ptr = tag_ptr
+        self.tag_ids = tag_ids
+        self.tag_names = tag_names
+        self.difficulty_labels = difficulty_labels if difficulty_labels is not None else list(DIFFICULTIES)
+        self.year = year
+
+    @classmethod
+    def empty(cls) -> "ProblemCatalog":
+        return cls.from_problems([])
+
+    @classmethod
+    def from_problems(
+        cls,
+        problems: Iterable[Dict],
+        tag_names: List[str] = None,
+        difficulty_labels: List[str] = None,
+    ) -> "ProblemCatalog":
+        """
+        Builds a catalog from problem dictionaries.
+
+        Args:
+            problems: Dictionaries with 'title', 'difficulty', 'acceptance_rate', 'tags'
+                      and optionally 'title_slug' and 'year'.
+            tag_names: Existing tag vocabulary to extend, so tag ids stay stable across syncs.
+            difficulty_labels: Existing difficulty labels to extend.
+        """
+        tag_names = list(tag_names) if tag_names is not None else []
+        tag_lookup = {name: tag_id for tag_id, name in enumerate(tag_names)}
+        difficulty_labels = list(difficulty_labels) if difficulty_labels is not None else list(DIFFICULTIES)
+        difficulty_lookup = {label: code for code, label in enumerate(difficulty_labels)}
+
+        titles, slugs, difficulty, acceptance, years = [], [], [], [], []
+        tag_ptr, tag_ids = [0], []
+        has_year = False
+        for problem in problems:
+            titles.append(problem["title"])
+            slugs.append(problem.get("title_slug", ""))
+            label = problem["difficulty"]
+            if label not in difficulty_lookup:
+                difficulty_lookup[label] = len(difficulty_labels)
+                difficulty_labels.append(label)
+            difficulty.append(difficulty_lookup[label])
+            acceptance.append(problem["acceptance_rate"])
+            for tag in problem.get("tags") or []:
+                tag_id = tag_lookup.get(tag)
+                if tag_id is None:
+                    tag_id = tag_lookup[tag] = len(tag_names)
+                    tag_names.append(tag)
+                tag_ids.append(tag_id)
+            tag_ptr.append(len(tag_ids))
+            year = problem.get("year")
+            has_year = has_year or year is not None
+            years.append(np.nan if year is None else year)
+
+        return cls(
+            titles,
+            slugs,
+            np.asarray(difficulty, dtype=np.int8),
+            np.asarray(acceptance, dtype=np.float32),
+            np.asarray(tag_ptr, dtype=np.int32),
+            np.asarray(tag_ids, dtype=np.int32 if len(tag_names) > np.iinfo(np.int16).max else np.int16),
+            tag_names,
+            difficulty_labels,
+            np.asarray(years, dtype=np.float32) if has_year else None,
+        )
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def extend(self, problems: Iterable[Dict]) -> "ProblemCatalog":
+        """
+        Returns a new catalog with `problems` appended, sharing the tag vocabulary.
+        """
+        tail = ProblemCatalog.from_problems(problems, self.tag_names, self.difficulty_labels)
+        if not len(tail):
+            return self
+        year = None
+        if self.year is not None or tail.year is not None:
+            year = np.concatenate([
+                self.year if self.year is not None else np.full(len(self), np.nan, dtype=np.float32),
+                tail.year if tail.year is not None else np.full(len(tail), np.nan, dtype=np.float32),
+            ])
+        return ProblemCatalog(
+            self.titles + tail.titles,
+            self.slugs + tail.slugs,
+            np.concatenate([self.difficulty, tail.difficulty]),
+            np.concatenate([self.acceptance, tail.acceptance]),
+            np.concatenate([self.tag_ptr, tail.tag_ptr[1:] + self.tag_ptr[-1]]),
+            np.concatenate([self.tag_ids, tail.tag_ids]).astype(tail.tag_ids.dtype, copy=False),
+            tail.tag_names,
+            tail.difficulty_labels,
+            year,
+        )
+
+    def replace(self, problems: Dict[int, Dict]) -> "ProblemCatalog":
+        """
+        Returns a new catalog with the problems at the given ids replaced, sharing the tag vocabulary.
+        """
+        if not problems:
+            return self
+        problem_ids = sorted(problems)
+        patch = ProblemCatalog.from_problems(
+            [problems[problem_id] for problem_id in problem_ids], self.tag_names, self.difficulty_labels
+        )
+        titles, slugs = list(self.titles), list(self.slugs)
+        for row, problem_id in enumerate(problem_ids):
+            titles[problem_id] = patch.titles[row]
+            slugs[problem_id] = patch.slugs[row]
+        difficulty = self.difficulty.copy()
+        difficulty[problem_ids] = patch.difficulty
+        acceptance = self.acceptance.copy()
+        acceptance[problem_ids] = patch.acceptance
+
+        year = None
+        if self.year is not None or patch.year is not None:
+            year = self.year.copy() if self.year is not None else np.full(len(self), np.nan, dtype=np.float32)
+            year[problem_ids] = patch.year if patch.year is not None else np.nan
+
+        # Splice the replaced tag slices between the untouched runs of the CSR arrays.
+        tag_counts = self.tag_counts()
+        tag_counts[problem_ids] = patch.tag_counts()
+        segments, previous = [], 0
+        for row, problem_id in enumerate(problem_ids):
+            segments.append(self.tag_ids[self.tag_ptr[previous]:self.tag_ptr[problem_id]])
+            segments.append(patch.tag_ids[patch.tag_ptr[row]:patch.tag_ptr[row + 1]])
+            previous = problem_id + 1
+        segments.append(self.tag_ids[self.tag_ptr[previous]:])
+
+        return ProblemCatalog(
+            titles,
+            slugs,
+            difficulty,
+            acceptance,
+            np.concatenate([[0], np.cumsum(tag_counts)]).astype(np.int32),
+            np.concatenate(segments).astype(patch.tag_ids.dtype, copy=False),
+            patch.tag_names,
+            patch.difficulty_labels,
+            year,
+        )
+
+    def tags_of(self, problem_id: int) -> List[str]:
+        tag_names = self.tag_names
+        return [tag_names[tag_id] for tag_id in self.tag_ids[self.tag_ptr[problem_id]:self.tag_ptr[problem_id + 1]]]
+
+    def tag_counts(self) -> np.ndarray:
+        """
+        Returns the number of tags of each problem.
+        """
+        return np.diff(self.tag_ptr)
+
+    def problem(self, problem_id: int) -> Dict:
+        """
+        Materialises one problem as the dictionary shape used by the API.
+        """
+        slug = self.slugs[problem_id]
+        problem = {
+            "title": self.titles[problem_id],
+            "title_slug": slug,
+            "difficulty": self.difficulty_labels[self.difficulty[problem_id]],
+            "tags": self.tags_of(problem_id),
+            "acceptance_rate": round(float(self.acceptance[problem_id]), 2),
+            "details_url": self.DETAILS_URL_TEMPLATE.format(slug=slug),
+        }
+        if self.year is not None and not np.isnan(self.year[problem_id]):
+            problem["year"] = int(self.year[problem_id])
+        return problem
+
+    def problems(self, problem_ids: Iterable[int]) -> List[Dict]:
+        return [self.problem(int(problem_id)) for problem_id in problem_ids]
+
+    def to_records(self, limit: int = None) -> List[Dict]:
+        return self.problems(range(len(self) if limit is None else min(limit, len(self))))
+
+    def frame(self):
+        """
+        Returns a pandas DataFrame over the catalog columns.
+
+        The difficulty codes and acceptance rates are wrapped without copying. Tags are
+        left out: the charts read them from the CSR arrays through `AnalysisAggregates`.
+        """
+        import pandas as pd
+
+        columns = {
+            "title": self.titles,
+            "difficulty": pd.Categorical.from_codes(self.difficulty, categories=self.difficulty_labels),
+            "acceptance_rate": self.acceptance,
+        }
+        if self.year is not None:
+            columns["year"] = self.year
+        return pd.DataFrame(columns, copy=False)
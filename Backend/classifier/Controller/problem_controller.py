@@ -1,14 +1,25 @@
-import requests
-from typing import List, Dict
-from fastapi import HTTPException
-from fastapi import HTTPException
-from .analysis_problems import LeetCodeProblemAnalyzerEnhanced
+import httpx
+from typing import List, Dict, Optional, Tuple
+from fastapi import HTTPException, Request
 from fastapi.responses import StreamingResponse
 import base64
+import json
 from io import BytesIO
+from Controller.analysis_cache import analysis_cache
+from Controller.analysis_pool import analysis_pool
 from Controller.db_init import get_database
+from Controller.problem_cache import create_problem_catalog_cache
+from Controller.metrics import span
+from Controller.problem_catalog import ProblemCatalog
+from Controller.problem_index import ProblemIndex
+from Controller.problem_store import SETS_COLLECTION, problem_store
+from Controller.tag_cooccurrence import NORMALIZATIONS
+from Controller.problem_ingester import create_problem_catalog_ingester
+from Controller.upstream_client import upstream_client
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
+from config import params
+from response_error import ErrorResponseModel
 
 class ProblemController:
 
@@ -21,13 +32,11 @@ class ProblemController:
     Fetches problems from the LeetCode API using GraphQL.
     """
 
-    BASE_URL = ""
-    HEADERS = {"Content-Type": "application/json"}
-
     @staticmethod
     async def fetch_problems(limit: int = 300) -> List[Dict]:
         """
-        Fetches problems from the LeetCode API.
+        Returns problems from the shared catalog cache, fetching them from the LeetCode API
+        only when no usable cached catalog exists.
 
         Args:
             limit: Number of problems to fetch. Defaults to 300.
@@ -35,18 +44,73 @@ class ProblemController:
         Returns:
             A list of dictionaries containing problem details.
 
+        Raises:
+            HTTPException: If the catalog has to be fetched and the API request fails.
+        """
+        return await problem_catalog_cache.get(limit)
+
+    @staticmethod
+    def catalog_stats() -> dict:
+        """
+        Returns hit/miss counters and the age of the cached problem catalog, and the
+        problem store's write counters.
+        """
+        return {
+            **problem_catalog_cache.stats(),
+            **problem_catalog_ingester.stats(),
+            "store": problem_store.stats(),
+        }
+
+    @staticmethod
+    def analysis_stats() -> dict:
+        """
+        Returns the analysis pool's queue, render latency and renderer health metrics, and the
+        analysis cache counters.
+        """
+        return {"pool": analysis_pool.stats(), "cache": analysis_cache.stats()}
+
+    @staticmethod
+    async def sync_catalog(limit: int = 300) -> ProblemCatalog:
+        """
+        Synchronises the problem catalog with the LeetCode API page by page.
+
+        Args:
+            limit: Minimum number of problems the catalog must cover.
+
+        Returns:
+            The columnar problem catalog.
+        """
+        max_problems = int(params.get("CATALOG_MAX_PROBLEMS", 0))
+        if max_problems:
+            max_problems = max(limit, max_problems)
+        with span("catalog_sync"):
+            return await problem_catalog_ingester.sync(max_problems)
+
+    @staticmethod
+    async def fetch_problem_page(skip: int, limit: int) -> Tuple[List[Dict], Optional[int]]:
+        """
+        Fetches one page of problems from the LeetCode API.
+
+        Args:
+            skip: Number of problems to skip.
+            limit: Number of problems in the page.
+
+        Returns:
+            The formatted problems of the page and the total catalog length, if reported.
+
         Raises:
             HTTPException: If there's an issue with the API request or data processing.
         """
 
         try:
             query = """
-            query {
+            query problemsetQuestionListV2($skip: Int!, $limit: Int!) {
               problemsetQuestionListV2(
                 categorySlug: ""
-                limit: %d
-                skip: 0
+                limit: $limit
+                skip: $skip
               ) {
+                totalLength
                 questions {
                   title
                   titleSlug
@@ -58,17 +122,12 @@ class ProblemController:
                 }
               }
             }
-            """ % limit
-
-            payload = {"query": query}
-            response = requests.post(ProblemController.BASE_URL, json=payload, headers=ProblemController.HEADERS)
-            response.raise_for_status()
-
-            data = response.json()
-            questions = data.get("data", {}).get("problemsetQuestionListV2", {}).get("questions", [])
+            """
 
-            if not questions:
-                return []
+            with span("upstream_fetch_page"):
+                data = await upstream_client.post_graphql(query, {"skip": skip, "limit": limit})
+            question_list = (data.get("data") or {}).get("problemsetQuestionListV2") or {}
+            questions = question_list.get("questions") or []
 
             formatted_problems = [
                 {
@@ -82,9 +141,9 @@ class ProblemController:
                 for question in questions
             ]
 
-            return formatted_problems
+            return formatted_problems, question_list.get("totalLength")
 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"Error fetching data from LeetCode API: {e}"
@@ -95,6 +154,68 @@ class ProblemController:
                 detail=f"Internal server error: {e}"
             )
 
+    # Map skill to difficulty and acceptance rate thresholds
+    SKILL_TO_DIFFICULTY = {
+        "beginner": {"difficulty": ["Easy"], "acceptance_rate_threshold": 0.7},
+        "intermediate": {"difficulty": ["Easy", "Medium"], "acceptance_rate_threshold": 0.5},
+        "advanced": {"difficulty": ["Hard", "Medium", "Easy"], "acceptance_rate_threshold": 0.4},
+    }
+
+    @staticmethod
+    async def fetch_problem_index(limit: int = 300) -> ProblemIndex:
+        """
+        Returns the tag and difficulty index over the cached problem catalog.
+
+        Args:
+            limit: Number of problems the indexed catalog must cover.
+        """
+        return await problem_catalog_cache.get_index(limit)
+
+    @staticmethod
+    async def tag_pairs(k: int = 10, normalize: Optional[str] = None, limit: int = 1000) -> List[dict]:
+        """
+        Returns the most strongly co-occurring tag pairs of the problem catalog.
+
+        Args:
+            k: Number of pairs to return.
+            normalize: None for raw counts, "jaccard" or "pmi".
+            limit: Number of problems of the catalog to cover.
+
+        Raises:
+            HTTPException: If the normalization is unknown.
+        """
+        if normalize not in NORMALIZATIONS:
+            error_response = ErrorResponseModel(status=False, detail=f"Unknown normalization: {normalize}")
+            raise HTTPException(status_code=400, detail=dict(error_response))
+
+        cooccurrence = await problem_catalog_cache.get_tag_cooccurrence(limit)
+        return [
+            {"tags": [first, second], "score": score}
+            for first, second, score in cooccurrence.top_pairs(k, normalize)
+        ]
+
+    @staticmethod
+    def select_problems(index: ProblemIndex, skill: str, tags: List[str] = None) -> List[Dict]:
+        """
+        Selects the recommended problems for a skill level and tags from a catalog index.
+
+        Raises:
+            KeyError: If the skill level is unknown.
+        """
+        skill_to_difficulty = ProblemController.SKILL_TO_DIFFICULTY[skill]
+
+        # Recommendations used to come from the first 500 problems, widened to the
+        # first 1000 when fewer than 70 matched. Results are in catalog order, so the
+        # first 70 matches within the first 1000 problems are the same selection.
+        problem_ids = index.query(
+            skill_to_difficulty["difficulty"],
+            skill_to_difficulty["acceptance_rate_threshold"],
+            tags=tags,
+            scope=1000,
+            limit=70,
+        )
+        return index.get(problem_ids)
+
     @staticmethod
     async def recommend_problems(skill: str, tags: List[str] = None) -> List[Dict]:
         """
@@ -109,40 +230,9 @@ class ProblemController:
         """
 
         try:
-            # Increase initial fetch limit to improve chances of finding enough problems
-            all_problems = await ProblemController.fetch_problems(limit=500)
-
-            # Map skill to difficulty and acceptance rate thresholds
-            skill_to_difficulty = {
-                "beginner": {"difficulty": "Easy", "acceptance_rate_threshold": 0.7},
-                "intermediate": {"difficulty": ["Easy", "Medium"], "acceptance_rate_threshold": 0.5},
-                "advanced": {"difficulty": ["Hard", "Medium", "Easy"], "acceptance_rate_threshold": 0.4},
-            }
+            index = await ProblemController.fetch_problem_index(limit=1000)
+            filtered_problems = ProblemController.select_problems(index, skill, tags)
 
-            # Filter problems based on skill, difficulty, tags, and acceptance rate
-            filtered_problems = [
-                problem
-                for problem in all_problems
-                if (
-                    problem["difficulty"] in skill_to_difficulty[skill]["difficulty"]
-                    and (not tags or any(tag in problem["tags"] for tag in tags))
-                    and problem["acceptance_rate"] <= skill_to_difficulty[skill]["acceptance_rate_threshold"]
-                )
-            ]
-
-            # Ensure at least 10 problems are returned
-            if len(filtered_problems) < 70:
-                # If less than 10 problems found, increase fetch limit and try again
-                all_problems = await ProblemController.fetch_problems(limit=1000)
-                filtered_problems = [
-                    problem
-                    for problem in all_problems
-                    if (
-                        problem["difficulty"] in skill_to_difficulty[skill]["difficulty"]
-                        and (not tags or any(tag in problem["tags"] for tag in tags))
-                        and problem["acceptance_rate"] <= skill_to_difficulty[skill]["acceptance_rate_threshold"]
-                    )
-                ]
             try:
                 status = await ProblemController.add_problems(filtered_problems[:70])
                 return [
@@ -169,18 +259,80 @@ class ProblemController:
                 detail=error_response
             )
     @classmethod
-    async def add_problems(cls,problems: List[dict] = None) -> dict:
+    async def recommend_problems_batch(cls, queries: List[dict], include_problems: bool = True) -> List[Dict]:
+        """
+        Recommends problems for many skill/tag queries at once.
+
+        All queries are evaluated against one snapshot of the catalog index. Identical
+        queries (same skill, same set of tags) are evaluated once and share one saved
+        recommendation set, and all new sets are saved with a single bulk insert.
+
+        Args:
+            queries: Dictionaries with a "skill" and optional "tags", as for /user/classify/tags.
+            include_problems: Whether to return the problems of every set, or only set IDs.
+
+        Returns:
+            One result per query, in order: the set ID and problems, or the error of an invalid query.
+        """
+        max_queries = int(params.get("CLASSIFY_BATCH_MAX_QUERIES", 10000))
+        if len(queries) > max_queries:
+            error_response = ErrorResponseModel(status=False, detail=f"At most {max_queries} queries per batch")
+            raise HTTPException(status_code=413, detail=dict(error_response))
+
+        keys = []
+        for query in queries:
+            skill = str(query.get("skill", "beginner")).lower()
+            tags = query.get("tags") or []
+            if isinstance(tags, str):
+                tags = [tags]
+            if not isinstance(tags, (list, tuple)):
+                # Reported as this query's result, like an unknown skill
+                keys.append(None)
+                continue
+            keys.append((skill, tuple(sorted({str(tag) for tag in tags}))))
+
+        index = await cls.fetch_problem_index(limit=1000)
+        selections = {}
+        for key in dict.fromkeys(keys):
+            if key is None:
+                continue
+            skill, tags = key
+            if skill in cls.SKILL_TO_DIFFICULTY:
+                selections[key] = cls.select_problems(index, skill, list(tags))
+
         try:
             collection = await cls.get_collection()
-            problems_collections = collection["Problems"]
+            with span("mongo_save_problem_sets"):
+                set_ids = await problem_store.save_sets(collection, list(selections.values()))
+        except Exception as e:
+            error_response = ErrorResponseModel(status=False, detail=f"Error saving recommendations: {e}")
+            raise HTTPException(status_code=500, detail=dict(error_response))
+        saved = {key: str(set_id) for key, set_id in zip(selections, set_ids)}
+
+        results = []
+        for key in keys:
+            if key is None:
+                results.append({"status": False, "detail": "tags must be a list of strings"})
+                continue
+            if key not in selections:
+                results.append({"status": False, "detail": f"Unknown skill: {key[0]}"})
+                continue
+            result = {"id": saved[key], "status": "True"}
+            if include_problems:
+                result["problems"] = selections[key]
+            results.append(result)
+        return results
 
-            document = {
-                "problems": problems,
-            }
-            new_problems = await problems_collections.insert_one(document)
+    @classmethod
+    async def add_problems(cls,problems: List[dict] = None) -> dict:
+        try:
+            collection = await cls.get_collection()
+            # Only references are stored; the problems themselves live in the catalog collection
+            with span("mongo_save_problem_set"):
+                inserted_id = await problem_store.save_set(collection, problems or [])
             return {
                 "status":"True",
-                "id":str(new_problems.inserted_id)
+                "id":str(inserted_id)
             }
         except Exception as e:
             return{
@@ -191,61 +343,251 @@ class ProblemController:
     @classmethod
     async def get_problems_by_id(cls, id: str) -> dict:
         """
-        Fetches a problems document by its ID.
+        Fetches a problems document by its ID, with its problem references resolved.
 
         :param id: The ID of the document to fetch.
         :return: The document containing problems, or None if not found.
         """
         try:
             collection = await cls.get_collection()
-            problems_collection = collection["Problems"]
-            document = await problems_collection.find_one({"_id": ObjectId(id)})
-            return document
+            problems_collection = collection[SETS_COLLECTION]
+            with span("mongo_get_problem_set"):
+                document = await problems_collection.find_one({"_id": ObjectId(id)})
+                return await problem_store.resolve(collection, document)
         except Exception as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"Error fetching problems by ID: {e}"
             )
+    @classmethod
+    async def get_problem_set(cls, id: str) -> List[dict]:
+        """
+        Returns the problems of a saved problem set.
+
+        :param id: The ID of the document containing the problems.
+        :raises HTTPException: 404 if the set does not exist or holds no problems.
+        """
+        # Fetch the problems document by ID
+        document = await cls.get_problems_by_id(id)
+        if not document:
+            raise HTTPException(status_code=404, detail="No problems found for the given ID.")
+
+        # Extract problems from the document
+        problems = document.get("problems", [])
+        if not problems or not isinstance(problems, list):
+            raise HTTPException(status_code=404, detail="No problems found in the document or invalid format.")
+        return problems
+
     @staticmethod
-    async def analysis_problems(id: str) -> dict:
+    async def analysis_report(id: str, request: Request = None) -> dict:
         """
-        Finds problems by ID from the database, performs analysis, and returns the results as a Base64-encoded ZIP file.
+        Finds problems by ID from the database, performs analysis, and returns the results as a ZIP file.
+
+        The charts are rendered in the analysis process pool, so the event loop stays free
+        while a report is being built. PNG entries are stored, not deflated.
 
         :param id: The ID of the document containing the problems.
-        :return: A dictionary with the analysis status and the Base64-encoded ZIP file.
+        :param request: The incoming request, used to cancel the job if the client disconnects.
+        :return: A dictionary with the analysis status, the ZIP file as bytes and the failed charts.
         """
         try:
-            # Fetch the problems document by ID
-            document = await ProblemController.get_problems_by_id(id)
-            if not document:
-                return {
-                    "status": False,
-                    "detail": "No problems found for the given ID."
-                }
+            problems = await ProblemController.get_problem_set(id)
+
+            # Identical problem sets share one cached report
+            cache_key = analysis_cache.key(problems, "report")
+            zip_file, errors = await analysis_cache.get(cache_key), {}
+            if zip_file is None:
+                # Perform analysis using LeetCodeProblemAnalyzerEnhanced and zip the results
+                catalog = ProblemCatalog.from_problems(problems)
+                zip_file, errors = await analysis_pool.render_report(catalog, request=request)
+                # Reports with failed charts are not cached so the next view retries them
+                if not errors:
+                    await analysis_cache.put(cache_key, zip_file)
 
-            # Extract problems from the document
-            problems = document.get("problems", [])
-            if not problems or not isinstance(problems, list):
-                return {
-                    "status": False,
-                    "detail": "No problems found in the document or invalid format."
-                }
+            return {
+                "status": True,
+                "file": zip_file,
+                "failed_charts": errors
+            }
 
-            # Perform analysis using LeetCodeProblemAnalyzerEnhanced
-            analyzer = LeetCodeProblemAnalyzerEnhanced(problems)
-            analysis_results = analyzer.analyze_all()
+        except HTTPException as e:
+            return {
+                "status": False,
+                "detail": str(e.detail)
+            }
+        except Exception as e:
+            return {
+                "status": False,
+                "detail": f"Error during analysis: {str(e)}"
+            }
 
-            # Generate a ZIP file of the analysis results
-            zip_file = LeetCodeProblemAnalyzerEnhanced.generate_zip(analysis_results)
-            zip_file_base64 = base64.b64encode(zip_file).decode("utf-8")
+    @staticmethod
+    async def analysis_report_stream(id: str, request: Request = None) -> dict:
+        """
+        Like `analysis_report`, but returns the ZIP file as a stream of chunks for downloads.
+
+        A cached report is streamed from the cache (from its file, if it is only on disk).
+        A new report is zipped while it is sent and cached once it has been sent in full.
+
+        :param id: The ID of the document containing the problems.
+        :param request: The incoming request, used to cancel the job if the client disconnects.
+        :return: A dictionary with the analysis status, the ZIP file chunks, its size
+                 (None if not known up front) and the failed charts.
+        """
+        try:
+            problems = await ProblemController.get_problem_set(id)
+
+            cache_key = analysis_cache.key(problems, "report")
+            cached = await analysis_cache.open(cache_key)
+            if cached is not None:
+                chunks, size = cached
+                errors = {}
+            else:
+                catalog = ProblemCatalog.from_problems(problems)
+                chunks, errors = await analysis_pool.stream_report(catalog, request=request)
+                size = None
+                # Reports with failed charts are not cached so the next view retries them
+                if not errors:
+                    chunks = analysis_cache.tee(cache_key, chunks)
 
             return {
                 "status": True,
-                "file": zip_file_base64
+                "chunks": chunks,
+                "size": size,
+                "failed_charts": errors
             }
 
+        except HTTPException as e:
+            return {
+                "status": False,
+                "detail": str(e.detail)
+            }
         except Exception as e:
             return {
                 "status": False,
                 "detail": f"Error during analysis: {str(e)}"
             }
+
+    @staticmethod
+    async def analysis_data(id: str, request: Request = None) -> dict:
+        """
+        Returns the data behind the analysis charts of a problem set as JSON, so the client
+        can draw the charts itself.
+
+        :param id: The ID of the document containing the problems.
+        :param request: The incoming request, used to cancel the job if the client disconnects.
+        :return: A dictionary with the analysis status and the chart data.
+        """
+        try:
+            problems = await ProblemController.get_problem_set(id)
+
+            cache_key = analysis_cache.key(problems, "data")
+            cached = await analysis_cache.get(cache_key)
+            if cached is not None:
+                data = json.loads(cached)
+            else:
+                catalog = ProblemCatalog.from_problems(problems)
+                data = await analysis_pool.analysis_data(catalog, request=request)
+                await analysis_cache.put(cache_key, json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+            return {
+                "status": True,
+                "data": data
+            }
+
+        except HTTPException as e:
+            return {
+                "status": False,
+                "detail": str(e.detail)
+            }
+        except Exception as e:
+            return {
+                "status": False,
+                "detail": f"Error during analysis: {str(e)}"
+            }
+
+    @staticmethod
+    def chart_keys() -> List[str]:
+        """
+        Returns the keys of the charts available from LeetCodeProblemAnalyzerEnhanced, in report order.
+        """
+        from Controller.analysis_problems import LeetCodeProblemAnalyzerEnhanced
+
+        return list(LeetCodeProblemAnalyzerEnhanced.CHARTS)
+
+    @staticmethod
+    def check_chart_keys(charts: List[str]) -> None:
+        """
+        Raises:
+            HTTPException: 404 if any of the charts is unknown.
+        """
+        unknown = [chart for chart in charts if chart not in ProblemController.chart_keys()]
+        if unknown:
+            raise HTTPException(status_code=404, detail=f"Unknown chart(s): {', '.join(unknown)}")
+
+    @staticmethod
+    async def analysis_charts(id: str, charts: List[str], request: Request = None) -> dict:
+        """
+        Renders only the named charts of a problem set.
+
+        :param id: The ID of the document containing the problems.
+        :param charts: Chart keys, see `chart_keys`.
+        :param request: The incoming request, used to cancel the job if the client disconnects.
+        :return: A dictionary with the analysis status, the PNG images keyed by chart and the failed charts.
+        """
+        try:
+            ProblemController.check_chart_keys(charts)
+
+            problems = await ProblemController.get_problem_set(id)
+
+            # Serve cached charts and only render the missing ones
+            digest = analysis_cache.digest(problems)
+            images = {}
+            for chart in dict.fromkeys(charts):
+                images[chart] = await analysis_cache.get(analysis_cache.key(problems, f"chart:{chart}", digest))
+            missing = [chart for chart, image in images.items() if image is None]
+
+            errors = {}
+            if missing:
+                catalog = ProblemCatalog.from_problems(problems)
+                rendered, errors = await analysis_pool.render_charts(catalog, missing, request=request)
+                for chart, image in rendered.items():
+                    images[chart] = image
+                    if image:
+                        await analysis_cache.put(analysis_cache.key(problems, f"chart:{chart}", digest), image)
+
+            return {
+                "status": True,
+                "charts": images,
+                "failed_charts": errors
+            }
+
+        except HTTPException as e:
+            return {
+                "status": False,
+                "detail": str(e.detail)
+            }
+        except Exception as e:
+            return {
+                "status": False,
+                "detail": f"Error during analysis: {str(e)}"
+            }
+
+    @staticmethod
+    async def analysis_problems(id: str, request: Request = None) -> dict:
+        """
+        Performs the analysis of a problem set and returns the results as a Base64-encoded ZIP file.
+
+        :param id: The ID of the document containing the problems.
+        :param request: The incoming request, used to cancel the job if the client disconnects.
+        :return: A dictionary with the analysis status and the Base64-encoded ZIP file.
+        """
+        report = await ProblemController.analysis_report(id, request)
+        if report["status"]:
+            with span("analysis_base64"):
+                report["file"] = base64.b64encode(report["file"]).decode("utf-8")
+        return report
+
+
+problem_catalog_ingester = create_problem_catalog_ingester(ProblemController.fetch_problem_page)
+problem_catalog_cache = create_problem_catalog_cache(ProblemController.sync_catalog)
@@ -0,0 +1,100 @@
+import numpy as np
+from typing import Dict, Iterable, List, Optional
+from Controller.problem_catalog import ProblemCatalog
+
+
+class ProblemIndex:
+    """
+    Read-only index over a catalog snapshot.
+
+    Problem ids are positions in the catalog, so sorting ids restores catalog
+    order and `id < scope` restricts a query to the first `scope` problems.
+    Each tag maps to a sorted posting array of ids, and each difficulty maps
+    to its ids sorted by acceptance rate, so a threshold is a single
+    `searchsorted`.
+    """
+
+    def __init__(self, catalog: ProblemCatalog):
+        self.catalog = catalog
+
+        # Tag postings straight from the CSR membership arrays.
+        problem_of = np.repeat(np.arange(len(catalog), dtype=np.int32), catalog.tag_counts())
+        order = np.argsort(catalog.tag_ids, kind="stable")
+        bounds = np.searchsorted(catalog.tag_ids[order], np.arange(len(catalog.tag_names) + 1))
+        sorted_problems = problem_of[order]
+        self.tag_postings: Dict[str, np.ndarray] = {
+            name: sorted_problems[bounds[tag_id]:bounds[tag_id + 1]]
+            for tag_id, name in enumerate(catalog.tag_names)
+        }
+
+        # difficulty -> (ascending acceptance rates, ids in the same order)
+        self.difficulty_buckets: Dict[str, tuple] = {}
+        for code, label in enumerate(catalog.difficulty_labels):
+            ids = np.flatnonzero(catalog.difficulty == code).astype(np.int32)
+            if not len(ids):
+                continue
+            rates = catalog.acceptance[ids]
+            order = np.argsort(rates, kind="stable")
+            self.difficulty_buckets[label] = (rates[order], ids[order])
+
+    def __len__(self) -> int:
+        return len(self.catalog)
+
+    def with_tags(self, tags: Iterable[str]) -> np.ndarray:
+        """
+        Returns the sorted ids of problems carrying any of the given tags.
+        """
+        postings = [self.tag_postings[tag] for tag in tags if tag in self.tag_postings]
+        if not postings:
+            return np.empty(0, dtype=np.int32)
+        if len(postings) == 1:
+            return postings[0]
+        return np.unique(np.concatenate(postings))
+
+    def with_max_acceptance(self, difficulties: Iterable[str], max_acceptance: float) -> np.ndarray:
+        """
+        Returns the sorted ids of problems of the given difficulties whose acceptance
+        rate is at most `max_acceptance`.
+        """
+        # Compare in float32 so a rate equal to the threshold is still included.
+        threshold = np.float32(max_acceptance)
+        matched = []
+        for difficulty in set(difficulties):
+            bucket = self.difficulty_buckets.get(difficulty)
+            if bucket:
+                rates, ids = bucket
+                matched.append(ids[:np.searchsorted(rates, threshold, side="right")])
+        if not matched:
+            return np.empty(0, dtype=np.int32)
+        return np.sort(np.concatenate(matched))
+
+    def query(
+        self,
+        difficulties: Iterable[str],
+        max_acceptance: float,
+        tags: Optional[Iterable[str]] = None,
+        scope: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[int]:
+        """
+        Finds problems matching a difficulty set, an acceptance ceiling and any of `tags`.
+
+        Args:
+            difficulties: Accepted difficulty labels, e.g. ["Easy", "Medium"].
+            max_acceptance: Inclusive acceptance rate ceiling.
+            tags: Optional tags; a problem matches if it has at least one of them.
+            scope: Only consider the first `scope` problems of the catalog.
+            limit: Maximum number of ids to return.
+
+        Returns:
+            Matching problem ids in catalog order.
+        """
+        ids = self.with_max_acceptance(difficulties, max_acceptance)
+        if scope is not None:
+            ids = ids[:np.searchsorted(ids, scope)]
+        if tags:
+            ids = np.intersect1d(ids, self.with_tags(tags), assume_unique=True)
+        return ids[:limit].tolist() if limit is not None else ids.tolist()
+
+    def get(self, ids: Iterable[int]) -> List[Dict]:
+        return self.catalog.problems(ids)
@@ -0,0 +1,204 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from config import params
+from Controller.problem_catalog import ProblemCatalog
+
+# fetch_page(skip, limit) -> (formatted problems, total catalog length or None)
+PageFetcher = Callable[[int, int], Awaitable[Tuple[List[Dict], Optional[int]]]]
+
+
+class ProblemCatalogIngester:
+    """
+    Builds the problem catalog from paginated upstream queries.
+
+    Pages are fetched concurrently with at most `max_concurrency` requests in
+    flight and collected by catalog position as they arrive; the new catalog
+    snapshot is built once every page of the sync has been fetched. A full
+    sync walks every page. An incremental sync fetches the pages past the end
+    of the known catalog, where new problems are appended, and re-fetches a
+    window of `refresh_pages` known pages, so changed problems are picked up
+    without a full sync. The window rotates through the catalog from one
+    sync to the next; upstream has no modified marker, so a change outside
+    the window waits until the window reaches it (or the next full sync).
+    Problems are keyed by `title_slug` when merging, and each sync produces
+    a new immutable `ProblemCatalog` snapshot.
+    """
+
+    def __init__(
+        self,
+        fetch_page: PageFetcher,
+        page_size: int = 100,
+        max_concurrency: int = 8,
+        full_sync_interval: float = 6 * 3600,
+        refresh_pages: int = 2,
+    ):
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self.max_concurrency = max_concurrency
+        self.full_sync_interval = full_sync_interval
+        self.refresh_pages = refresh_pages
+
+        self._catalog = ProblemCatalog.empty()
+        self._total: Optional[int] = None
+        self._last_full_sync = 0.0
+        self._refresh_cursor = 0
+        self._last_sync: dict = {}
+
+    async def sync(self, max_problems: int = 0) -> ProblemCatalog:
+        """
+        Brings the catalog up to date and returns it.
+
+        Args:
+            max_problems: Upper bound on the catalog size; 0 means the whole upstream catalog.
+
+        Returns:
+            A new columnar catalog snapshot, in upstream order.
+        """
+        started = time.monotonic()
+        previous = self._catalog
+        full = not len(previous) or started - self._last_full_sync >= self.full_sync_interval
+        start = 0 if full else len(previous)
+        if full:
+            # Use the last known catalog size so every page can be requested at once.
+            expected = self._total or self.page_size * self.max_concurrency
+        else:
+            expected = start + self.page_size
+        if max_problems:
+            expected = min(expected, max_problems)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        window = (0, 0) if full else self._refresh_window(len(previous))
+        fetches = [self._fetch_range(start, expected, max_problems, semaphore)]
+        if window[1] > window[0]:
+            # Bounded by its own end, so the window never walks on into the tail.
+            fetches.append(self._fetch_range(window[0], window[1], window[1], semaphore))
+        tasks = [asyncio.ensure_future(fetch) for fetch in fetches]
+        try:
+            ranges = await asyncio.gather(*tasks)
+        except BaseException:
+            # gather leaves the other range running when one fails; stop it rather
+            # than keep fetching pages for a sync that is abandoned.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        for _, total, _ in ranges:
+            if total is not None:
+                self._total = total
+        pages = sum(range_pages for _, _, range_pages in ranges)
+
+        slots = {}
+        for range_slots, _, _ in ranges:
+            slots.update(range_slots)
+        fetched = list({
+            problem["title_slug"]: problem for problem in (slots[position] for position in sorted(slots))
+        }.values())
+        known = {slug: problem_id for problem_id, slug in enumerate(previous.slugs)}
+        added = 0
+        updates = {}
+        for problem in fetched:
+            problem_id = known.get(problem["title_slug"])
+            if problem_id is None:
+                added += 1
+            elif previous.problem(problem_id) != problem:
+                updates[problem_id] = problem
+
+        if full:
+            removed = len(known.keys() - {problem["title_slug"] for problem in fetched})
+            # Reuse the vocabulary so tag ids stay stable across syncs.
+            self._catalog = ProblemCatalog.from_problems(fetched, previous.tag_names, previous.difficulty_labels)
+            self._last_full_sync = started
+        else:
+            removed = 0
+            self._catalog = previous.replace(updates).extend(
+                problem for problem in fetched if problem["title_slug"] not in known
+            )
+            self._refresh_cursor = window[1]
+
+        self._last_sync = {
+            "mode": "full" if full else "incremental",
+            "pages": pages,
+            "added": added,
+            "changed": len(updates),
+            "removed": removed,
+            "problems": len(self._catalog),
+            "duration_seconds": round(time.monotonic() - started, 3),
+        }
+        return self._catalog
+
+    def _refresh_window(self, known: int) -> Tuple[int, int]:
+        """
+        Returns the [start, end) positions of the known pages an incremental sync re-fetches.
+        """
+        if not self.refresh_pages or not known:
+            return 0, 0
+        start = self._refresh_cursor if self._refresh_cursor < known else 0
+        return start, min(start + self.refresh_pages * self.page_size, known)
+
+    async def _fetch_range(
+        self, start: int, expected: int, max_problems: int, semaphore: asyncio.Semaphore
+    ) -> Tuple[Dict[int, Dict], Optional[int], int]:
+        """
+        Fetches pages from `start` until the upstream catalog (or `max_problems`) is exhausted.
+
+        Returns:
+            Problems keyed by catalog position, the upstream total and the number of pages fetched.
+        """
+        slots: Dict[int, Dict] = {}
+        total: Optional[int] = None
+        end = max(expected, start + 1)
+        if max_problems:
+            # Nothing past max_problems is requested, so every page has a positive limit.
+            end = min(end, max_problems)
+        next_skip = start
+        pages = 0
+
+        async def fetch(skip: int) -> Tuple[int, List[Dict], Optional[int]]:
+            limit = self.page_size
+            if max_problems:
+                limit = min(limit, max_problems - skip)
+            async with semaphore:
+                problems, page_total = await self.fetch_page(skip, limit)
+            return skip, problems, page_total
+
+        pending = set()
+        try:
+            while True:
+                while next_skip < end:
+                    pending.add(asyncio.ensure_future(fetch(next_skip)))
+                    next_skip += self.page_size
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    skip, problems, page_total = task.result()
+                    pages += 1
+                    for offset, problem in enumerate(problems):
+                        slots[skip + offset] = problem
+                    if page_total is not None:
+                        total = page_total
+                        end = page_total
+                    elif len(problems) == self.page_size and skip + self.page_size >= end:
+                        # No total reported: keep walking while pages come back full.
+                        end = skip + 2 * self.page_size
+                    if max_problems:
+                        end = min(end, max_problems)
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return slots, total, pages
+
+    def stats(self) -> dict:
+        return {"upstream_total": self._total, "last_sync": self._last_sync}
+
+
+def create_problem_catalog_ingester(fetch_page: PageFetcher) -> ProblemCatalogIngester:
+    return ProblemCatalogIngester(
+        fetch_page,
+        page_size=int(params.get("CATALOG_PAGE_SIZE", 100)),
+        max_concurrency=int(params.get("CATALOG_MAX_CONCURRENCY", 8)),
+        full_sync_interval=float(params.get("CATALOG_FULL_SYNC_SECONDS", 6 * 3600)),
+        refresh_pages=int(params.get("CATALOG_REFRESH_PAGES", 2)),
+    )
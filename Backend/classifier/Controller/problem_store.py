@@ -0,0 +1,112 @@
+from datetime import datetime
+from typing import Dict, List
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReplaceOne
+
+# Canonical problems, one document per problem with the title slug as _id.
+CATALOG_COLLECTION = "ProblemCatalog"
+# Recommendation sets, holding ordered references into the catalog collection.
+SETS_COLLECTION = "Problems"
+
+
+class ProblemStore:
+    """
+    Stores recommendation sets as ordered references to a canonical problem collection.
+
+    Every problem is written once to `ProblemCatalog`, keyed by its slug, and
+    a recommendation set only stores the list of slugs. The store remembers
+    which problem versions it already wrote, so in steady state saving a set
+    is a single insert of a few hundred bytes; a problem is only written
+    again when it changed upstream. Sets saved before the catalog collection
+    existed still hold full problem copies and are read as they are.
+    """
+
+    def __init__(self):
+        # slug -> the problem as last written by this process
+        self._stored: Dict[str, dict] = {}
+        self._problems_written = 0
+        self._sets_written = 0
+
+    async def store_problems(self, database: AsyncIOMotorDatabase, problems: List[dict]) -> int:
+        """
+        Upserts the problems that are new or changed since this process last wrote them.
+
+        Returns:
+            The number of problems written.
+        """
+        updated_at = datetime.utcnow().isoformat()
+        pending = {}
+        for problem in problems:
+            slug = problem["title_slug"]
+            if self._stored.get(slug) != problem:
+                pending[slug] = problem
+        if not pending:
+            return 0
+
+        await database[CATALOG_COLLECTION].bulk_write(
+            [
+                ReplaceOne({"_id": slug}, {**problem, "_id": slug, "updated_at": updated_at}, upsert=True)
+                for slug, problem in pending.items()
+            ],
+            ordered=False,
+        )
+        self._stored.update(pending)
+        self._problems_written += len(pending)
+        return len(pending)
+
+    @staticmethod
+    def set_document(problems: List[dict]) -> dict:
+        return {
+            "problem_slugs": [problem["title_slug"] for problem in problems],
+            "created_at": datetime.utcnow().isoformat(),
+        }
+
+    async def save_set(self, database: AsyncIOMotorDatabase, problems: List[dict]):
+        """
+        Saves a recommendation set and returns its ID.
+        """
+        await self.store_problems(database, problems)
+        result = await database[SETS_COLLECTION].insert_one(self.set_document(problems))
+        self._sets_written += 1
+        return result.inserted_id
+
+    async def save_sets(self, database: AsyncIOMotorDatabase, problem_sets: List[List[dict]]) -> list:
+        """
+        Saves several recommendation sets with one bulk insert and returns their IDs, in order.
+        """
+        if not problem_sets:
+            return []
+        await self.store_problems(database, [problem for problems in problem_sets for problem in problems])
+        result = await database[SETS_COLLECTION].insert_many(
+            [self.set_document(problems) for problems in problem_sets], ordered=True
+        )
+        self._sets_written += len(problem_sets)
+        return list(result.inserted_ids)
+
+    async def resolve(self, database: AsyncIOMotorDatabase, document: dict) -> dict:
+        """
+        Replaces the problem references of a set document with the problems, in set order.
+
+        The problems are fetched with one batched lookup; references to problems missing
+        from the catalog collection are skipped.
+        """
+        if document is None or "problem_slugs" not in document:
+            # Legacy set holding full problem copies
+            return document
+
+        slugs = document["problem_slugs"]
+        found = {}
+        async for problem in database[CATALOG_COLLECTION].find({"_id": {"$in": slugs}}):
+            problem.pop("updated_at", None)
+            found[problem.pop("_id")] = problem
+        return {**document, "problems": [found[slug] for slug in slugs if slug in found]}
+
+    def stats(self) -> dict:
+        return {
+            "known_problems": len(self._stored),
+            "problems_written": self._problems_written,
+            "sets_written": self._sets_written,
+        }
+
+
+problem_store = ProblemStore()
@@ -0,0 +1,197 @@
+import cProfile
+import io
+import marshal
+import pstats
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import datetime
+from typing import List, Optional
+from config import params
+from Controller.check_secret_key import authenticate_admin_key
+
+SORT_KEYS = ("cumulative", "tottime", "calls", "ncalls", "time")
+
+
+class RawStats:
+    """
+    Profile statistics in the format `pstats.Stats` loads, e.g. shipped back from a worker.
+    """
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+class RequestProfile:
+    """
+    The profile of one request, collecting the profiles of the analysis jobs it ran in workers.
+    """
+
+    def __init__(self, trigger: str):
+        self.id = uuid.uuid4().hex
+        self.trigger = trigger
+        self.profiler = cProfile.Profile()
+        self.worker_stats: List[dict] = []
+
+    def add_worker_stats(self, stats: dict) -> None:
+        self.worker_stats.append(stats)
+
+    def combined_stats(self) -> dict:
+        self.profiler.create_stats()
+        combined = pstats.Stats(self.profiler)
+        for stats in self.worker_stats:
+            combined.add(RawStats(stats))
+        return combined.stats
+
+
+# The profile of the request being handled, so the analysis pool can profile its jobs too.
+active_profile: ContextVar[Optional[RequestProfile]] = ContextVar("active_profile", default=None)
+
+
+class ProfileStore:
+    """
+    Keeps the most recent request profiles, evicting the oldest beyond `max_profiles`.
+
+    Profiles are kept as marshalled `pstats` data (the format of `pstats.Stats.dump_stats`),
+    so they can be downloaded and opened with the usual tools, or summarised on demand.
+    """
+
+    def __init__(self, max_profiles: int = 50):
+        self.max_profiles = max_profiles
+        self._profiles: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.captured = 0
+        self.skipped_busy = 0
+
+    def put(self, profile: RequestProfile, info: dict) -> None:
+        record = {
+            **info,
+            "id": profile.id,
+            "trigger": profile.trigger,
+            "worker_jobs": len(profile.worker_stats),
+            "created_at": datetime.utcnow().isoformat(),
+            "stats": marshal.dumps(profile.combined_stats()),
+        }
+        with self._lock:
+            self.captured += 1
+            self._profiles[profile.id] = record
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+    def list(self) -> List[dict]:
+        with self._lock:
+            records = list(self._profiles.values())
+        return [self.describe(record) for record in reversed(records)]
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    @staticmethod
+    def describe(record: dict) -> dict:
+        return {key: value for key, value in record.items() if key != "stats"}
+
+    @staticmethod
+    def report(record: dict, sort: str = "cumulative", limit: int = 50) -> str:
+        """
+        Renders the `limit` most expensive functions of a profile, ordered by `sort`.
+        """
+        output = io.StringIO()
+        stats = pstats.Stats(RawStats(marshal.loads(record["stats"])), stream=output)
+        stats.sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+    def stats(self) -> dict:
+        return {
+            "stored": len(self._profiles),
+            "max_stored": self.max_profiles,
+            "captured": self.captured,
+            "skipped_busy": self.skipped_busy,
+        }
+
+
+profile_store = ProfileStore(max_profiles=int(params.get("PROFILE_MAX_STORED", 50)))
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles requests on demand with cProfile.
+
+    A request is profiled when it carries `X-Profile: 1` together with a valid
+    `Admin-Key` header, or when it is picked by sampling a `sample_rate`
+    fraction of requests (PROFILE_SAMPLE_RATE, off by default). The profile id
+    is returned in the `X-Profile-Id` response header, and the profile can be
+    fetched from the admin routes. Analysis jobs the request runs in worker
+    processes are profiled there and merged into its profile.
+
+    cProfile hooks the whole event loop thread, so only one request is profiled
+    at a time; other requests arriving meanwhile are served unprofiled. When
+    profiling is not requested the cost is a header lookup per request.
+    """
+
+    def __init__(self, app, store: ProfileStore = profile_store, sample_rate: float = None):
+        self.app = app
+        self.store = store
+        self.sample_rate = float(params.get("PROFILE_SAMPLE_RATE", 0)) if sample_rate is None else sample_rate
+        self._busy = threading.Lock()
+
+    def trigger(self, scope) -> Optional[str]:
+        headers = dict(scope["headers"])
+        if headers.get(b"x-profile") == b"1":
+            admin_key = headers.get(b"admin-key", b"").decode("latin-1")
+            if authenticate_admin_key(admin_key):
+                return "header"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trigger = self.trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+        if not self._busy.acquire(blocking=False):
+            self.store.skipped_busy += 1
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(trigger)
+        status: Optional[int] = None
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {
+                    **message,
+                    "headers": list(message.get("headers", [])) + [(b"x-profile-id", profile.id.encode())],
+                }
+            await send(message)
+
+        token = active_profile.set(profile)
+        start = time.perf_counter()
+        profile.profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.profiler.disable()
+            elapsed = time.perf_counter() - start
+            active_profile.reset(token)
+            self._busy.release()
+            self.store.put(profile, {
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status or 500,
+                "duration_ms": round(elapsed * 1000, 2),
+            })
+
@@ -0,0 +1,62 @@
+import base64
+import zipfile
+from typing import AsyncIterator, Iterable, Iterator, Tuple, Union
+
+
+class _ChunkWriter:
+    """
+    Write-only file object that hands every write back as a chunk.
+
+    It has no `tell`/`seek`, so `zipfile` writes in streaming mode (local
+    headers followed by data descriptors) and never needs to go back.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> list:
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+
+def image_bytes(image: Union[bytes, str]) -> bytes:
+    """
+    Returns the raw bytes of an image given as bytes or as a base64 string.
+    """
+    return image if isinstance(image, bytes) else base64.b64decode(image)
+
+
+def iter_zip(entries: Iterable[Tuple[str, bytes, bool]]) -> Iterator[bytes]:
+    """
+    Writes a ZIP archive entry by entry and yields its bytes as they are produced.
+
+    Args:
+        entries: (file name, data, compress) tuples. Already-compressed data such as
+                 PNG images should be stored with compress=False.
+    """
+    writer = _ChunkWriter()
+    with zipfile.ZipFile(writer, "w") as zip_file:
+        for file_name, data, compress in entries:
+            zip_file.writestr(
+                file_name,
+                data,
+                compress_type=zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED,
+            )
+            yield from writer.drain()
+    yield from writer.drain()
+
+
+async def iter_chunks(data: bytes, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    """
+    Yields `data` in chunks, for use as a StreamingResponse body.
+    """
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        yield bytes(view[start:start + chunk_size])
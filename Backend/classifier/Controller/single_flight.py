@@ -0,0 +1,62 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one outstanding call.
+
+    The first caller for a key starts the call; callers arriving while it is
+    in flight wait for it and receive its result or its exception instead of
+    starting their own. The call runs as its own task, so a waiter that is
+    cancelled (e.g. its client went away) does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self._waiters: Dict[Hashable, int] = {}
+
+        self._calls = 0
+        self._flights_started = 0
+        self._coalesced = 0
+        self._max_waiters = 0
+        self._errors = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Returns the result of `func()`, shared with every concurrent caller for `key`.
+        """
+        self._calls += 1
+        flight = self._flights.get(key)
+        if flight is None:
+            self._flights_started += 1
+            flight = self._flights[key] = asyncio.ensure_future(func())
+            self._waiters[key] = 0
+            flight.add_done_callback(lambda done: self._land(key, done))
+        else:
+            self._coalesced += 1
+            self._waiters[key] += 1
+            self._max_waiters = max(self._max_waiters, self._waiters[key])
+        return await asyncio.shield(flight)
+
+    def _land(self, key: Hashable, flight: asyncio.Future) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+            del self._waiters[key]
+        if not flight.cancelled() and flight.exception() is not None:
+            self._errors += 1
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._flights
+
+    def stats(self) -> dict:
+        return {
+            "calls": self._calls,
+            "flights": self._flights_started,
+            "coalesced_waiters": self._coalesced,
+            "max_waiters": self._max_waiters,
+            "waiting_now": sum(self._waiters.values()),
+            "failed_flights": self._errors,
+        }
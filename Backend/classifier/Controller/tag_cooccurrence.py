@@ -0,0 +1,100 @@
+import numpy as np
+from typing import List, Optional, Tuple
+from Controller.problem_catalog import ProblemCatalog
+
+NORMALIZATIONS = (None, "jaccard", "pmi")
+
+
+class TagCooccurrence:
+    """
+    Tag co-occurrence counts computed from the sparse problem x tag incidence of a catalog.
+
+    The catalog stores tag membership in CSR form, so the co-occurrence
+    matrix `B.T @ B` of the binary incidence matrix `B` is built without ever
+    materialising `B`: every problem with k tags contributes its k * k tag
+    pairs, and all pairs are counted with a single `bincount`. The cost is
+    linear in the number of pairs, not in problems x tags.
+
+    `counts[i, j]` is the number of problems tagged with both `tag_names[i]`
+    and `tag_names[j]`; the diagonal holds the tag frequencies.
+    """
+
+    def __init__(self, catalog: ProblemCatalog):
+        self.tag_names: List[str] = list(catalog.tag_names)
+        self.problem_count = len(catalog)
+        self.counts = self._count_pairs(catalog.tag_ptr, catalog.tag_ids.astype(np.int64), len(self.tag_names))
+
+    @staticmethod
+    def _count_pairs(tag_ptr: np.ndarray, tag_ids: np.ndarray, tag_count: int) -> np.ndarray:
+        sizes = np.diff(tag_ptr).astype(np.int64)
+        if not len(tag_ids):
+            return np.zeros((tag_count, tag_count), dtype=np.int64)
+
+        problem_of = np.repeat(np.arange(len(sizes)), sizes)
+        # Incidence e of problem p is paired with each of the sizes[p] incidences of p.
+        repeats = sizes[problem_of]
+        left = np.repeat(tag_ids, repeats)
+        first = np.repeat(tag_ptr[problem_of].astype(np.int64), repeats)
+        offsets = np.arange(len(left)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        right = tag_ids[first + offsets]
+
+        counts = np.bincount(left * tag_count + right, minlength=tag_count * tag_count)
+        return counts.reshape(tag_count, tag_count)
+
+    @property
+    def frequencies(self) -> np.ndarray:
+        return np.diag(self.counts)
+
+    def jaccard(self) -> np.ndarray:
+        """
+        |A and B| / |A or B| for every pair of tags.
+        """
+        frequencies = self.frequencies
+        union = frequencies[:, None] + frequencies[None, :] - self.counts
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(union > 0, self.counts / union, 0.0)
+
+    def pmi(self) -> np.ndarray:
+        """
+        Pointwise mutual information log(P(A, B) / (P(A) P(B))); 0 for pairs that never co-occur.
+        """
+        frequencies = self.frequencies.astype(np.float64)
+        expected = frequencies[:, None] * frequencies[None, :]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.log(self.counts * self.problem_count / expected)
+        return np.where(self.counts > 0, scores, 0.0)
+
+    def matrix(self, normalize: Optional[str] = None) -> np.ndarray:
+        """
+        Returns the co-occurrence matrix, optionally normalised.
+
+        Args:
+            normalize: None for raw counts, "jaccard" or "pmi".
+        """
+        if normalize is None:
+            return self.counts
+        if normalize == "jaccard":
+            return self.jaccard()
+        if normalize == "pmi":
+            return self.pmi()
+        raise ValueError(f"Unknown normalization: {normalize}")
+
+    def top_pairs(self, k: int = 10, normalize: Optional[str] = None) -> List[Tuple[str, str, float]]:
+        """
+        Returns the `k` highest scoring pairs of distinct tags that co-occur at least once.
+
+        Returns:
+            (tag, tag, score) tuples, best first.
+        """
+        scores = self.matrix(normalize)
+        rows, columns = np.triu_indices(len(self.tag_names), k=1)
+        pair_scores = scores[rows, columns]
+        candidates = np.flatnonzero(self.counts[rows, columns] > 0)
+        if k < len(candidates):
+            best = np.argpartition(-pair_scores[candidates], k - 1)[:k]
+            candidates = candidates[best]
+        candidates = candidates[np.argsort(-pair_scores[candidates], kind="stable")]
+        return [
+            (self.tag_names[rows[i]], self.tag_names[columns[i]], float(pair_scores[i]))
+            for i in candidates
+        ]
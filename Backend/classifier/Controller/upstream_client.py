@@ -0,0 +1,96 @@
+import httpx
+from typing import Optional
+from fastapi import FastAPI
+from config import params
+
+
+class GraphQLError(httpx.HTTPError):
+    """
+    The upstream answered, but reported errors for the query instead of data.
+    """
+
+
+class UpstreamClient:
+    """
+    Shared async HTTP client for the upstream problem API.
+
+    A single `httpx.AsyncClient` is created at application startup and reused
+    for every request, so upstream calls keep their connections alive and
+    never block the event loop.
+    """
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self.url = ""
+
+    def start(self, url: str = None, transport: httpx.AsyncBaseTransport = None) -> None:
+        """
+        Creates the connection pool.
+
+        Args:
+            url: Upstream GraphQL endpoint. Defaults to `params["UPSTREAM_URL"]`.
+            transport: Optional transport, e.g. `httpx.MockTransport` for a stub upstream.
+        """
+        if self._client is not None:
+            return
+        timeout = httpx.Timeout(
+            float(params.get("UPSTREAM_TIMEOUT_SECONDS", 10)),
+            connect=float(params.get("UPSTREAM_CONNECT_TIMEOUT_SECONDS", 3)),
+            pool=float(params.get("UPSTREAM_POOL_TIMEOUT_SECONDS", 5)),
+        )
+        # All upstream traffic goes to one host, so the pool limits are the per-host limits.
+        limits = httpx.Limits(
+            max_connections=int(params.get("UPSTREAM_MAX_CONNECTIONS", 20)),
+            max_keepalive_connections=int(params.get("UPSTREAM_MAX_KEEPALIVE", 10)),
+            keepalive_expiry=float(params.get("UPSTREAM_KEEPALIVE_EXPIRY_SECONDS", 30)),
+        )
+        self.url = url if url is not None else params.get("UPSTREAM_URL", "")
+        self._client = httpx.AsyncClient(
+            headers={"Content-Type": "application/json"},
+            timeout=timeout,
+            limits=limits,
+            transport=transport,
+        )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Scripts that never ran the startup hook still get a working client.
+        if self._client is None:
+            self.start()
+        return self._client
+
+    async def post_graphql(self, query: str, variables: dict = None) -> dict:
+        """
+        Posts a GraphQL query to the upstream endpoint.
+
+        Raises:
+            httpx.HTTPError: If the request fails or returns an error status.
+            GraphQLError: If the response lists GraphQL errors.
+        """
+        payload = {"query": query}
+        if variables:
+            payload["variables"] = variables
+        response = await self.client.post(self.url, json=payload)
+        response.raise_for_status()
+        data = response.json()
+        errors = data.get("errors")
+        if errors:
+            raise GraphQLError("; ".join(str(error.get("message", error)) for error in errors))
+        return data
+
+
+upstream_client = UpstreamClient()
+
+
+async def start_upstream_client(app: FastAPI):
+    upstream_client.start()
+    app.state.upstream_client = upstream_client
+
+
+async def close_upstream_client(app: FastAPI):
+    await upstream_client.close()
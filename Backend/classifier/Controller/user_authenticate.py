@@ -1,7 +1,9 @@
 from fastapi import HTTPException, Header, Depends, Request
 from functools import wraps
 from config import params
+from Controller.auth_cache import auth_cache
 from Controller.db_init import get_database
+from Controller.metrics import span
 from response_error import ErrorResponseModel
 from bson import ObjectId # type: ignore
 import jwt
@@ -16,7 +18,6 @@ def get_authenticate_user(f):
             raise HTTPException(status_code=400, detail=dict(error_response))
 
         token = request.headers.get('token')
-        database = await get_database()
 
         if not token:
             error_response = ErrorResponseModel(status=False, detail="Missing token")
@@ -24,9 +25,17 @@ def get_authenticate_user(f):
         try:
             decoded_token = jwt.decode(token, params['SECRET_KEY'], algorithms=['HS256'])
             _id = decoded_token.get('_id')
-            user_details = await database['User'].find_one({"_id": ObjectId(_id)})
+
+            # Users verified recently are not looked up again
+            if _id and auth_cache.get(_id):
+                return await f(*args, **kwargs)
+
+            database = await get_database()
+            with span("mongo_auth_lookup"):
+                user_details = await database['User'].find_one({"_id": ObjectId(_id)})
 
             if user_details and ObjectId(_id) == user_details['_id']:
+                auth_cache.put(_id, decoded_token.get('exp'))
                 return await f(*args, **kwargs)  # Pass all arguments to the original function
             else:
                 error_response = ErrorResponseModel(status=False, detail="User not found")
@@ -37,6 +46,9 @@ def get_authenticate_user(f):
         except (jwt.InvalidTokenError, jwt.PyJWTError):
             error_response = ErrorResponseModel(status=False, detail="Invalid Token")
             raise HTTPException(status_code=401, detail=dict(error_response))
+        except HTTPException:
+            # Raised on purpose, by the check above or by the route itself
+            raise
         except Exception as e:
             error_response = ErrorResponseModel(status=False, detail=str(e))
             raise HTTPException(status_code=500, detail=dict(error_response))
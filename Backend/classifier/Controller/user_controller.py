@@ -2,13 +2,18 @@ from fastapi import HTTPException, Body
 from fastapi.responses import JSONResponse
 from datetime import datetime, timedelta
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
 from config import params
 from Controller.db_init import get_database
-from Controller.check_password import verify_password
-from Controller.hash_password import hash_password
+from Controller.auth_cache import auth_cache
+from Controller.metrics import span
+from Controller.password_service import password_service
 from Model.UserModel import UserCreate
 from response_error import ErrorResponseModel
 import jwt
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class UserController:
@@ -25,12 +30,27 @@ class UserController:
             collection = await cls.get_collection()
             users = collection["User"]
 
-            email_found = await users.find_one({"email": email})
+            with span("mongo_find_user"):
+                email_found = await users.find_one({"email": email})
             if email_found:
-                password_matched = verify_password(
+                password_matched = await password_service.verify(
                     password, email_found["password"]
                 )
                 if password_matched:
+                    # Upgrade hashes made with a different work factor while the password is at hand.
+                    # Best effort: the login succeeds either way, and the next one retries the upgrade.
+                    if password_service.needs_rehash(email_found["password"]) and password_service.has_capacity():
+                        try:
+                            await users.update_one(
+                                {"_id": email_found["_id"]},
+                                {"$set": {
+                                    "password": await password_service.rehash(password),
+                                    "updated_at": datetime.utcnow().isoformat(),
+                                }},
+                            )
+                            auth_cache.invalidate(email_found["_id"])
+                        except Exception as e:
+                            logger.warning("Could not rehash the password of user %s: %s", email_found["_id"], e)
                     if email_found and isinstance(email_found, dict) and "_id" in email_found:
                         token = jwt.encode(
                             {
@@ -67,7 +87,8 @@ class UserController:
             users = collection["User"]
 
             # Check if the email already exists
-            existing_user = await users.find_one({"email": user_data.email})
+            with span("mongo_find_user"):
+                existing_user = await users.find_one({"email": user_data.email})
             if existing_user:
                 error_response = ErrorResponseModel(
                     status=False,
@@ -77,13 +98,24 @@ class UserController:
 
             # Create a new user
             user_dict = user_data.dict()
-            user_dict["password"] = hash_password(user_dict["password"])
+            user_dict["password"] = await password_service.hash(user_dict["password"])
             user_dict["created_at"] = datetime.utcnow().isoformat()
             user_dict["updated_at"] = user_dict["created_at"]
 
-            new_user = await users.insert_one(user_dict)
+            try:
+                with span("mongo_insert_user"):
+                    new_user = await users.insert_one(user_dict)
+            except DuplicateKeyError:
+                # Registered concurrently; the unique email index rejected the second insert
+                error_response = ErrorResponseModel(
+                    status=False,
+                    detail="Email already registered"
+                )
+                raise HTTPException(status_code=400, detail=dict(error_response))
             return JSONResponse(content={"status": True, "user_id": str(new_user.inserted_id)})
 
+        except HTTPException:
+            raise
         except Exception as e:
             error_response = ErrorResponseModel(
                 status=False,
@@ -0,0 +1,81 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from fastapi.security import APIKeyHeader
+from response_error import ErrorResponseModel
+from Controller.auth_cache import auth_cache
+from Controller.check_secret_key import authenticate_admin_key
+from Controller.password_service import password_service
+from Controller.problem_controller import ProblemController
+from Controller.profiler import SORT_KEYS, profile_store
+
+AdminRouter = APIRouter()
+
+# Helper function to get the admin key from header
+async def get_admin_key(admin_key: str = Depends(APIKeyHeader(name="Admin-Key"))):
+    if not authenticate_admin_key(admin_key):
+        error_response = ErrorResponseModel(
+            status=False,
+            detail="Invalid Admin-Key"
+        )
+        raise HTTPException(status_code=403, detail=dict(error_response))
+    return admin_key
+
+def get_profile_record(id: str) -> dict:
+    record = profile_store.get(id)
+    if record is None:
+        error_response = ErrorResponseModel(status=False, detail="Profile not found")
+        raise HTTPException(status_code=404, detail=dict(error_response))
+    return record
+
+# Cache and pool statistics; the same numbers are exported by /metrics
+@AdminRouter.get("/admin/catalog/stats")
+async def catalog_stats(admin_key: str = Depends(get_admin_key)):
+    return JSONResponse(content={"status": True, "catalog": ProblemController.catalog_stats()})
+
+@AdminRouter.get("/admin/analysis/stats")
+async def analysis_stats(admin_key: str = Depends(get_admin_key)):
+    return JSONResponse(content={"status": True, "analysis": ProblemController.analysis_stats()})
+
+@AdminRouter.get("/admin/auth/stats")
+async def auth_stats(admin_key: str = Depends(get_admin_key)):
+    return JSONResponse(content={
+        "status": True,
+        "auth_cache": auth_cache.stats(),
+        "password_service": password_service.stats(),
+    })
+
+@AdminRouter.get("/admin/profiles")
+async def list_profiles(admin_key: str = Depends(get_admin_key)):
+    """
+    Lists the stored request profiles, newest first.
+    """
+    return JSONResponse(content={"status": True, "profiles": profile_store.list(), "stats": profile_store.stats()})
+
+@AdminRouter.get("/admin/profiles/{id}")
+async def get_profile(
+    id: str,
+    sort: str = Query("cumulative", regex="^(" + "|".join(SORT_KEYS) + ")$"),
+    limit: int = Query(50, ge=1, le=1000),
+    admin_key: str = Depends(get_admin_key),
+):
+    """
+    Returns a text summary of a request profile.
+
+    :param id: ID returned in the X-Profile-Id header of the profiled request.
+    :param sort: pstats sort key.
+    :param limit: Number of functions to list.
+    """
+    record = get_profile_record(id)
+    return PlainTextResponse(profile_store.report(record, sort=sort, limit=limit))
+
+@AdminRouter.get("/admin/profiles/{id}/download")
+async def download_profile(id: str, admin_key: str = Depends(get_admin_key)):
+    """
+    Downloads a request profile as a pstats file (e.g. for `python -m pstats` or snakeviz).
+    """
+    record = get_profile_record(id)
+    return Response(
+        content=record["stats"],
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f"attachment; filename=profile_{id}.prof"},
+    )
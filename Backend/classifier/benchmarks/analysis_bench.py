@@ -0,0 +1,226 @@
+"""
+Benchmarks the analysis and recommendation hot paths on synthetic catalogs.
+
+For every catalog size, each stage is timed over several runs and its peak
+memory is measured in a separate run under tracemalloc (which would otherwise
+skew the timings). The stages are:
+
+    catalog_build           ProblemCatalog.from_problems
+    problem_frame           the analyzer's problem frame, built for the pandas charts
+    analyze:<method>        each chart method, on a fresh analyzer as in a chart job
+    analyze_all             the full report, on a fresh analyzer
+    generate_zip            zipping the report images
+    analyze_data            the chart data of the data mode
+    index_build             ProblemIndex over the catalog
+    recommend:<skill>       ProblemController.select_problems for a skill level
+    recommend_tags:<skill>  the same, filtered on two popular tags
+
+Everything runs in this process on generated data (see synthetic_catalog.py),
+without the upstream API or MongoDB. Kaleido renders in its own process, so its
+memory is not part of the peaks.
+
+Usage, from Backend/classifier:
+
+    python benchmarks/analysis_bench.py [--sizes 100,1000,10000,100000] [--runs 3]
+        [--stages analyze,recommend] [--no-charts] [--save baseline.json]
+        [--compare baseline.json] [--threshold 0.25]
+
+With --compare, exits with status 1 if a stage got slower or used more memory
+than the baseline by more than the threshold.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_catalog import synthetic_problems  # noqa: E402
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+SKILLS = ("beginner", "intermediate", "advanced")
+POPULAR_TAGS = ["Array", "Dynamic Programming"]
+CHART_STAGES = ("analyze:", "analyze_all", "generate_zip")
+
+# A stage is (name, setup, run): setup() is not measured and returns the arguments of run.
+Stage = Tuple[str, Callable[[], tuple], Callable]
+
+
+def build_stages(problems: List[Dict], charts: bool) -> List[Stage]:
+    from Controller.analysis_problems import LeetCodeProblemAnalyzerEnhanced as Analyzer
+    from Controller.problem_catalog import ProblemCatalog
+    from Controller.problem_controller import ProblemController
+    from Controller.problem_index import ProblemIndex
+
+    catalog = ProblemCatalog.from_problems(problems)
+    index = ProblemIndex(catalog)
+    report = {}
+
+    def fresh_analyzer():
+        return (Analyzer(catalog, binary_images=True),)
+
+    def analyze_all(analyzer):
+        report.update(analyzer.analyze_all())
+        return report
+
+    stages: List[Stage] = [
+        ("catalog_build", lambda: (problems,), ProblemCatalog.from_problems),
+        ("problem_frame", lambda: (catalog,), lambda catalog: Analyzer(catalog, binary_images=True).problems),
+    ]
+    if charts:
+        stages += [
+            (f"analyze:{method}", fresh_analyzer, lambda analyzer, method=method: getattr(analyzer, method)())
+            for method in Analyzer.CHARTS.values()
+        ]
+        stages += [
+            ("analyze_all", fresh_analyzer, analyze_all),
+            ("generate_zip", lambda: (report,), Analyzer.generate_zip),
+        ]
+    stages += [
+        ("analyze_data", fresh_analyzer, lambda analyzer: analyzer.analyze_data()),
+        ("index_build", lambda: (catalog,), ProblemIndex),
+    ]
+    for skill in SKILLS:
+        stages.append((f"recommend:{skill}", lambda: (index,), lambda index, skill=skill: (
+            ProblemController.select_problems(index, skill)
+        )))
+        stages.append((f"recommend_tags:{skill}", lambda: (index,), lambda index, skill=skill: (
+            ProblemController.select_problems(index, skill, POPULAR_TAGS)
+        )))
+    return stages
+
+
+def measure(setup: Callable[[], tuple], run: Callable, runs: int) -> dict:
+    """
+    Times `run(*setup())` over `runs` runs, then measures its peak memory in one more run.
+    """
+    timings = []
+    for _ in range(runs):
+        args = setup()
+        gc.collect()
+        start = time.perf_counter()
+        run(*args)
+        timings.append(time.perf_counter() - start)
+
+    args = setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": statistics.median(timings), "min_seconds": min(timings), "peak_bytes": peak}
+
+
+def run_benchmarks(sizes: List[int], runs: int, stage_filter: List[str], charts: bool, seed: int) -> dict:
+    if charts:
+        from Controller.analysis_problems import preload_plotting
+        from Controller.plot_renderer import plot_renderer
+
+        # Load the plotting stack and Kaleido up front, so the first chart is not an outlier.
+        preload_plotting()
+        plot_renderer.ensure_healthy()
+
+    results = {}
+    for size in sizes:
+        problems = synthetic_problems(size, seed=seed)
+        results[str(size)] = sized = {}
+        for name, setup, run in build_stages(problems, charts):
+            if stage_filter and not any(name.startswith(prefix) for prefix in stage_filter):
+                continue
+            sized[name] = measure(setup, run, runs)
+            stats = sized[name]
+            print(
+                f"{size:>7} {name:<58} {stats['seconds'] * 1000:>10.2f} ms"
+                f" (min {stats['min_seconds'] * 1000:.2f}) {stats['peak_bytes'] / 2 ** 20:>9.2f} MiB",
+                flush=True,
+            )
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float, min_delta_mib: float) -> List[str]:
+    """
+    Returns the stages that regressed against the baseline, as readable lines.
+
+    A stage regresses when its median time or peak memory exceeds the baseline by more
+    than `threshold` (a fraction) and by more than the absolute noise floor.
+    """
+    regressions = []
+    for size, stages in results.items():
+        for name, current in stages.items():
+            previous = baseline.get("results", {}).get(size, {}).get(name)
+            if previous is None:
+                continue
+            delta_ms = (current["seconds"] - previous["seconds"]) * 1000
+            if current["seconds"] > previous["seconds"] * (1 + threshold) and delta_ms > min_delta_ms:
+                regressions.append(
+                    f"{size} {name}: time {previous['seconds'] * 1000:.2f} ms -> {current['seconds'] * 1000:.2f} ms"
+                )
+            delta_mib = (current["peak_bytes"] - previous["peak_bytes"]) / 2 ** 20
+            if current["peak_bytes"] > previous["peak_bytes"] * (1 + threshold) and delta_mib > min_delta_mib:
+                regressions.append(
+                    f"{size} {name}: peak memory {previous['peak_bytes'] / 2 ** 20:.2f} MiB"
+                    f" -> {current['peak_bytes'] / 2 ** 20:.2f} MiB"
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Comma-separated catalog sizes")
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per stage; the median is reported (default: 3)")
+    parser.add_argument("--stages", default="", help="Comma-separated stage name prefixes to run (default: all)")
+    parser.add_argument("--no-charts", action="store_true", help="Skip the stages that render charts")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic catalogs (default: 0)")
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Compare the results against this baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown as a fraction (default: 0.25)")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="Ignore time changes below this (default: 5)")
+    parser.add_argument("--min-delta-mib", type=float, default=1.0, help="Ignore memory changes below this (default: 1)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    stage_filter = [prefix for prefix in args.stages.split(",") if prefix]
+    print(f"{'size':>7} {'stage':<58} {'median':>13} {'peak':>24}")
+    results = run_benchmarks(sizes, args.runs, stage_filter, not args.no_charts, args.seed)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "seed": args.seed,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"saved results to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("seed") != args.seed:
+            print("warning: the baseline was generated with a different seed")
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms, args.min_delta_mib)
+        if regressions:
+            print(f"{len(regressions)} regression(s) against {args.compare}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"no regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
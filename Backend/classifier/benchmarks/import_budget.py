@@ -0,0 +1,74 @@
+"""
+Checks that importing the API stays fast and does not load the plotting stack.
+
+Every uvicorn worker, reload and test process imports `main` before it can
+serve a request, so the analysis engine (pandas and the plotting libraries)
+must only be loaded by the analysis pool workers. The import is timed in fresh
+interpreters and the best run is compared against the budget.
+
+Usage, from Backend/classifier:
+
+    python benchmarks/import_budget.py [--module main] [--budget 1.0] [--runs 3]
+
+Exits with status 1 if the budget is exceeded or a forbidden module was imported.
+tests/test_import_budget.py runs this check as part of the pytest suite.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+FORBIDDEN_MODULES = ("pandas", "matplotlib", "seaborn", "plotly", "kaleido", "Controller.analysis_problems")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+forbidden = [name for name in {forbidden!r} if name in sys.modules]
+print(json.dumps({{"seconds": elapsed, "forbidden": forbidden}}))
+"""
+
+
+def measure(module: str) -> dict:
+    """
+    Imports `module` in a fresh interpreter and returns the import time and the forbidden modules it loaded.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, forbidden=FORBIDDEN_MODULES)],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main", help="Module to import (default: main)")
+    parser.add_argument("--budget", type=float, default=1.0, help="Import time budget in seconds (default: 1.0)")
+    parser.add_argument("--runs", type=int, default=3, help="Number of fresh interpreters to time (default: 3)")
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    best = min(run["seconds"] for run in runs)
+    forbidden = sorted({name for run in runs for name in run["forbidden"]})
+
+    print(f"import {args.module}: best {best:.3f}s of {args.runs} runs (budget {args.budget:.3f}s)")
+    failed = False
+    if best > args.budget:
+        print(f"FAIL: import time exceeds the budget by {best - args.budget:.3f}s")
+        failed = True
+    if forbidden:
+        print(f"FAIL: importing {args.module} loaded {', '.join(forbidden)}")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,449 @@
+"""
+Load-tests the API against local stand-ins for the upstream API and MongoDB.
+
+The harness starts three kinds of processes:
+
+    upstream   the stub GraphQL API (stub_upstream.py) serving a synthetic catalog
+    app        one uvicorn worker running `main:app`, with MongoDB replaced by the
+               in-process stand-in (memory_mongo.py) and seeded with test users
+    driver     this process, sending traffic at fixed arrival rates
+
+Traffic is a weighted mix of these operations:
+
+    login      POST /user/login with a seeded user's credentials
+    recommend  POST /user/classify/tags for a skill level and up to two tags
+    classify   POST /user/classify/batch with several skill/tag queries
+    analysis   GET /user/analysis/{id} for a recommendation set (data mode by default)
+
+Arrivals are open-loop: requests are sent on schedule whether or not earlier
+ones finished, and latency is measured from the scheduled send time. A server
+that falls behind therefore shows growing latencies instead of a silently
+lower request rate. Several rates can be run in one go to find the
+concurrency ceiling of one worker.
+
+Usage, from Backend/classifier:
+
+    python benchmarks/load_test.py [--rates 10,20,40] [--duration 30] [--warmup 5]
+        [--mix login=1,recommend=6,classify=2,analysis=1] [--analysis-mode data]
+        [--catalog-size 3000] [--users 1000] [--bcrypt-rounds 12]
+        [--upstream-latency-ms 0] [--mongo-latency-ms 0] [--param KEY=VALUE ...]
+        [--output results.json]
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import secrets
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_MIX = "login=1,recommend=6,classify=2,analysis=1"
+OPERATIONS = ("login", "recommend", "classify", "analysis")
+SKILLS = ("beginner", "intermediate", "advanced")
+TAGS = ("Array", "String", "Hash Table", "Dynamic Programming", "Math", "Sorting", "Greedy", "Tree")
+PASSWORD = "load-test-password"
+# JSON config overrides of the app process, see `apply_app_params`
+APP_PARAMS_ENV = "LOAD_TEST_APP_PARAMS"
+
+
+def user_email(number: int) -> str:
+    return f"load-test-{number}@example.com"
+
+
+def user_id(number: int):
+    from bson import ObjectId
+
+    return ObjectId(f"{number + 1:024x}")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def parse_params(pairs: List[str]) -> dict:
+    params = {}
+    for pair in pairs:
+        key, _, value = pair.partition("=")
+        try:
+            params[key] = json.loads(value)
+        except ValueError:
+            params[key] = value
+    return params
+
+
+# Server processes
+
+def apply_app_params() -> None:
+    """
+    Applies the config overrides of the app process from the environment.
+
+    The analysis workers are spawned, and a spawned process imports this script
+    (as `__mp_main__`) before unpickling anything that reads the config, so the
+    overrides reach the workers' import-time settings as well as the app's.
+    """
+    overrides = os.environ.get(APP_PARAMS_ENV)
+    if overrides:
+        from config import params
+
+        params.update(json.loads(overrides))
+
+
+apply_app_params()
+
+
+def serve_upstream(args) -> None:
+    import uvicorn
+    from benchmarks.stub_upstream import create_upstream
+
+    app = create_upstream(args.catalog_size, seed=args.seed, latency=args.upstream_latency_ms / 1000)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning", access_log=False)
+
+
+def serve_app(args) -> None:
+    from config import params
+
+    # Settings are read when the modules are imported, so they are applied first,
+    # and exported for the analysis workers.
+    os.environ[APP_PARAMS_ENV] = json.dumps({
+        "UPSTREAM_URL": args.upstream_url,
+        "ANALYSIS_CACHE_DIR": tempfile.mkdtemp(prefix="load-test-cache-"),
+        **({"BCRYPT_ROUNDS": args.bcrypt_rounds} if args.bcrypt_rounds else {}),
+        **parse_params(args.param),
+        # The driver probes the admin-only /metrics with this key to tell when the app is up
+        "ADMIN_KEY": args.admin_key,
+    })
+    apply_app_params()
+
+    import uvicorn
+    from benchmarks.memory_mongo import MemoryClient
+    from Controller.db_init import DATABASE_NAME, use_client
+    from Controller.hash_password import hash_password
+
+    client = MemoryClient(latency=args.mongo_latency_ms / 1000)
+    use_client(client)
+    # Every test user shares one password, so it is hashed once.
+    hashed_password = hash_password(PASSWORD, int(params.get("BCRYPT_ROUNDS", 12)))
+    asyncio.run(client[DATABASE_NAME]["User"].insert_many([
+        {"_id": user_id(number), "email": user_email(number), "password": hashed_password}
+        for number in range(args.users)
+    ]))
+
+    import main
+
+    uvicorn.run(main.app, host="127.0.0.1", port=args.port, log_level="warning", access_log=False)
+
+
+def start_server(role: str, args, port: int, *extra: str) -> subprocess.Popen:
+    command = [
+        sys.executable, os.path.abspath(__file__), role, "--port", str(port),
+        "--catalog-size", str(args.catalog_size), "--seed", str(args.seed),
+        "--upstream-latency-ms", str(args.upstream_latency_ms), "--mongo-latency-ms", str(args.mongo_latency_ms),
+        "--users", str(args.users), "--bcrypt-rounds", str(args.bcrypt_rounds or 0),
+        *[f"--param={pair}" for pair in args.param], *extra,
+    ]
+    return subprocess.Popen(command, cwd=ROOT)
+
+
+def stop_server(process: subprocess.Popen, timeout: float = 15) -> None:
+    if process.poll() is None:
+        # SIGINT lets uvicorn run the shutdown hooks, which stop the analysis pool.
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+async def wait_until_ready(client, url: str, process: subprocess.Popen, headers: dict = None,
+                           timeout: float = 120) -> None:
+    """
+    Polls `url` until it answers 200, failing early if the server process exits.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with status {process.returncode}")
+        try:
+            if (await client.get(url, headers=headers)).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.25)
+    raise RuntimeError(f"{url} did not start within {timeout:.0f}s")
+
+
+# Traffic
+
+class Traffic:
+    """
+    Builds the requests of each operation, with credentials of the seeded users.
+    """
+
+    def __init__(self, base_url: str, users: int, analysis_mode: str, batch_size: int, seed: int):
+        import jwt
+        from config import params
+
+        self.base_url = base_url
+        self.users = users
+        self.analysis_mode = analysis_mode
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.api_headers = {"API-Key": params["API_KEY"]}
+        expires = datetime.datetime.utcnow() + datetime.timedelta(days=1)
+        self.tokens = [
+            jwt.encode({"_id": str(user_id(number)), "exp": expires}, params["SECRET_KEY"], algorithm="HS256")
+            for number in range(min(users, 100))
+        ]
+        self.set_ids: List[str] = []
+
+    def user_headers(self) -> dict:
+        return {**self.api_headers, "token": self.random.choice(self.tokens)}
+
+    def query(self) -> dict:
+        return {
+            "skill": self.random.choice(SKILLS),
+            "tags": self.random.sample(TAGS, self.random.randint(0, 2)),
+        }
+
+    async def prepare(self, client) -> None:
+        """
+        Creates one recommendation set per skill level for the analysis traffic.
+        """
+        for skill in SKILLS:
+            response = await client.post(
+                f"{self.base_url}/user/classify/tags", json={"skill": skill, "tags": []}, headers=self.user_headers()
+            )
+            body = response.json()
+            if response.status_code != 200 or not body.get("status"):
+                raise RuntimeError(f"Could not create a recommendation set: {response.status_code} {body}")
+            self.set_ids += [problem_set["id"] for problem_set in body["problems"]]
+
+    def request(self, operation: str) -> Tuple[str, str, dict]:
+        """
+        Returns the method, URL and keyword arguments of a request for `operation`.
+        """
+        if operation == "login":
+            number = self.random.randrange(self.users)
+            return "POST", f"{self.base_url}/user/login", {
+                "json": {"email": user_email(number), "password": PASSWORD}, "headers": self.api_headers,
+            }
+        if operation == "recommend":
+            return "POST", f"{self.base_url}/user/classify/tags", {
+                "json": self.query(), "headers": self.user_headers(),
+            }
+        if operation == "classify":
+            return "POST", f"{self.base_url}/user/classify/batch", {
+                "json": {"queries": [self.query() for _ in range(self.batch_size)], "include_problems": False},
+                "headers": self.user_headers(),
+            }
+        set_id = self.random.choice(self.set_ids)
+        return "GET", f"{self.base_url}/user/analysis/{set_id}", {
+            "params": {"mode": self.analysis_mode}, "headers": self.user_headers(),
+        }
+
+
+def succeeded(operation: str, response) -> bool:
+    if response.status_code >= 400:
+        return False
+    # The recommendation, batch and analysis routes report failures (including a
+    # full analysis queue or a timed-out render) in the body of a 200 response.
+    body = response.json() if operation != "login" else {}
+    if operation == "recommend":
+        return body.get("status") is True
+    if operation == "classify":
+        # Saved sets report their status as "True", like /user/classify/tags
+        results = body.get("results")
+        return (
+            body.get("status") is True
+            and isinstance(results, list)
+            and all(result.get("status") in (True, "True") for result in results)
+        )
+    if operation == "analysis":
+        return body.get("status") is True and (body.get("analysis") or {}).get("status") is True
+    return True
+
+
+async def send(client, traffic: Traffic, operation: str, scheduled: float, results: list) -> None:
+    method, url, kwargs = traffic.request(operation)
+    loop = asyncio.get_running_loop()
+    lag = loop.time() - scheduled
+    try:
+        response = await client.request(method, url, **kwargs)
+        outcome = "ok" if succeeded(operation, response) else str(response.status_code)
+    except Exception as e:
+        outcome = type(e).__name__
+    results.append((operation, outcome, loop.time() - scheduled, lag))
+
+
+async def run_phase(client, traffic: Traffic, mix: Dict[str, float], rate: float, duration: float) -> dict:
+    """
+    Sends `rate` requests per second for `duration` seconds and summarises them.
+    """
+    loop = asyncio.get_running_loop()
+    operations, weights = list(mix), list(mix.values())
+    results: list = []
+    tasks = []
+    start = loop.time()
+    for number in range(int(rate * duration)):
+        scheduled = start + number / rate
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        operation = traffic.random.choices(operations, weights)[0]
+        tasks.append(asyncio.ensure_future(send(client, traffic, operation, scheduled, results)))
+    await asyncio.gather(*tasks)
+    return summarize(results, rate, loop.time() - start)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+def latency_stats(results: list) -> dict:
+    latencies = sorted(latency for _, _, latency, _ in results)
+    errors: Dict[str, int] = {}
+    for _, outcome, _, _ in results:
+        if outcome != "ok":
+            errors[outcome] = errors.get(outcome, 0) + 1
+    return {
+        "requests": len(results),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+        "p90_ms": round(percentile(latencies, 0.9) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round((latencies[-1] if latencies else 0.0) * 1000, 2),
+    }
+
+
+def summarize(results: list, rate: float, elapsed: float) -> dict:
+    succeeded_requests = sum(1 for _, outcome, _, _ in results if outcome == "ok")
+    lags = sorted(lag for _, _, _, lag in results)
+    return {
+        "target_rate": rate,
+        "elapsed_seconds": round(elapsed, 2),
+        "throughput": round(succeeded_requests / elapsed, 2) if elapsed else 0.0,
+        # How late the driver itself sent requests; if high, the driver was the bottleneck.
+        "dispatch_lag_p99_ms": round(percentile(lags, 0.99) * 1000, 2),
+        "total": latency_stats(results),
+        "operations": {
+            operation: latency_stats([result for result in results if result[0] == operation])
+            for operation in sorted({result[0] for result in results})
+        },
+    }
+
+
+def print_summary(summary: dict) -> None:
+    print(
+        f"\nrate {summary['target_rate']:g}/s: {summary['throughput']:g} ok/s over {summary['elapsed_seconds']}s,"
+        f" driver lag p99 {summary['dispatch_lag_p99_ms']} ms"
+    )
+    print(f"  {'operation':<10} {'requests':>8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}  errors")
+    for name, stats in [*summary["operations"].items(), ("total", summary["total"])]:
+        print(
+            f"  {name:<10} {stats['requests']:>8} {stats['p50_ms']:>9} {stats['p90_ms']:>9}"
+            f" {stats['p99_ms']:>9} {stats['max_ms']:>9}  {stats['errors'] or ''}"
+        )
+
+
+async def drive(args, app_url: str, upstream_url: str, app: subprocess.Popen, upstream: subprocess.Popen,
+                admin_key: str) -> dict:
+    import httpx
+
+    mix = {name: float(weight) for name, _, weight in (part.partition("=") for part in args.mix.split(","))}
+    unknown = set(mix) - set(OPERATIONS)
+    if unknown:
+        raise ValueError(f"Unknown operations in --mix: {sorted(unknown)}")
+
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        await wait_until_ready(client, f"{upstream_url}/stats", upstream)
+        await wait_until_ready(client, f"{app_url}/metrics", app, headers={"Admin-Key": admin_key})
+        traffic = Traffic(app_url, args.users, args.analysis_mode, args.batch_size, args.seed)
+        await traffic.prepare(client)
+
+        rates = [float(rate) for rate in args.rates.split(",") if rate]
+        if args.warmup > 0:
+            await run_phase(client, traffic, mix, rates[0], args.warmup)
+
+        phases = []
+        for rate in rates:
+            summary = await run_phase(client, traffic, mix, rate, args.duration)
+            print_summary(summary)
+            phases.append(summary)
+        upstream_stats = (await client.get(f"{upstream_url}/stats")).json()
+    print(f"\nupstream: {upstream_stats}")
+    return {"mix": mix, "upstream": upstream_stats, "phases": phases}
+
+
+def run(args) -> int:
+    upstream_port, app_port = free_port(), free_port()
+    upstream_url = f"http://127.0.0.1:{upstream_port}"
+    app_url = f"http://127.0.0.1:{app_port}"
+    admin_key = secrets.token_urlsafe(16)
+    upstream = start_server("serve-upstream", args, upstream_port)
+    app = start_server("serve-app", args, app_port, "--upstream-url", f"{upstream_url}/graphql", "--admin-key", admin_key)
+    try:
+        report = asyncio.run(drive(args, app_url, upstream_url, app, upstream, admin_key))
+    finally:
+        stop_server(app)
+        stop_server(upstream)
+
+    if args.output:
+        report["args"] = {key: value for key, value in vars(args).items() if key != "role"}
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"saved results to {args.output}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("role", nargs="?", default="run", choices=("run", "serve-app", "serve-upstream"),
+                        help=argparse.SUPPRESS)
+    parser.add_argument("--rates", default="10,20,40", help="Comma-separated request rates per second (default: 10,20,40)")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per rate (default: 30)")
+    parser.add_argument("--warmup", type=float, default=5, help="Unreported seconds at the first rate (default: 5)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Operation weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--analysis-mode", default="data", choices=("data", "report"), help="Analysis mode (default: data)")
+    parser.add_argument("--batch-size", type=int, default=20, help="Queries per classify batch (default: 20)")
+    parser.add_argument("--catalog-size", type=int, default=3000, help="Problems served by the stub upstream (default: 3000)")
+    parser.add_argument("--users", type=int, default=1000, help="Seeded users (default: 1000)")
+    parser.add_argument("--bcrypt-rounds", type=int, default=0, help="bcrypt work factor (default: from the config)")
+    parser.add_argument("--upstream-latency-ms", type=float, default=0, help="Added upstream latency (default: 0)")
+    parser.add_argument("--mongo-latency-ms", type=float, default=0, help="Added latency per Mongo operation (default: 0)")
+    parser.add_argument("--param", action="append", default=[], help="Config override for the app, KEY=VALUE (repeatable)")
+    parser.add_argument("--connections", type=int, default=1000, help="Driver connection limit (default: 1000)")
+    parser.add_argument("--timeout", type=float, default=60, help="Request timeout in seconds (default: 60)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the catalog and the traffic (default: 0)")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--upstream-url", help=argparse.SUPPRESS)
+    parser.add_argument("--admin-key", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.role == "serve-upstream":
+        serve_upstream(args)
+        return 0
+    if args.role == "serve-app":
+        serve_app(args)
+        return 0
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""
+In-process stand-in for the subset of Motor the API uses, for load tests.
+
+Documents live in dictionaries and are copied on the way in and out, as a
+round trip through BSON would. Filters support equality on top-level fields
+and `$in`; updates support `$set`; unique indexes are enforced. Anything else
+raises NotImplementedError, so a new query shape fails loudly instead of
+silently matching nothing. An optional per-operation latency stands in for
+the network round trip to a real cluster.
+"""
+import asyncio
+import copy
+from typing import Dict, List, Optional
+from bson import ObjectId
+from pymongo import InsertOne, ReplaceOne, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from pymongo.results import BulkWriteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+
+def matches(document: dict, query: dict) -> bool:
+    for field, condition in query.items():
+        if field.startswith("$") or "." in field:
+            raise NotImplementedError(f"Unsupported query field: {field}")
+        value = document.get(field)
+        if isinstance(condition, dict):
+            for operator, operand in condition.items():
+                if operator != "$in":
+                    raise NotImplementedError(f"Unsupported query operator: {operator}")
+                if value not in operand:
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+class MemoryCursor:
+    def __init__(self, documents: List[dict]):
+        self._documents = documents
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self._documents:
+            yield document
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        return self._documents if length is None else self._documents[:length]
+
+
+class MemoryCollection:
+    def __init__(self, name: str, latency: float = 0.0):
+        self.name = name
+        self.latency = latency
+        self._documents: Dict[object, dict] = {}
+        # unique index name -> (indexed fields, indexed values -> _id)
+        self._unique: Dict[str, tuple] = {}
+
+    async def _round_trip(self) -> None:
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+
+    def _find(self, query: dict) -> List[dict]:
+        # Lookups by _id or by a unique index are served from the dictionaries, like an index scan.
+        if set(query) == {"_id"}:
+            condition = query["_id"]
+            if not isinstance(condition, dict):
+                condition = {"$in": [condition]}
+            if set(condition) == {"$in"}:
+                found = (self._documents.get(_id) for _id in dict.fromkeys(condition["$in"]))
+                return [document for document in found if document is not None]
+        for fields, keys in self._unique.values():
+            if set(query) == set(fields) and not any(isinstance(value, dict) for value in query.values()):
+                _id = keys.get(tuple(query[field] for field in fields))
+                return [] if _id is None else [self._documents[_id]]
+        return [document for document in self._documents.values() if matches(document, query)]
+
+    def _store(self, document: dict) -> None:
+        """
+        Stores a document under its _id, enforcing the unique indexes.
+        """
+        _id = document["_id"]
+        previous = self._documents.get(_id)
+        for name, (fields, keys) in self._unique.items():
+            owner = keys.get(tuple(document.get(field) for field in fields), _id)
+            if owner != _id:
+                raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: {name}")
+        for fields, keys in self._unique.values():
+            if previous is not None:
+                keys.pop(tuple(previous.get(field) for field in fields), None)
+            keys[tuple(document.get(field) for field in fields)] = _id
+        self._documents[_id] = document
+
+    def _insert(self, document: dict):
+        document.setdefault("_id", ObjectId())
+        if document["_id"] in self._documents:
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: _id_")
+        self._store(copy.deepcopy(document))
+        return document["_id"]
+
+    def _replace(self, query: dict, replacement: dict, upsert: bool) -> tuple:
+        found = self._find(query)
+        if found:
+            _id = found[0]["_id"]
+            self._store({**copy.deepcopy(replacement), "_id": _id})
+            return 1, None
+        if upsert:
+            return 0, self._insert({**query, **copy.deepcopy(replacement)})
+        return 0, None
+
+    def _update(self, query: dict, update: dict, upsert: bool) -> tuple:
+        if set(update) - {"$set"}:
+            raise NotImplementedError(f"Unsupported update: {sorted(update)}")
+        found = self._find(query)
+        if found:
+            self._store({**found[0], **copy.deepcopy(update.get("$set", {}))})
+            return 1, None
+        if upsert:
+            return 0, self._insert({**query, **copy.deepcopy(update.get("$set", {}))})
+        return 0, None
+
+    async def create_index(self, keys, unique: bool = False, name: str = None, **kwargs) -> str:
+        fields = tuple(field for field, _ in keys)
+        name = name or "_".join(f"{field}_{direction}" for field, direction in keys)
+        if unique and name not in self._unique:
+            indexed = {}
+            for _id, document in self._documents.items():
+                key = tuple(document.get(field) for field in fields)
+                if key in indexed:
+                    raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: {name}")
+                indexed[key] = _id
+            self._unique[name] = (fields, indexed)
+        return name
+
+    async def find_one(self, query: dict = None) -> Optional[dict]:
+        await self._round_trip()
+        found = self._find(query or {})
+        return copy.deepcopy(found[0]) if found else None
+
+    def find(self, query: dict = None) -> MemoryCursor:
+        return MemoryCursor(copy.deepcopy(self._find(query or {})))
+
+    async def count_documents(self, query: dict) -> int:
+        await self._round_trip()
+        return len(self._find(query))
+
+    async def insert_one(self, document: dict) -> InsertOneResult:
+        await self._round_trip()
+        return InsertOneResult(self._insert(document), True)
+
+    async def insert_many(self, documents: List[dict], ordered: bool = True) -> InsertManyResult:
+        await self._round_trip()
+        return InsertManyResult([self._insert(document) for document in documents], True)
+
+    async def update_one(self, query: dict, update: dict, upsert: bool = False) -> UpdateResult:
+        await self._round_trip()
+        matched, upserted_id = self._update(query, update, upsert)
+        raw = {"n": matched or int(upserted_id is not None), "nModified": matched, "ok": 1.0}
+        if upserted_id is not None:
+            raw["upserted"] = upserted_id
+        return UpdateResult(raw, True)
+
+    async def bulk_write(self, requests: list, ordered: bool = True) -> BulkWriteResult:
+        await self._round_trip()
+        result = {"nInserted": 0, "nUpserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": []}
+        for index, request in enumerate(requests):
+            if isinstance(request, InsertOne):
+                self._insert(request._doc)
+                result["nInserted"] += 1
+                continue
+            if isinstance(request, ReplaceOne):
+                matched, upserted_id = self._replace(request._filter, request._doc, request._upsert)
+            elif isinstance(request, UpdateOne):
+                matched, upserted_id = self._update(request._filter, request._doc, request._upsert)
+            else:
+                raise NotImplementedError(f"Unsupported bulk operation: {type(request).__name__}")
+            result["nMatched"] += matched
+            result["nModified"] += matched
+            if upserted_id is not None:
+                result["nUpserted"] += 1
+                result["upserted"].append({"index": index, "_id": upserted_id})
+        return BulkWriteResult(result, True)
+
+
+class MemoryDatabase:
+    def __init__(self, name: str, latency: float = 0.0):
+        self.name = name
+        self.latency = latency
+        self._collections: Dict[str, MemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = MemoryCollection(name, self.latency)
+        return collection
+
+
+class MemoryClient:
+    """
+    Stand-in for `AsyncIOMotorClient`, see `db_init.use_client`.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self._databases: Dict[str, MemoryDatabase] = {}
+
+    def __getitem__(self, name: str) -> MemoryDatabase:
+        database = self._databases.get(name)
+        if database is None:
+            database = self._databases[name] = MemoryDatabase(name, self.latency)
+        return database
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,47 @@
+"""
+Local stand-in for the upstream GraphQL problem API, for load tests.
+
+Serves the `problemsetQuestionListV2` query the catalog ingester sends, paging
+through a synthetic catalog (see synthetic_catalog.py). Every other query is
+answered with a GraphQL error. An optional latency per request stands in for
+the round trip to the real API.
+"""
+import asyncio
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from benchmarks.synthetic_catalog import synthetic_problems, upstream_questions
+
+
+def create_upstream(size: int = 3000, seed: int = 0, latency: float = 0.0) -> Starlette:
+    """
+    Creates the stub upstream app serving a synthetic catalog of `size` problems.
+    """
+    questions = upstream_questions(synthetic_problems(size, seed=seed))
+    stats = {"requests": 0, "questions_served": 0}
+
+    async def graphql(request: Request) -> JSONResponse:
+        stats["requests"] += 1
+        if latency > 0:
+            await asyncio.sleep(latency)
+        payload = await request.json()
+        if "problemsetQuestionListV2" not in payload.get("query", ""):
+            return JSONResponse({"errors": [{"message": "Unsupported query"}]}, status_code=400)
+
+        variables = payload.get("variables") or {}
+        skip = int(variables.get("skip", 0))
+        limit = int(variables.get("limit", 100))
+        page = questions[skip:skip + limit]
+        stats["questions_served"] += len(page)
+        return JSONResponse({
+            "data": {"problemsetQuestionListV2": {"totalLength": len(questions), "questions": page}}
+        })
+
+    async def upstream_stats(request: Request) -> JSONResponse:
+        return JSONResponse(stats)
+
+    return Starlette(routes=[
+        Route("/graphql", graphql, methods=["POST"]),
+        Route("/stats", upstream_stats, methods=["GET"]),
+    ])
@@ -0,0 +1,107 @@
+"""
+Generates synthetic problem catalogs shaped like the LeetCode problem set.
+
+The tag vocabulary and its relative frequencies follow the real catalog:
+a few tags (Array, String, Hash Table, ...) appear on a large share of the
+problems and a long tail of tags on only a handful. Problems carry 1 to 8
+tags (about 2.8 on average), the difficulty mix is roughly 25% Easy, 52%
+Medium and 23% Hard, and acceptance rates are fractions, as the upstream
+`acRate` the ingester reads, that drop with the difficulty. The same size
+and seed always produce the same catalog, so benchmark runs are comparable.
+
+The problems are dictionaries in the format `ProblemController.fetch_problem_page`
+produces, and `upstream_questions` renders them as the upstream GraphQL API does.
+"""
+from typing import Dict, List
+import numpy as np
+
+# (tag, approximate number of problems in the real catalog)
+TAG_WEIGHTS = [
+    ("Array", 1850), ("String", 760), ("Hash Table", 660), ("Dynamic Programming", 560),
+    ("Math", 560), ("Sorting", 420), ("Greedy", 400), ("Depth-First Search", 300),
+    ("Database", 300), ("Binary Search", 280), ("Breadth-First Search", 250), ("Tree", 240),
+    ("Matrix", 230), ("Bit Manipulation", 230), ("Two Pointers", 210), ("Simulation", 180),
+    ("Binary Tree", 170), ("Prefix Sum", 170), ("Heap (Priority Queue)", 170), ("Stack", 170),
+    ("Graph", 160), ("Counting", 160), ("Sliding Window", 140), ("Design", 130),
+    ("Backtracking", 100), ("Union Find", 90), ("Enumeration", 90), ("Linked List", 80),
+    ("Number Theory", 80), ("Ordered Set", 70), ("Monotonic Stack", 70), ("Segment Tree", 60),
+    ("Trie", 60), ("Combinatorics", 60), ("Bitmask", 60), ("Divide and Conquer", 60),
+    ("Queue", 50), ("Recursion", 50), ("Binary Indexed Tree", 45), ("Memoization", 40),
+    ("Geometry", 40), ("Hash Function", 40), ("Topological Sort", 40), ("String Matching", 35),
+    ("Shortest Path", 35), ("Rolling Hash", 30), ("Game Theory", 30), ("Interactive", 20),
+    ("Data Stream", 20), ("Brainteaser", 20), ("Monotonic Queue", 20), ("Randomized", 12),
+    ("Merge Sort", 12), ("Line Sweep", 10), ("Iterator", 9), ("Concurrency", 9),
+    ("Doubly-Linked List", 8), ("Probability and Statistics", 8), ("Quickselect", 7),
+    ("Bucket Sort", 7), ("Suffix Array", 6), ("Minimum Spanning Tree", 6), ("Counting Sort", 6),
+    ("Shell", 4), ("Reservoir Sampling", 4), ("Eulerian Circuit", 3), ("Radix Sort", 3),
+    ("Strongly Connected Component", 2), ("Rejection Sampling", 2), ("Biconnected Component", 1),
+]
+
+# difficulty -> (share of the catalog, alpha and beta of the acceptance rate distribution)
+DIFFICULTIES = {
+    "Easy": (0.25, 6.0, 4.0),
+    "Medium": (0.52, 5.0, 5.0),
+    "Hard": (0.23, 4.0, 6.0),
+}
+
+MEAN_TAGS = 2.8
+MAX_TAGS = 8
+
+
+def synthetic_problems(size: int, seed: int = 0) -> List[Dict]:
+    """
+    Generates `size` problems with realistic tag, difficulty and acceptance rate distributions.
+
+    Args:
+        size: Number of problems.
+        seed: Random seed; the same size and seed produce the same problems.
+
+    Returns:
+        Problem dictionaries with 'title', 'title_slug', 'difficulty', 'tags',
+        'acceptance_rate' and 'details_url'.
+    """
+    rng = np.random.default_rng(seed)
+    tag_names = [name for name, _ in TAG_WEIGHTS]
+    weights = np.array([weight for _, weight in TAG_WEIGHTS], dtype=np.float64)
+
+    # Weighted sampling of distinct tags per problem: the top-k of log(weight) plus
+    # Gumbel noise is a weighted draw without replacement, for all problems at once.
+    tag_counts = np.clip(rng.poisson(MEAN_TAGS - 1, size) + 1, 1, MAX_TAGS)
+    keys = np.log(weights / weights.sum()) + rng.gumbel(size=(size, len(tag_names)))
+    ranked = np.argsort(-keys, axis=1)[:, :MAX_TAGS]
+
+    labels = list(DIFFICULTIES)
+    shares = np.array([share for share, _, _ in DIFFICULTIES.values()])
+    difficulty = rng.choice(len(labels), size=size, p=shares / shares.sum())
+    alpha = np.array([DIFFICULTIES[label][1] for label in labels])[difficulty]
+    beta = np.array([DIFFICULTIES[label][2] for label in labels])[difficulty]
+    acceptance = np.round(rng.beta(alpha, beta), 2)
+
+    problems = []
+    for i in range(size):
+        slug = f"synthetic-problem-{i + 1}"
+        problems.append({
+            "title": f"Synthetic Problem {i + 1}",
+            "title_slug": slug,
+            "difficulty": labels[difficulty[i]],
+            "tags": [tag_names[tag] for tag in ranked[i, :tag_counts[i]]],
+            "acceptance_rate": float(acceptance[i]),
+            "details_url": "",
+        })
+    return problems
+
+
+def upstream_questions(problems: List[Dict]) -> List[Dict]:
+    """
+    Renders problems as the `questions` of the upstream `problemsetQuestionListV2` query.
+    """
+    return [
+        {
+            "title": problem["title"],
+            "titleSlug": problem["title_slug"],
+            "difficulty": problem["difficulty"].upper(),
+            "topicTags": [{"name": tag} for tag in problem["tags"]],
+            "acRate": problem["acceptance_rate"],
+        }
+        for problem in problems
+    ]
@@ -1,12 +1,22 @@
 # # main.py
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.openapi.models import OAuthFlows as OAuthFlowsModel
 from fastapi.openapi.models import OAuthFlowAuthorizationCode as OAuthFlowAuthorizationCodeModel
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.security import OAuth2AuthorizationCodeBearer
 from user_router import UserRouter
+from admin_router import AdminRouter, get_admin_key
+from Controller.upstream_client import start_upstream_client, close_upstream_client
+from Controller.analysis_pool import start_analysis_pool, close_analysis_pool
+from Controller.password_service import start_password_service, close_password_service
+from Controller.db_init import connect_to_mongo, close_mongo_connection
+from Controller.metrics import MetricsMiddleware, metrics
+from Controller.profiler import ProfilingMiddleware, profile_store
+from Controller.problem_controller import ProblemController
+from Controller.auth_cache import auth_cache
+from Controller.password_service import password_service
 # from participant_router import ParticipantRouter
-# from .Controller.db_init import connect_to_mongo
 import uvicorn
 
 app = FastAPI()
@@ -20,13 +30,37 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
-# async def lifespan(app: FastAPI):
-#     await connect_to_mongo(app)
+metrics.register_collector("catalog", ProblemController.catalog_stats)
+metrics.register_collector("analysis", ProblemController.analysis_stats)
+metrics.register_collector("auth_cache", auth_cache.stats)
+metrics.register_collector("password", password_service.stats)
+metrics.register_collector("profiles", profile_store.stats)
+
+@app.on_event("startup")
+async def startup():
+    await connect_to_mongo(app)
+    await start_upstream_client(app)
+    await start_analysis_pool(app)
+    await start_password_service(app)
+
+@app.on_event("shutdown")
+async def shutdown():
+    await close_upstream_client(app)
+    await close_analysis_pool(app)
+    await close_password_service(app)
+    await close_mongo_connection(app)
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(admin_key: str = Depends(get_admin_key)):
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 oauth2_scheme = OAuth2AuthorizationCodeBearer(authorizationUrl="token",tokenUrl="token")
 
 app.include_router(UserRouter)
+app.include_router(AdminRouter)
 # app.include_router(ParticipantRouter)
 
 if __name__ == "__main__":
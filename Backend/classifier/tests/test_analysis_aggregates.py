@@ -0,0 +1,46 @@
+"""
+Tests that the analyzer charts read the shared aggregate layer.
+
+Run from Backend/classifier with `python -m pytest tests`.
+"""
+from Controller.analysis_problems import LeetCodeProblemAnalyzerEnhanced
+
+PROBLEMS = [
+    {"title": "A", "difficulty": "Easy", "tags": ["Array"], "acceptance_rate": 0.6, "year": 2020},
+    {"title": "B", "difficulty": "Medium", "tags": ["Math"], "acceptance_rate": 0.4, "year": 2020},
+    {"title": "C", "difficulty": "Hard", "tags": ["Array", "Math"], "acceptance_rate": 0.3, "year": 2021},
+    {"title": "D", "difficulty": "Easy", "tags": [], "acceptance_rate": 0.9},
+]
+
+
+def rendered_figures(analyzer) -> list:
+    figures = []
+
+    def render_plot(plot_func, is_plotly=False):
+        figures.append(plot_func)
+        return b"png"
+
+    analyzer.render_plot = render_plot
+    return figures
+
+
+def test_acceptance_rate_trends_use_the_year_aggregate():
+    analyzer = LeetCodeProblemAnalyzerEnhanced(PROBLEMS, binary_images=True)
+    figures = rendered_figures(analyzer)
+
+    assert analyzer.analyze_acceptance_rate_trends() == b"png"
+
+    trace = figures[0].data[0]
+    assert list(trace.x) == [2020, 2021]
+    assert [round(value, 2) for value in trace.y] == [0.5, 0.3]
+    # Served from the aggregates, without building the problem frame
+    assert "problems" not in analyzer.__dict__
+
+
+def test_acceptance_rate_trends_are_skipped_without_years():
+    problems = [{key: value for key, value in problem.items() if key != "year"} for problem in PROBLEMS]
+    analyzer = LeetCodeProblemAnalyzerEnhanced(problems, binary_images=True)
+    figures = rendered_figures(analyzer)
+
+    assert analyzer.analyze_acceptance_rate_trends() is None
+    assert figures == []
@@ -0,0 +1,145 @@
+"""
+Tests of the content-addressed analysis cache and its memory and disk tiers.
+
+Run from Backend/classifier with `python -m pytest tests`.
+"""
+import asyncio
+import os
+
+from Controller.analysis_cache import AnalysisCache
+
+PROBLEMS = [{"title": "Two Sum", "title_slug": "two-sum", "tags": ["Array"], "acceptance_rate": 0.5}]
+
+
+def set_age(cache: AnalysisCache, key: str, seconds_ago: float) -> None:
+    modified = os.stat(cache._path(key)).st_mtime - seconds_ago
+    os.utime(cache._path(key), (modified, modified))
+
+
+async def read_stream(opened) -> bytes:
+    chunks, size = opened
+    data = b"".join([chunk async for chunk in chunks])
+    assert len(data) == size
+    return data
+
+
+def test_keys_depend_on_content_and_variant():
+    same = [dict(problem) for problem in PROBLEMS]
+    changed = [{**PROBLEMS[0], "acceptance_rate": 0.6}]
+
+    assert AnalysisCache.key(PROBLEMS) == AnalysisCache.key(same)
+    assert AnalysisCache.key(PROBLEMS) != AnalysisCache.key(changed)
+    assert AnalysisCache.key(PROBLEMS) != AnalysisCache.key(PROBLEMS, "chart:tag_frequency")
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = AnalysisCache(max_entries=2, max_bytes=1024)
+
+    async def scenario():
+        await cache.put("a", b"1")
+        await cache.put("b", b"2")
+        await cache.get("a")
+        await cache.put("c", b"3")
+        return [await cache.get(key) for key in ("a", "b", "c")]
+
+    assert asyncio.run(scenario()) == [b"1", None, b"3"]
+
+
+def test_memory_tier_is_bounded_by_bytes():
+    cache = AnalysisCache(max_entries=10, max_bytes=10)
+
+    async def scenario():
+        await cache.put("a", b"x" * 6)
+        await cache.put("b", b"y" * 6)
+        await cache.put("too-big", b"z" * 11)
+        return [await cache.get(key) for key in ("a", "b", "too-big")]
+
+    assert asyncio.run(scenario()) == [None, b"y" * 6, None]
+    assert cache.stats()["memory_bytes"] == 6
+
+
+def test_disk_tier_serves_entries_evicted_from_memory(tmp_path):
+    cache = AnalysisCache(max_entries=1, directory=str(tmp_path))
+
+    async def scenario():
+        await cache.put("a" * 64, b"report a")
+        await cache.put("b" * 64, b"report b")
+        value = await cache.get("a" * 64)
+        streamed = await read_stream(await cache.open("b" * 64, chunk_size=3))
+        return value, streamed
+
+    assert asyncio.run(scenario()) == (b"report a", b"report b")
+    # Reading a back into memory evicted b, so both lookups went to disk
+    assert cache.stats()["disk_hits"] == 2
+
+
+def test_disk_tier_evicts_least_recently_used_files(tmp_path):
+    cache = AnalysisCache(max_entries=1, directory=str(tmp_path), max_disk_bytes=250)
+    a, b, c = "a" * 64, "b" * 64, "c" * 64
+
+    async def scenario():
+        await cache.put(a, b"x" * 100)
+        await cache.put(b, b"y" * 100)
+        set_age(cache, a, 60)
+        set_age(cache, b, 120)
+        await cache.put(c, b"z" * 100)
+        # A fresh instance only sees the disk tier
+        disk = AnalysisCache(directory=str(tmp_path))
+        return [await disk.get(key) is not None for key in (a, b, c)]
+
+    assert asyncio.run(scenario()) == [True, False, True]
+    assert cache.stats()["disk_bytes"] == 200
+
+
+def test_disk_size_is_tracked_across_overwrites(tmp_path):
+    cache = AnalysisCache(directory=str(tmp_path))
+
+    async def scenario():
+        await cache.put("a" * 64, b"x" * 100)
+        await cache.put("a" * 64, b"x" * 40)
+        await cache.put("b" * 64, b"y" * 10)
+
+    asyncio.run(scenario())
+
+    assert cache.stats()["disk_bytes"] == 50
+
+
+async def chunks_of(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+def disk_files(tmp_path) -> list:
+    return sorted(path.name for path in tmp_path.rglob("*") if path.is_file())
+
+
+def test_tee_writes_through_to_disk_and_keeps_small_entries_in_memory(tmp_path):
+    cache = AnalysisCache(max_bytes=8, directory=str(tmp_path))
+
+    async def scenario():
+        small = [chunk async for chunk in cache.tee("a" * 64, chunks_of(b"abc", b"def"))]
+        large = [chunk async for chunk in cache.tee("b" * 64, chunks_of(b"abcd", b"efgh", b"ijkl"))]
+        return small, large
+
+    small, large = asyncio.run(scenario())
+
+    assert (small, large) == ([b"abc", b"def"], [b"abcd", b"efgh", b"ijkl"])
+    assert disk_files(tmp_path) == ["a" * 64, "b" * 64]
+    # Only the entry that fits in max_bytes is kept in memory
+    assert list(cache._entries) == ["a" * 64]
+    assert cache.stats()["disk_bytes"] == 18
+    assert asyncio.run(cache.get("b" * 64)) == b"abcdefghijkl"
+
+
+def test_tee_does_not_cache_a_stream_closed_early(tmp_path):
+    cache = AnalysisCache(directory=str(tmp_path))
+
+    async def scenario():
+        stream = cache.tee("a" * 64, chunks_of(b"abc", b"def"))
+        first = await stream.__anext__()
+        await stream.aclose()
+        return first, await cache.get("a" * 64)
+
+    assert asyncio.run(scenario()) == (b"abc", None)
+    # The temporary file was removed as well
+    assert disk_files(tmp_path) == []
@@ -0,0 +1,139 @@
+"""
+Tests of rendering selected charts: the analyzer, the controller and the chart routes.
+
+Run from Backend/classifier with `python -m pytest tests`.
+"""
+import asyncio
+import base64
+import time
+
+import jwt
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+import main
+import Controller.problem_controller as problem_controller
+import Controller.user_authenticate as user_authenticate
+from config import params
+from Controller.analysis_cache import AnalysisCache
+from Controller.analysis_problems import LeetCodeProblemAnalyzerEnhanced
+from Controller.auth_cache import AuthCache
+from Controller.problem_controller import ProblemController
+
+PROBLEMS = [
+    {"title": "Two Sum", "title_slug": "two-sum", "difficulty": "Easy", "tags": ["Array"], "acceptance_rate": 0.5},
+    {"title": "LRU Cache", "title_slug": "lru-cache", "difficulty": "Medium", "tags": ["Design"], "acceptance_rate": 0.4},
+]
+
+
+def test_analyze_chart_isolates_a_failing_chart():
+    analyzer = LeetCodeProblemAnalyzerEnhanced(PROBLEMS, binary_images=True)
+    analyzer.analyze_tag_frequency = lambda: b"tag frequency png"
+
+    def broken():
+        raise ValueError("no data")
+
+    analyzer.analyze_difficulties = broken
+
+    assert analyzer.analyze(["tag_frequency", "difficulty_distribution"]) == {
+        "tag_frequency": b"tag frequency png",
+        "difficulty_distribution": None,
+    }
+    assert analyzer.errors == {"difficulty_distribution": "ValueError: no data"}
+
+
+def test_chart_keys_follow_report_order():
+    keys = ProblemController.chart_keys()
+
+    assert keys == list(LeetCodeProblemAnalyzerEnhanced.CHARTS)
+    assert {"tag_frequency", "acceptance_rate_trends"} <= set(keys)
+
+
+class Pool:
+    """
+    Stands in for the analysis pool and records which charts it was asked to render.
+    """
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.requests = []
+
+    async def render_charts(self, problems, charts, request=None):
+        self.requests.append(list(charts))
+        images = {chart: None if chart in self.failing else f"{chart} png".encode() for chart in charts}
+        errors = {chart: "RuntimeError: render failed" for chart in charts if chart in self.failing}
+        return images, errors
+
+
+@pytest.fixture
+def charts(monkeypatch, tmp_path):
+    pool = Pool(failing={"tag_correlations"})
+    cache = AnalysisCache(directory=str(tmp_path))
+
+    async def get_problem_set(id):
+        return PROBLEMS
+
+    user_id = str(ObjectId())
+    auth_cache = AuthCache()
+    auth_cache.put(user_id)
+    monkeypatch.setattr(user_authenticate, "auth_cache", auth_cache)
+    monkeypatch.setattr(ProblemController, "get_problem_set", staticmethod(get_problem_set))
+    monkeypatch.setattr(problem_controller, "analysis_pool", pool)
+    monkeypatch.setattr(problem_controller, "analysis_cache", cache)
+
+    token = jwt.encode({"_id": user_id, "exp": time.time() + 600}, params["SECRET_KEY"], algorithm="HS256")
+    headers = {"API-Key": params["API_KEY"], "token": token}
+    return TestClient(main.app), headers, pool, cache
+
+
+def test_only_the_requested_charts_are_rendered_and_each_is_cached(charts):
+    client, headers, pool, cache = charts
+    query = {"names": ["tag_frequency", "tag_correlations"]}
+
+    first = client.get("/user/analysis/set-1/charts", params=query, headers=headers).json()
+    client.get("/user/analysis/set-1/charts", params={"names": ["tag_frequency", "difficulty_distribution"]},
+               headers=headers)
+
+    assert first == {
+        "status": True,
+        "charts": {"tag_frequency": base64.b64encode(b"tag_frequency png").decode(), "tag_correlations": None},
+        "failed_charts": {"tag_correlations": "RuntimeError: render failed"},
+    }
+    # The failed chart is not cached; tag_frequency is served from its own entry the second time
+    assert pool.requests == [["tag_frequency", "tag_correlations"], ["difficulty_distribution"]]
+    for chart in ("tag_frequency", "difficulty_distribution"):
+        assert asyncio.run(cache.get(cache.key(PROBLEMS, f"chart:{chart}"))) == f"{chart} png".encode()
+    assert asyncio.run(cache.get(cache.key(PROBLEMS, "chart:tag_correlations"))) is None
+
+
+def test_single_chart_route_returns_the_png(charts):
+    client, headers, pool, _ = charts
+
+    response = client.get("/user/analysis/set-1/charts/tag_frequency", headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    assert response.content == b"tag_frequency png"
+    assert pool.requests == [["tag_frequency"]]
+
+
+def test_single_chart_route_reports_a_failed_chart(charts):
+    client, headers, _, _ = charts
+
+    response = client.get("/user/analysis/set-1/charts/tag_correlations", headers=headers)
+
+    assert response.json() == {"status": False, "detail": "RuntimeError: render failed"}
+
+
+def test_unknown_charts_are_rejected_before_rendering(charts):
+    client, headers, pool, _ = charts
+
+    single = client.get("/user/analysis/set-1/charts/pie_chart", headers=headers)
+    several = client.get("/user/analysis/set-1/charts", params={"names": ["tag_frequency", "pie_chart"]},
+                         headers=headers)
+
+    for response in (single, several):
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Unknown chart(s): pie_chart"
+    assert pool.requests == []
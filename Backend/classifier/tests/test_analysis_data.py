@@ -0,0 +1,128 @@
+"""
+Tests of the data-only analysis (?mode=data), which returns chart data instead of images.
+
+Run from Backend/classifier with `python -m pytest tests`.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+import jwt
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+import main
+import Controller.problem_controller as problem_controller
+import Controller.user_authenticate as user_authenticate
+from config import params
+from Controller.analysis_aggregates import AnalysisAggregates
+from Controller.analysis_cache import AnalysisCache
+from Controller.analysis_pool import run_analysis_data
+from Controller.analysis_problems import LeetCodeProblemAnalyzerEnhanced
+from Controller.auth_cache import AuthCache
+from Controller.problem_catalog import ProblemCatalog
+from Controller.problem_controller import ProblemController
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBLEMS = [
+    {"title": "Two Sum", "difficulty": "Easy", "acceptance_rate": 0.5, "tags": ["Array", "Hash Table"], "year": 2015},
+    {"title": "Add Two Numbers", "difficulty": "Medium", "acceptance_rate": 0.4, "tags": ["Math"], "year": 2015},
+    {"title": "Median of Arrays", "difficulty": "Hard", "acceptance_rate": 0.3, "tags": ["Array"], "year": 2016},
+    {"title": "Valid Parentheses", "difficulty": "Easy", "acceptance_rate": 0.7, "tags": [], "year": 2016},
+    {"title": "Group Anagrams", "difficulty": "Medium", "acceptance_rate": 0.6, "tags": ["Array", "Hash Table"],
+     "year": 2016},
+]
+
+
+def test_data_is_json_serializable_and_matches_the_aggregates():
+    data = LeetCodeProblemAnalyzerEnhanced(PROBLEMS).analyze_data()
+    aggregates = AnalysisAggregates(ProblemCatalog.from_problems(PROBLEMS))
+
+    # Only plain JSON types, no numpy scalars or arrays
+    assert json.loads(json.dumps(data)) == data
+    assert data["problem_count"] == 5
+    assert data["difficulty_distribution"] == {"labels": ["Easy", "Medium", "Hard"], "counts": [2, 2, 1]}
+    assert dict(zip(data["tag_frequency"]["tags"], data["tag_frequency"]["counts"])) == {
+        "Array": 3, "Hash Table": 2, "Math": 1,
+    }
+    assert data["tag_frequency"]["counts"] == aggregates.tag_frequencies.tolist()
+    assert data["tag_cooccurrence"]["counts"] == aggregates.tag_cooccurrence.counts.tolist()
+    assert data["acceptance_rate_histogram"] == aggregates.acceptance_histogram()
+    assert data["acceptance_rate_by_difficulty"] == aggregates.acceptance_quartiles_by_difficulty
+    assert data["problem_count_by_difficulty_and_tag"]["counts"] == aggregates.tag_difficulty_counts.values.tolist()
+    assert data["average_acceptance_rate_by_tag"]["averages"] == [
+        round(float(mean), 2) for mean in aggregates.tag_acceptance_means
+    ]
+    assert data["recommended_problem"] == {"title": "Valid Parentheses", "acceptance_rate": pytest.approx(0.7)}
+    assert data["acceptance_rate_trends"]["years"] == [2015, 2016]
+    assert data["acceptance_rate_trends"]["averages"] == [0.45, pytest.approx(0.53, abs=0.01)]
+
+
+def test_run_analysis_data_matches_the_analyzer():
+    catalog = ProblemCatalog.from_problems(PROBLEMS)
+
+    assert run_analysis_data(catalog) == LeetCodeProblemAnalyzerEnhanced(PROBLEMS).analyze_data()
+
+
+def test_data_mode_never_imports_the_plotting_stack():
+    script = (
+        "import sys\n"
+        "from Controller.analysis_pool import run_analysis_data\n"
+        f"data = run_analysis_data({PROBLEMS!r})\n"
+        "assert data['problem_count'] == 5\n"
+        "print(sorted(name for name in ('plotly', 'kaleido', 'matplotlib', 'seaborn') if name in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    jobs = []
+
+    async def get_problem_set(id):
+        return PROBLEMS
+
+    async def analysis_data(catalog, request=None):
+        jobs.append(catalog)
+        return run_analysis_data(catalog)
+
+    user_id = str(ObjectId())
+    auth_cache = AuthCache()
+    auth_cache.put(user_id)
+    monkeypatch.setattr(user_authenticate, "auth_cache", auth_cache)
+    monkeypatch.setattr(ProblemController, "get_problem_set", staticmethod(get_problem_set))
+    monkeypatch.setattr(problem_controller.analysis_pool, "analysis_data", analysis_data)
+    monkeypatch.setattr(problem_controller, "analysis_cache", AnalysisCache(directory=str(tmp_path)))
+
+    token = jwt.encode({"_id": user_id, "exp": time.time() + 600}, params["SECRET_KEY"], algorithm="HS256")
+    headers = {"API-Key": params["API_KEY"], "token": token}
+    return TestClient(main.app), headers, jobs
+
+
+def test_data_mode_route_returns_the_chart_data_and_caches_it(client):
+    client, headers, jobs = client
+
+    first = client.get("/user/analysis/set-1", params={"mode": "data"}, headers=headers)
+    second = client.get("/user/analysis/set-1", params={"mode": "data"}, headers=headers)
+
+    assert first.status_code == 200
+    assert first.json() == {
+        "status": True,
+        "analysis": {"status": True, "data": LeetCodeProblemAnalyzerEnhanced(PROBLEMS).analyze_data()},
+    }
+    assert second.json() == first.json()
+    assert len(jobs) == 1
+
+
+def test_unknown_mode_is_rejected(client):
+    client, headers, jobs = client
+
+    assert client.get("/user/analysis/set-1", params={"mode": "pdf"}, headers=headers).status_code == 422
+    assert jobs == []
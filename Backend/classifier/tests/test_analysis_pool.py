@@ -0,0 +1,94 @@
+"""
+Tests of the analysis process pool's admission control and renderer health checks.
+
+The jobs are plain standard-library functions, so the spawned workers never
+render anything. Run from Backend/classifier with `python -m pytest tests`.
+"""
+import asyncio
+import logging
+import operator
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+import Controller.analysis_pool as analysis_pool_module
+from config import params
+from Controller.analysis_pool import AnalysisPool, start_analysis_pool
+
+
+def test_pool_that_was_never_started_admits_jobs():
+    async def scenario():
+        pool = AnalysisPool()
+        try:
+            return await pool.run(operator.add, 1, 2), pool.max_queue
+        finally:
+            pool.close()
+
+    result, max_queue = asyncio.run(scenario())
+
+    assert result == 3
+    assert max_queue > 0
+
+
+def test_full_pool_rejects_jobs_until_admitted_work_finishes():
+    async def scenario():
+        pool = AnalysisPool()
+        pool.start(max_workers=1, max_queue=1, job_timeout=30)
+        try:
+            running = asyncio.ensure_future(pool.run(time.sleep, 0.5))
+            await asyncio.sleep(0)
+            with pytest.raises(HTTPException) as rejected:
+                await pool.run(operator.add, 1, 2)
+            await running
+            return rejected.value.status_code, await pool.run(operator.add, 1, 2)
+        finally:
+            pool.close()
+
+    status_code, result = asyncio.run(scenario())
+
+    assert status_code == 503
+    assert result == 3
+
+
+def test_health_check_loop_survives_a_failed_round(caplog):
+    checks = []
+
+    async def check_renderers():
+        checks.append(len(checks))
+        if len(checks) == 1:
+            raise RuntimeError("worker vanished")
+        return {}
+
+    async def scenario():
+        pool = AnalysisPool()
+        pool.health_check_interval = 0.01
+        pool.check_renderers = check_renderers
+        pool.warm_up()
+        try:
+            while len(checks) < 3:
+                await asyncio.sleep(0.01)
+        finally:
+            pool.close()
+
+    with caplog.at_level(logging.ERROR, logger=analysis_pool_module.__name__):
+        asyncio.run(scenario())
+
+    assert len(checks) >= 3
+    assert "Renderer health check failed" in caplog.text
+
+
+@pytest.mark.parametrize("value, warmed", [
+    (True, True), ("true", True), ("1", True), ("yes", True),
+    (False, False), ("false", False), ("False", False), ("0", False), ("no", False), ("", False),
+])
+def test_warm_up_setting_is_parsed(monkeypatch, value, warmed):
+    calls = []
+    monkeypatch.setitem(params, "ANALYSIS_WARM_UP", value)
+    monkeypatch.setattr(analysis_pool_module.analysis_pool, "start", lambda: calls.append("start"))
+    monkeypatch.setattr(analysis_pool_module.analysis_pool, "warm_up", lambda: calls.append("warm_up"))
+
+    asyncio.run(start_analysis_pool(SimpleNamespace(state=SimpleNamespace())))
+
+    assert calls == (["start", "warm_up"] if warmed else ["start"])
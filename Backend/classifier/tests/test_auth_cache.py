@@ -0,0 +1,142 @@
+"""
+Tests of the verified-user cache and of its use in get_authenticate_user.
+
+Run from Backend/classifier with `python -m pytest tests`.
+"""
+import asyncio
+import time
+
+import jwt
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+import Controller.user_authenticate as user_authenticate
+from config import params
+from Controller.auth_cache import AuthCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("Controller.auth_cache.time.time", clock)
+    return clock
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = AuthCache(ttl=60)
+    cache.put("user")
+
+    clock.now += 59
+    assert cache.get("user")
+    clock.now += 2
+    assert not cache.get("user")
+    assert cache.stats()["entries"] == 0
+
+
+def test_entries_never_outlive_the_token(clock):
+    cache = AuthCache(ttl=60)
+    cache.put("user", token_exp=clock.now + 10)
+
+    clock.now += 9
+    assert cache.get("user")
+    clock.now += 2
+    assert not cache.get("user")
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = AuthCache(max_entries=2)
+    cache.put("a")
+    cache.put("b")
+    cache.get("a")
+    cache.put("c")
+
+    assert [cache.get(user_id) for user_id in ("a", "b", "c")] == [True, False, True]
+
+
+def test_invalidate_accepts_object_ids(clock):
+    cache = AuthCache()
+    user_id = ObjectId()
+    cache.put(str(user_id))
+
+    cache.invalidate(user_id)
+
+    assert not cache.get(str(user_id))
+    assert cache.stats()["invalidations"] == 1
+
+
+class Users:
+    """
+    Minimal stand-in for the User collection that records every lookup.
+    """
+
+    def __init__(self, *documents):
+        self.documents = {document["_id"]: document for document in documents}
+        self.lookups = []
+
+    async def find_one(self, query):
+        self.lookups.append(query)
+        return self.documents.get(query["_id"])
+
+
+class Request:
+    def __init__(self, token: str):
+        self.headers = {"token": token}
+
+
+def install(monkeypatch, users: Users) -> AuthCache:
+    async def get_database():
+        return {"User": users}
+
+    cache = AuthCache()
+    monkeypatch.setattr(user_authenticate, "get_database", get_database)
+    monkeypatch.setattr(user_authenticate, "auth_cache", cache)
+    return cache
+
+
+def token_for(user_id) -> str:
+    return jwt.encode({"_id": str(user_id), "exp": time.time() + 600}, params["SECRET_KEY"], algorithm="HS256")
+
+
+@user_authenticate.get_authenticate_user
+async def route(request):
+    return "ok"
+
+
+def test_authenticated_users_skip_the_database_until_invalidated(monkeypatch):
+    user_id = ObjectId()
+    users = Users({"_id": user_id, "email": "user@example.com"})
+    cache = install(monkeypatch, users)
+    token = token_for(user_id)
+
+    async def scenario():
+        results = [await route(request=Request(token)) for _ in range(3)]
+        cached_lookups = len(users.lookups)
+        cache.invalidate(user_id)
+        results.append(await route(request=Request(token)))
+        return results, cached_lookups
+
+    results, cached_lookups = asyncio.run(scenario())
+
+    assert results == ["ok"] * 4
+    assert cached_lookups == 1
+    assert len(users.lookups) == 2
+
+
+def test_unknown_users_are_rejected_and_not_cached(monkeypatch):
+    cache = install(monkeypatch, Users())
+    user_id = ObjectId()
+
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(route(request=Request(token_for(user_id))))
+
+    assert raised.value.status_code == 401
+    assert not cache.get(str(user_id))
@@ -0,0 +1,116 @@
+"""
+Tests of the Mongo client lifecycle and index creation.
+
+Run from Backend/classifier with `python -m pytest tests`.
+"""
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+from pymongo.errors import OperationFailure
+
+import Controller.db_init as db_init
+from config import params
+
+
+@pytest.fixture(autouse=True)
+def no_client(monkeypatch):
+    monkeypatch.setattr(db_init, "client", None)
+    monkeypatch.setattr(db_init, "database", None)
+
+
+def test_client_uses_the_configured_pool_and_timeouts(monkeypatch):
+    for name, value in {
+        "MONGO_URI": "mongodb://localhost:27017",
+        "MONGO_MAX_POOL_SIZE": "7",
+        "MONGO_MIN_POOL_SIZE": "2",
+        "MONGO_SERVER_SELECTION_TIMEOUT_MS": "1500",
+        "MONGO_SOCKET_TIMEOUT_MS": "2500",
+    }.items():
+        monkeypatch.setitem(params, name, value)
+
+    client = db_init.create_client()
+    try:
+        options = client.delegate.options
+        assert options.pool_options.max_pool_size == 7
+        assert options.pool_options.min_pool_size == 2
+        assert options.server_selection_timeout == 1.5
+        assert options.pool_options.socket_timeout == 2.5
+    finally:
+        client.close()
+
+
+def test_uri_escapes_the_credentials(monkeypatch):
+    monkeypatch.setitem(params, "MONGO_URI", "")
+    monkeypatch.setitem(params, "username", "user@example.com")
+    monkeypatch.setitem(params, "password", "p:ss/word")
+
+    uri = db_init.mongo_uri()
+
+    assert uri.startswith("mongodb+srv://user%40example.com:p%3Ass%2Fword@")
+
+
+class Collection:
+    def __init__(self, error=None):
+        self.error = error
+        self.indexes = []
+
+    async def create_index(self, keys, **options):
+        if self.error:
+            raise self.error
+        self.indexes.append((keys, options))
+
+
+def test_ensure_indexes_logs_failures_instead_of_raising(monkeypatch, caplog):
+    users, problems = Collection(OperationFailure("E11000 duplicate key")), Collection()
+    database = {"User": users, "Problems": problems}
+    monkeypatch.setattr(db_init, "REQUIRED_INDEXES", [
+        ("User", [("email", 1)], {"unique": True, "name": "email_unique"}),
+        ("Problems", [("created_at", -1)], {"name": "created_at"}),
+    ])
+
+    with caplog.at_level(logging.ERROR, logger=db_init.__name__):
+        asyncio.run(db_init.ensure_indexes(database))
+
+    # The failing index does not stop the others
+    assert problems.indexes == [([("created_at", -1)], {"name": "created_at"})]
+    assert "email_unique" in caplog.text and "E11000" in caplog.text
+
+
+class Client:
+    def __init__(self):
+        self.closed = False
+
+    def __getitem__(self, name):
+        return ("database", name)
+
+    def close(self):
+        self.closed = True
+
+
+def test_database_is_connected_lazily_and_shared(monkeypatch):
+    created = []
+
+    def create_client():
+        created.append(Client())
+        return created[-1]
+
+    async def ensure_indexes(database):
+        pass
+
+    monkeypatch.setattr(db_init, "create_client", create_client)
+    monkeypatch.setattr(db_init, "ensure_indexes", ensure_indexes)
+    app = SimpleNamespace(state=SimpleNamespace())
+
+    assert created == []
+    first = asyncio.run(db_init.get_database())
+    second = asyncio.run(db_init.get_database())
+    asyncio.run(db_init.connect_to_mongo(app))
+
+    assert first == second == ("database", db_init.DATABASE_NAME)
+    # The startup hook reuses the client created on first use
+    assert len(created) == 1 and app.state.mongodb_client is created[0]
+
+    asyncio.run(db_init.close_mongo_connection(app))
+    assert created[0].closed and db_init.client is None
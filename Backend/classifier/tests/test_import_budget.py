@@ -0,0 +1,29 @@
+"""
+Runs benchmarks/import_budget.py, so a regression in the API import time or an
+eager import of the analysis stack fails the test suite, not only the script.
+
+Run from Backend/classifier with `python -m pytest tests`.
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, "benchmarks", "import_budget.py")
+
+
+def run_budget(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, SCRIPT, *args], cwd=ROOT, capture_output=True, text=True)
+
+
+def test_main_import_stays_within_budget():
+    result = run_budget("--module", "main")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "OK" in result.stdout
+
+
+def test_budget_script_flags_the_analysis_stack():
+    # The check itself must catch a module that pulls in pandas and the plotting libraries
+    result = run_budget("--module", "Controller.analysis_problems", "--runs", "1")
+    assert result.returncode == 1, result.stdout + result.stderr
+    assert "pandas" in result.stdout
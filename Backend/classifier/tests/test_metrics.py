@@ -0,0 +1,53 @@
+"""
+Tests of the metrics registry and of the /metrics endpoint.
+
+Run from Backend/classifier with `python -m pytest tests`.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from config import params
+from Controller.metrics import MetricsRegistry
+
+
+def test_every_metric_uses_the_prefix():
+    registry = MetricsRegistry()
+    registry.requests.inc("GET", "/user/catalog/stats", "200")
+    registry.request_duration.observe("GET", "/user/catalog/stats", "200", value=0.01)
+    registry.observe_stage("upstream_fetch_page", 0.2)
+    registry.register_collector("cache", lambda: {"hits": 3, "nested": {"misses": 1}})
+
+    names = {
+        line.split()[2] if line.startswith("#") else line.split("{")[0].split()[0]
+        for line in registry.render().splitlines()
+    }
+
+    assert names and all(name.startswith("problems_analyzer_") for name in names)
+    assert "problems_analyzer_http_requests_total" in names
+    assert "problems_analyzer_cache_nested_misses" in names
+
+
+def test_metrics_endpoint_requires_the_admin_key(monkeypatch):
+    monkeypatch.setitem(params, "ADMIN_KEY", "admin-secret")
+    client = TestClient(main.app)
+
+    assert client.get("/metrics").status_code == 403
+    assert client.get("/metrics", headers={"Admin-Key": "wrong"}).status_code == 403
+    response = client.get("/metrics", headers={"Admin-Key": "admin-secret"})
+    assert response.status_code == 200
+    assert "problems_analyzer_" in response.text
+
+
+@pytest.mark.parametrize("section", ["catalog", "analysis", "auth"])
+def test_stats_routes_require_the_admin_key(monkeypatch, section):
+    monkeypatch.setitem(params, "ADMIN_KEY", "admin-secret")
+    client = TestClient(main.app)
+
+    assert client.get(f"/admin/{section}/stats").status_code == 403
+    assert client.get(f"/admin/{section}/stats", headers={"Admin-Key": "wrong"}).status_code == 403
+    # The API-Key alone no longer exposes them
+    assert client.get(f"/user/{section}/stats", headers={"API-Key": params["API_KEY"]}).status_code != 200
+    response = client.get(f"/admin/{section}/stats", headers={"Admin-Key": "admin-secret"})
+    assert response.status_code == 200
+    assert response.json()["status"] is True
@@ -0,0 +1,103 @@
+"""
+Tests of the password service and of the best-effort rehash on login.
+
+Run from Backend/classifier with `python -m pytest tests`.
+"""
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+import Controller.user_controller as user_controller
+from benchmarks.memory_mongo import MemoryDatabase
+from Controller.hash_password import hash_password
+from Controller.password_service import PasswordService
+from Controller.user_controller import UserController
+
+PASSWORD = "correct horse battery staple"
+
+
+@pytest.fixture
+def service():
+    service = PasswordService()
+    service.start(rounds=4, max_workers=1, max_pending=1)
+    yield service
+    service.close()
+
+
+def test_hash_and_verify_round_trip(service):
+    async def scenario():
+        hashed = await service.hash(PASSWORD)
+        return hashed, await service.verify(PASSWORD, hashed), await service.verify("wrong", hashed)
+
+    hashed, matched, mismatched = asyncio.run(scenario())
+
+    assert (matched, mismatched) == (True, False)
+    assert not service.needs_rehash(hashed)
+    assert service.needs_rehash(hash_password(PASSWORD, 5))
+
+
+def test_full_service_rejects_operations(service):
+    async def scenario():
+        running = asyncio.ensure_future(service.hash(PASSWORD))
+        await asyncio.sleep(0)
+        assert not service.has_capacity()
+        with pytest.raises(HTTPException) as rejected:
+            await service.verify(PASSWORD, "$2b$04$invalid")
+        await running
+        return rejected.value.status_code
+
+    assert asyncio.run(scenario()) == 503
+    assert service.stats()["rejected"] == 1
+    assert service.has_capacity()
+
+
+class FailingUpdates(MemoryDatabase):
+    def __getitem__(self, name):
+        collection = super().__getitem__(name)
+
+        async def update_one(*args, **kwargs):
+            raise RuntimeError("connection reset")
+
+        collection.update_one = update_one
+        return collection
+
+
+def login(monkeypatch, service, database) -> dict:
+    async def get_collection(cls):
+        return database
+
+    monkeypatch.setattr(user_controller, "password_service", service)
+    monkeypatch.setattr(UserController, "get_collection", classmethod(get_collection))
+
+    async def scenario():
+        await database["User"].insert_one({"email": "user@example.com", "password": hash_password(PASSWORD, 5)})
+        response = await UserController.user_login({"email": "user@example.com", "password": PASSWORD})
+        return json.loads(response.body)["detail"], (await database["User"].find_one({}))["password"]
+
+    return scenario()
+
+
+def test_login_upgrades_the_hash_work_factor(monkeypatch, service):
+    detail, stored = asyncio.run(login(monkeypatch, service, MemoryDatabase("test")))
+
+    assert detail["status"] is True
+    assert not service.needs_rehash(stored)
+
+
+def test_login_succeeds_when_the_rehash_cannot_be_saved(monkeypatch, service):
+    detail, stored = asyncio.run(login(monkeypatch, service, FailingUpdates("test")))
+
+    assert detail["status"] is True
+    assert service.needs_rehash(stored)
+
+
+def test_login_skips_the_rehash_when_the_service_is_busy(monkeypatch, service):
+    monkeypatch.setattr(service, "has_capacity", lambda: False)
+
+    detail, stored = asyncio.run(login(monkeypatch, service, MemoryDatabase("test")))
+
+    assert detail["status"] is True
+    assert service.needs_rehash(stored)
+    assert service.stats()["rehashes"] == 0
@@ -0,0 +1,165 @@
+"""
+Tests of the per-worker Kaleido renderer, against a stand-in for the Kaleido scope.
+
+Run from Backend/classifier with `python -m pytest tests`.
+"""
+import threading
+import time
+
+import pytest
+
+import Controller.plot_renderer as plot_renderer_module
+from Controller.plot_renderer import KaleidoScope, PlotRenderer, renderer_health, start_renderer
+
+
+class Process:
+    def __init__(self):
+        self.returncode = None
+
+    def poll(self):
+        return self.returncode
+
+    def kill(self):
+        self.returncode = -9
+
+
+class Scope:
+    """
+    Stands in for plotly's Kaleido scope: `transform` launches the subprocess when it is not running.
+    """
+
+    def __init__(self):
+        self._proc = None
+        self.launches = 0
+        self.failing = False
+        self.release = threading.Event()
+        self.release.set()
+
+    def transform(self, figure, format="png"):
+        if self.failing:
+            raise RuntimeError("no Chromium")
+        running = self._proc
+        while not self.release.wait(0.01):
+            if running is not None and running.poll() is not None:
+                raise BrokenPipeError("Kaleido exited")
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = Process()
+            self.launches += 1
+        return b"png"
+
+    def _shutdown_kaleido(self):
+        self._proc = None
+
+
+class Figure:
+    def to_dict(self):
+        return {"data": [], "layout": {}}
+
+
+@pytest.fixture
+def scope():
+    return Scope()
+
+
+@pytest.fixture
+def renderer(monkeypatch, scope):
+    renderer = PlotRenderer(render_timeout=5, start_timeout=5, kaleido=KaleidoScope(scope))
+    monkeypatch.setattr(plot_renderer_module, "plot_renderer", renderer)
+    monkeypatch.setattr("Controller.analysis_problems.preload_plotting", lambda: None)
+    return renderer
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+def test_worker_start_does_not_wait_for_the_renderer(renderer, scope):
+    scope.release.clear()
+
+    started_at = time.monotonic()
+    start_renderer()
+    wait_for(lambda: renderer.starting)
+    health = renderer_health()
+
+    # Neither the initializer nor a health check waited for Kaleido
+    assert time.monotonic() - started_at < 1
+    assert health["starting"] and not health["started"]
+
+    scope.release.set()
+    wait_for(lambda: renderer.started)
+    assert renderer_health()["healthy"]
+    assert scope.launches == 1
+
+
+def test_renderer_is_started_on_the_first_export(renderer, scope):
+    assert renderer.render_plotly(Figure()) == b"png"
+    assert renderer.started
+    assert scope.launches == 1
+    assert [engine for engine, _ in renderer.drain_latencies()] == ["plotly"]
+
+
+def test_dead_renderer_is_restarted_by_the_health_check(renderer, scope):
+    renderer.ensure_healthy()
+    scope._proc.kill()
+
+    health = renderer_health()
+
+    assert health["healthy"] and health["restarts"] == 1
+    assert scope.launches == 2
+
+
+def test_hung_export_is_killed_and_the_next_one_restarts_kaleido(renderer, scope):
+    renderer.render_timeout = 0.1
+    renderer.ensure_healthy()
+    scope.release.clear()
+
+    with pytest.raises(TimeoutError):
+        renderer.render_plotly(Figure())
+    assert not renderer.healthy()
+
+    scope.release.set()
+    assert renderer.render_plotly(Figure()) == b"png"
+    assert renderer.restarts == 1
+
+
+def test_failed_start_is_reported_and_retried(renderer, scope):
+    scope.failing = True
+    assert renderer_health()["started"] is False
+
+    scope.failing = False
+    assert renderer_health()["healthy"]
+
+
+class HiddenScope:
+    """
+    A Kaleido scope that does not expose its subprocess.
+    """
+
+    def __init__(self):
+        self.failing = False
+
+    def transform(self, figure, format="png"):
+        if self.failing:
+            raise BrokenPipeError("Kaleido exited")
+        return b"png"
+
+
+def test_adapter_falls_back_to_a_new_scope_without_kaleido_internals():
+    hidden = HiddenScope()
+    kaleido = KaleidoScope(hidden)
+
+    assert kaleido.running() and not kaleido.kill()
+    kaleido.shutdown()
+    assert kaleido.scope is not hidden
+
+    renderer = PlotRenderer(kaleido=KaleidoScope(hidden))
+    renderer.started = True
+    hidden.failing = True
+    with pytest.raises(BrokenPipeError):
+        renderer.render_plotly(Figure())
+    # The failed export replaced the scope, so the next one starts over
+    assert renderer.render_plotly(Figure()) == b"png"
+    assert renderer.kaleido.scope is not hidden
@@ -0,0 +1,151 @@
+"""
+Tests of the TTL-refreshed problem catalog cache.
+
+Entries are aged by moving their load time back, so no test sleeps for a TTL.
+Run from Backend/classifier with `python -m pytest tests`.
+"""
+import asyncio
+
+import pytest
+
+from Controller.problem_cache import ProblemCatalogCache
+from Controller.problem_catalog import ProblemCatalog
+from Controller.problem_index import ProblemIndex
+
+
+def make_catalog(size: int, version: int = 0) -> ProblemCatalog:
+    return ProblemCatalog.from_problems(
+        {
+            "title": f"Problem {number} v{version}",
+            "title_slug": f"problem-{number}",
+            "difficulty": "Easy",
+            "tags": ["Array"],
+            "acceptance_rate": 0.5,
+        }
+        for number in range(size)
+    )
+
+
+class Loader:
+    def __init__(self):
+        self.calls = []
+        self.fail = False
+
+    async def __call__(self, limit: int) -> ProblemCatalog:
+        self.calls.append(limit)
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return make_catalog(limit, version=len(self.calls))
+
+
+def age(cache: ProblemCatalogCache, seconds: float) -> None:
+    cache._loaded_at -= seconds
+
+
+@pytest.fixture
+def loader():
+    return Loader()
+
+
+@pytest.fixture
+def cache(loader):
+    return ProblemCatalogCache(loader, ttl=100, refresh_ahead=0.8, max_stale=50)
+
+
+def test_fresh_entries_are_served_from_memory(cache, loader):
+    async def scenario():
+        first = await cache.get(10)
+        second = await cache.get(5)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert loader.calls == [10]
+    assert second == first[:5]
+    assert cache.stats()["hits"] == 1
+
+
+def test_larger_limit_than_cached_loads_again(cache, loader):
+    async def scenario():
+        await cache.get(10)
+        return await cache.get(20)
+
+    assert len(asyncio.run(scenario())) == 20
+    assert loader.calls == [10, 20]
+
+
+def test_stale_entry_is_served_while_it_revalidates(cache, loader):
+    async def scenario():
+        await cache.get(10)
+        age(cache, 120)
+        stale = await cache.get(10)
+        await cache._refresh_task
+        return stale, await cache.get(10)
+
+    stale, refreshed = asyncio.run(scenario())
+
+    assert stale[0]["title"] == "Problem 0 v1"
+    assert refreshed[0]["title"] == "Problem 0 v2"
+    stats = cache.stats()
+    assert (stats["stale_hits"], stats["refreshes"]) == (1, 1)
+
+
+def test_refresh_ahead_starts_before_the_ttl(cache, loader):
+    async def scenario():
+        await cache.get(10)
+        age(cache, 85)
+        served = await cache.get(10)
+        await cache._refresh_task
+        return served
+
+    assert asyncio.run(scenario())[0]["title"] == "Problem 0 v1"
+    assert cache.stats()["hits"] == 1
+    assert loader.calls == [10, 10]
+
+
+def test_failed_refresh_keeps_the_previous_catalog(cache, loader):
+    async def scenario():
+        await cache.get(10)
+        age(cache, 120)
+        loader.fail = True
+        await cache.get(10)
+        await cache._refresh_task
+        return await cache.get(10)
+
+    assert asyncio.run(scenario())[0]["title"] == "Problem 0 v1"
+    assert cache.stats()["refresh_errors"] == 1
+
+
+def test_entry_past_max_stale_is_reloaded_before_serving(cache, loader):
+    async def scenario():
+        await cache.get(10)
+        age(cache, 151)
+        return await cache.get(10)
+
+    assert asyncio.run(scenario())[0]["title"] == "Problem 0 v2"
+    assert cache.stats()["misses"] == 2
+
+
+def test_concurrent_misses_load_once(cache, loader):
+    async def scenario():
+        return await asyncio.gather(*[cache.get(10) for _ in range(5)])
+
+    results = asyncio.run(scenario())
+
+    assert loader.calls == [10]
+    assert all(len(result) == 10 for result in results)
+
+
+def test_index_is_built_once_per_snapshot(cache, loader):
+    async def scenario():
+        first = await cache.get_index(10)
+        second = await cache.get_index(10)
+        cache.invalidate()
+        return first, second, await cache.get_index(10)
+
+    first, second, rebuilt = asyncio.run(scenario())
+
+    assert isinstance(first, ProblemIndex)
+    assert first is second
+    assert rebuilt is not first
@@ -0,0 +1,84 @@
+"""
+Tests that the catalog index selects the same problems as the list filter it replaced.
+
+Run from Backend/classifier with `python -m pytest tests`.
+"""
+import random
+
+import pytest
+
+from Controller.problem_catalog import ProblemCatalog
+from Controller.problem_index import ProblemIndex
+
+# ProblemController.SKILL_TO_DIFFICULTY; importing the controller would connect to MongoDB
+SKILL_TO_DIFFICULTY = {
+    "beginner": {"difficulty": ["Easy"], "acceptance_rate_threshold": 0.7},
+    "intermediate": {"difficulty": ["Easy", "Medium"], "acceptance_rate_threshold": 0.5},
+    "advanced": {"difficulty": ["Hard", "Medium", "Easy"], "acceptance_rate_threshold": 0.4},
+}
+TAGS = ["Array", "String", "Math", "Tree", "Greedy", "Sorting", "Hash Table", "Dynamic Programming"]
+
+
+@pytest.fixture(scope="module")
+def problems():
+    generator = random.Random(3)
+    return [
+        {
+            "title": f"Problem {number}",
+            "title_slug": f"problem-{number}",
+            "difficulty": generator.choice(["Easy", "Medium", "Hard"]),
+            "tags": generator.sample(TAGS, generator.randint(0, 3)),
+            # Two decimals, like fetch_problem_page rounds the upstream acRate
+            "acceptance_rate": round(generator.uniform(0.2, 0.9), 2),
+            "details_url": "",
+        }
+        for number in range(2500)
+    ]
+
+
+@pytest.fixture(scope="module")
+def index(problems):
+    return ProblemIndex(ProblemCatalog.from_problems(problems))
+
+
+def list_filter(problems, difficulties, threshold, tags):
+    """
+    The filter recommend_problems used before the index, over the first 1000 problems.
+    """
+    return [
+        problem["title_slug"]
+        for problem in problems[:1000]
+        if (
+            problem["difficulty"] in difficulties
+            and (not tags or any(tag in problem["tags"] for tag in tags))
+            and problem["acceptance_rate"] <= threshold
+        )
+    ][:70]
+
+
+@pytest.mark.parametrize("skill", sorted(SKILL_TO_DIFFICULTY))
+@pytest.mark.parametrize("tags", [None, [], ["Array"], ["Math", "Tree"], ["No Such Tag"]])
+def test_selection_matches_the_list_filter(problems, index, skill, tags):
+    rule = SKILL_TO_DIFFICULTY[skill]
+
+    # The query recommend_problems sends
+    problem_ids = index.query(rule["difficulty"], rule["acceptance_rate_threshold"], tags=tags, scope=1000, limit=70)
+
+    expected = list_filter(problems, rule["difficulty"], rule["acceptance_rate_threshold"], tags)
+    assert [problem["title_slug"] for problem in index.get(problem_ids)] == expected
+
+
+def test_threshold_is_inclusive(problems, index):
+    at_threshold = [problem_id for problem_id, problem in enumerate(problems) if problem["acceptance_rate"] == 0.5]
+
+    matched = index.query(["Easy", "Medium", "Hard"], 0.5)
+
+    assert at_threshold and set(at_threshold) <= set(matched)
+
+
+def test_scope_and_limit(problems, index):
+    everything = index.query(["Easy", "Medium", "Hard"], 1.0)
+
+    assert everything == list(range(len(problems)))
+    assert index.query(["Easy", "Medium", "Hard"], 1.0, scope=10, limit=5) == list(range(5))
+    assert index.query(["Easy", "Medium", "Hard"], 1.0, scope=3) == [0, 1, 2]
@@ -0,0 +1,142 @@
+"""
+Tests of the paginated catalog ingester against an in-memory upstream.
+
+Run from Backend/classifier with `python -m pytest tests`.
+"""
+import asyncio
+
+from Controller.problem_catalog import ProblemCatalog
+from Controller.problem_ingester import ProblemCatalogIngester
+
+
+def make_problem(number: int, acceptance_rate: float = 0.5, tags=("Array",)) -> dict:
+    return {
+        "title": f"Problem {number}",
+        "title_slug": f"problem-{number}",
+        "difficulty": "Easy",
+        "tags": list(tags),
+        "acceptance_rate": acceptance_rate,
+        "details_url": "",
+    }
+
+
+class Upstream:
+    def __init__(self, size: int):
+        self.problems = [make_problem(number) for number in range(size)]
+        self.requests = []
+
+    async def fetch_page(self, skip: int, limit: int):
+        self.requests.append((skip, limit))
+        return [dict(problem) for problem in self.problems[skip:skip + limit]], len(self.problems)
+
+
+def test_full_sync_fetches_every_page():
+    upstream = Upstream(950)
+    ingester = ProblemCatalogIngester(upstream.fetch_page, page_size=100, max_concurrency=4)
+
+    catalog = asyncio.run(ingester.sync())
+
+    assert catalog.slugs == [problem["title_slug"] for problem in upstream.problems]
+    assert ingester.stats()["last_sync"]["mode"] == "full"
+
+
+def test_incremental_sync_appends_new_problems_and_picks_up_changes():
+    upstream = Upstream(950)
+    ingester = ProblemCatalogIngester(upstream.fetch_page, page_size=100, refresh_pages=2)
+
+    async def scenario():
+        await ingester.sync()
+        upstream.problems[3]["acceptance_rate"] = 0.25
+        upstream.problems.extend(make_problem(number) for number in range(950, 1030))
+        upstream.requests.clear()
+        return await ingester.sync()
+
+    catalog = asyncio.run(scenario())
+
+    assert sorted(upstream.requests) == [(0, 100), (100, 100), (950, 100)]
+    assert len(catalog) == 1030
+    assert catalog.problem(3)["acceptance_rate"] == 0.25
+    last_sync = ingester.stats()["last_sync"]
+    assert (last_sync["mode"], last_sync["added"], last_sync["changed"]) == ("incremental", 80, 1)
+
+
+def test_refresh_window_rotates_through_the_catalog():
+    upstream = Upstream(300)
+    ingester = ProblemCatalogIngester(upstream.fetch_page, page_size=100, refresh_pages=2)
+
+    async def scenario():
+        await ingester.sync()
+        upstream.problems[250]["tags"] = ["Array", "Math"]
+        upstream.requests.clear()
+        await ingester.sync()
+        first = list(upstream.requests)
+        upstream.requests.clear()
+        catalog = await ingester.sync()
+        return first, list(upstream.requests), catalog
+
+    first, second, catalog = asyncio.run(scenario())
+
+    assert (0, 100) in first and (200, 100) not in first
+    assert (200, 100) in second
+    assert catalog.tags_of(250) == ["Array", "Math"]
+
+
+def test_replace_keeps_the_other_problems_and_the_vocabulary():
+    problems = [make_problem(number, tags=("Array", "String")[: number % 2 + 1]) for number in range(5)]
+    catalog = ProblemCatalog.from_problems(problems)
+
+    replaced = catalog.replace({1: make_problem(1, 0.9, tags=("Math",)), 3: make_problem(3, 0.1, tags=())})
+
+    expected = list(problems)
+    expected[1] = make_problem(1, 0.9, tags=("Math",))
+    expected[3] = make_problem(3, 0.1, tags=())
+    assert replaced.to_records() == expected
+    assert catalog.to_records() == problems
+    assert replaced.tag_names[:2] == catalog.tag_names
+
+
+def test_no_page_is_requested_past_max_problems():
+    upstream = Upstream(950)
+    ingester = ProblemCatalogIngester(upstream.fetch_page, page_size=100, refresh_pages=0)
+
+    async def scenario():
+        await ingester.sync(max_problems=250)
+        first = list(upstream.requests)
+        upstream.requests.clear()
+        # The catalog already holds max_problems, so an incremental sync has nothing to fetch
+        catalog = await ingester.sync(max_problems=250)
+        return first, list(upstream.requests), catalog
+
+    first, second, catalog = asyncio.run(scenario())
+
+    assert sorted(first) == [(0, 100), (100, 100), (200, 50)]
+    assert second == []
+    assert len(catalog) == 250
+    assert ingester.stats()["last_sync"]["pages"] == 0
+
+
+def test_failing_range_cancels_the_other_one():
+    upstream = Upstream(950)
+    ingester = ProblemCatalogIngester(upstream.fetch_page, page_size=100, max_concurrency=4, refresh_pages=2)
+    cancelled = []
+
+    async def fetch_page(skip, limit):
+        if skip >= 950:
+            raise RuntimeError("upstream down")
+        try:
+            # Refresh window pages hang until they are cancelled
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(skip)
+            raise
+
+    async def scenario():
+        await ingester.sync()
+        ingester.fetch_page = fetch_page
+        try:
+            await ingester.sync()
+        except RuntimeError as e:
+            # The other range was stopped before the error reached the caller
+            return str(e), sorted(cancelled)
+
+    assert asyncio.run(scenario()) == ("upstream down", [0, 100])
@@ -0,0 +1,137 @@
+"""
+Tests of recommendation sets stored as slug references to the problem catalog collection.
+
+Run from Backend/classifier with `python -m pytest tests`.
+"""
+import asyncio
+import copy
+from types import SimpleNamespace
+
+from bson import ObjectId
+
+from Controller.problem_store import CATALOG_COLLECTION, SETS_COLLECTION, ProblemStore
+
+
+class Collection:
+    """
+    Minimal stand-in for the motor collection calls ProblemStore makes.
+    """
+
+    def __init__(self):
+        self.documents = {}
+
+    async def bulk_write(self, requests, ordered=True):
+        for request in requests:
+            document = copy.deepcopy(request._doc)
+            self.documents[request._filter["_id"]] = document
+
+    async def insert_one(self, document):
+        document = {"_id": ObjectId(), **copy.deepcopy(document)}
+        self.documents[document["_id"]] = document
+        return SimpleNamespace(inserted_id=document["_id"])
+
+    async def insert_many(self, documents, ordered=True):
+        return SimpleNamespace(inserted_ids=[(await self.insert_one(document)).inserted_id for document in documents])
+
+    async def find_one(self, query):
+        return copy.deepcopy(self.documents.get(query["_id"]))
+
+    async def find(self, query):
+        for key in query["_id"]["$in"]:
+            if key in self.documents:
+                yield copy.deepcopy(self.documents[key])
+
+    async def count_documents(self, query):
+        return len(self.documents)
+
+
+class Database(dict):
+    def __missing__(self, name):
+        collection = self[name] = Collection()
+        return collection
+
+
+def make_problem(number: int, acceptance_rate: float = 0.5) -> dict:
+    return {
+        "title": f"Problem {number}",
+        "title_slug": f"problem-{number}",
+        "difficulty": "Medium",
+        "tags": ["Array", "Math"],
+        "acceptance_rate": acceptance_rate,
+        "details_url": "",
+    }
+
+
+async def load_set(store: ProblemStore, database: Database, set_id) -> dict:
+    document = await database[SETS_COLLECTION].find_one({"_id": set_id})
+    return await store.resolve(database, document)
+
+
+def test_saved_set_round_trips_in_order():
+    store, database = ProblemStore(), Database()
+    problems = [make_problem(number) for number in (3, 1, 2)]
+
+    async def scenario():
+        set_id = await store.save_set(database, problems)
+        raw = await database[SETS_COLLECTION].find_one({"_id": set_id})
+        return raw, await load_set(store, database, set_id)
+
+    raw, resolved = asyncio.run(scenario())
+
+    assert raw["problem_slugs"] == ["problem-3", "problem-1", "problem-2"]
+    assert "problems" not in raw
+    assert resolved["problems"] == problems
+
+
+def test_problems_are_written_once_until_they_change():
+    store, database = ProblemStore(), Database()
+
+    async def scenario():
+        first = await store.save_set(database, [make_problem(1), make_problem(2)])
+        await store.save_set(database, [make_problem(2), make_problem(3)])
+        await store.save_set(database, [make_problem(1, acceptance_rate=0.4)])
+        return await load_set(store, database, first)
+
+    first = asyncio.run(scenario())
+
+    assert store.stats() == {"known_problems": 3, "problems_written": 4, "sets_written": 3}
+    assert asyncio.run(database[CATALOG_COLLECTION].count_documents({})) == 3
+    # Sets resolve to the current version of their problems
+    assert first["problems"][0]["acceptance_rate"] == 0.4
+
+
+def test_batch_save_returns_ids_in_order():
+    store, database = ProblemStore(), Database()
+    problem_sets = [[make_problem(1)], [], [make_problem(2), make_problem(1)]]
+
+    async def scenario():
+        set_ids = await store.save_sets(database, problem_sets)
+        return [await load_set(store, database, set_id) for set_id in set_ids]
+
+    resolved = asyncio.run(scenario())
+
+    assert [document["problems"] for document in resolved] == problem_sets
+    assert store.stats()["problems_written"] == 2
+
+
+def test_legacy_sets_with_full_copies_are_read_as_they_are():
+    store, database = ProblemStore(), Database()
+    legacy = {"problems": [make_problem(1)]}
+
+    async def scenario():
+        result = await database[SETS_COLLECTION].insert_one(legacy)
+        return await load_set(store, database, result.inserted_id)
+
+    assert asyncio.run(scenario())["problems"] == [make_problem(1)]
+    assert asyncio.run(store.resolve(database, None)) is None
+
+
+def test_references_missing_from_the_catalog_are_skipped():
+    store, database = ProblemStore(), Database()
+
+    async def scenario():
+        result = await database[SETS_COLLECTION].insert_one({"problem_slugs": ["problem-9", "problem-1"]})
+        await store.store_problems(database, [make_problem(1)])
+        return await load_set(store, database, result.inserted_id)
+
+    assert asyncio.run(scenario())["problems"] == [make_problem(1)]
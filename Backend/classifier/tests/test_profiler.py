@@ -0,0 +1,108 @@
+"""
+Tests of on-demand request profiling and of the /admin/profiles routes.
+
+Run from Backend/classifier with `python -m pytest tests`.
+"""
+import asyncio
+import pstats
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from config import params
+from Controller.profiler import ProfileStore, ProfilingMiddleware, profile_store
+
+ADMIN_KEY = "admin-secret"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setitem(params, "ADMIN_KEY", ADMIN_KEY)
+    return TestClient(main.app)
+
+
+def get_chart_keys(client: TestClient, **headers):
+    return client.get("/user/analysis/charts", headers={"API-Key": params["API_KEY"], **headers})
+
+
+def test_profile_header_without_the_admin_key_is_ignored(client):
+    captured = profile_store.captured
+
+    for headers in ({"X-Profile": "1"}, {"X-Profile": "1", "Admin-Key": "wrong"}):
+        response = get_chart_keys(client, **headers)
+        assert response.status_code == 200
+        assert "x-profile-id" not in response.headers
+
+    assert profile_store.captured == captured
+
+
+def test_profiled_request_stores_a_loadable_profile(client, tmp_path):
+    response = get_chart_keys(client, **{"X-Profile": "1", "Admin-Key": ADMIN_KEY})
+    profile_id = response.headers["x-profile-id"]
+    admin = {"Admin-Key": ADMIN_KEY}
+
+    listed = client.get("/admin/profiles", headers=admin).json()["profiles"]
+    record = next(record for record in listed if record["id"] == profile_id)
+    assert (record["trigger"], record["path"], record["status"]) == ("header", "/user/analysis/charts", 200)
+
+    download = client.get(f"/admin/profiles/{profile_id}/download", headers=admin)
+    assert download.headers["content-disposition"] == f"attachment; filename=profile_{profile_id}.prof"
+    path = tmp_path / "profile.prof"
+    path.write_bytes(download.content)
+    assert pstats.Stats(str(path)).total_calls > 0
+
+    report = client.get(f"/admin/profiles/{profile_id}", params={"sort": "tottime", "limit": 5}, headers=admin)
+    assert report.status_code == 200
+    assert "function calls" in report.text
+    assert client.get("/admin/profiles/missing", headers=admin).status_code == 404
+
+
+@pytest.mark.parametrize("path", ["/admin/profiles", "/admin/profiles/some-id", "/admin/profiles/some-id/download"])
+def test_profile_routes_require_the_admin_key(client, path):
+    assert client.get(path).status_code == 403
+    assert client.get(path, headers={"Admin-Key": "wrong"}).status_code == 403
+
+
+def test_only_one_request_is_profiled_at_a_time(monkeypatch):
+    monkeypatch.setitem(params, "ADMIN_KEY", ADMIN_KEY)
+    store = ProfileStore()
+    release = asyncio.Event()
+    entered = []
+
+    async def app(scope, receive, send):
+        entered.append(scope["path"])
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    middleware = ProfilingMiddleware(app, store=store, sample_rate=0)
+    scope = {
+        "type": "http", "method": "GET",
+        "headers": [(b"x-profile", b"1"), (b"admin-key", ADMIN_KEY.encode())],
+    }
+
+    async def request(path):
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        await middleware({**scope, "path": path}, None, send)
+        return dict(messages[0]["headers"])
+
+    async def scenario():
+        first = asyncio.ensure_future(request("/first"))
+        while not entered:
+            await asyncio.sleep(0)
+        second = asyncio.ensure_future(request("/second"))
+        while len(entered) < 2:
+            await asyncio.sleep(0)
+        release.set()
+        return await first, await second
+
+    first, second = asyncio.run(scenario())
+
+    assert b"x-profile-id" in first and b"x-profile-id" not in second
+    assert store.stats()["captured"] == 1 and store.stats()["skipped_busy"] == 1
+    assert [record["path"] for record in store.list()] == ["/first"]
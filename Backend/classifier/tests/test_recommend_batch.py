@@ -0,0 +1,59 @@
+"""
+Tests of the batch recommendation path against an in-memory catalog and database.
+
+Run from Backend/classifier with `python -m pytest tests`.
+"""
+import asyncio
+
+import pytest
+
+from benchmarks.memory_mongo import MemoryDatabase
+from benchmarks.synthetic_catalog import synthetic_problems
+from Controller.problem_catalog import ProblemCatalog
+from Controller.problem_controller import ProblemController
+from Controller.problem_index import ProblemIndex
+from Controller.problem_store import SETS_COLLECTION
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = MemoryDatabase("test")
+    index = ProblemIndex(ProblemCatalog.from_problems(synthetic_problems(1200, seed=7)))
+
+    async def fetch_problem_index(limit: int = 300):
+        return index
+
+    async def get_collection(cls):
+        return database
+
+    monkeypatch.setattr(ProblemController, "fetch_problem_index", staticmethod(fetch_problem_index))
+    monkeypatch.setattr(ProblemController, "get_collection", classmethod(get_collection))
+    return database
+
+
+def test_batch_reports_invalid_queries_per_result(database):
+    queries = [
+        {"skill": "beginner", "tags": ["Array"]},
+        {"skill": "beginner", "tags": 5},
+        {"skill": "wizard"},
+        {"skill": "beginner", "tags": ["Array"]},
+    ]
+
+    results = asyncio.run(ProblemController.recommend_problems_batch(queries))
+
+    assert [result["status"] for result in results] == ["True", False, False, "True"]
+    assert results[1]["detail"] == "tags must be a list of strings"
+    assert results[2]["detail"] == "Unknown skill: wizard"
+    # Identical queries share one saved set
+    assert results[0]["id"] == results[3]["id"]
+    assert asyncio.run(database[SETS_COLLECTION].count_documents({})) == 1
+
+
+def test_batch_matches_single_recommendations(database):
+    queries = [{"skill": "intermediate", "tags": ["Math", "Array"]}, {"skill": "advanced"}]
+
+    results = asyncio.run(ProblemController.recommend_problems_batch(queries))
+
+    for query, result in zip(queries, results):
+        single = asyncio.run(ProblemController.recommend_problems(query["skill"], query.get("tags")))
+        assert result["problems"] == single[0]["problems"]
@@ -0,0 +1,133 @@
+"""
+Tests of the streamed report ZIP file and of the /user/analysis/{id}/download route.
+
+Run from Backend/classifier with `python -m pytest tests`.
+"""
+import asyncio
+import base64
+import io
+import time
+import zipfile
+
+import jwt
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from starlette.concurrency import iterate_in_threadpool
+
+import main
+import Controller.problem_controller as problem_controller
+import Controller.user_authenticate as user_authenticate
+from config import params
+from Controller.analysis_cache import AnalysisCache
+from Controller.analysis_problems import LeetCodeProblemAnalyzerEnhanced
+from Controller.auth_cache import AuthCache
+from Controller.problem_controller import ProblemController
+from Controller.report_zip import iter_chunks, iter_zip
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 8
+# Charts come back as PNG bytes or base64 strings; None marks a chart that failed
+RESULTS = {
+    "tag_frequency": PNG,
+    "difficulty_distribution": base64.b64encode(PNG[::-1]).decode(),
+    "tag_correlation": None,
+}
+
+
+def read_zip(data: bytes) -> zipfile.ZipFile:
+    zip_file = zipfile.ZipFile(io.BytesIO(data))
+    # testzip reads every entry and checks its CRC
+    assert zip_file.testzip() is None
+    return zip_file
+
+
+def test_iter_zip_writes_a_valid_archive_entry_by_entry():
+    entries = [("a.png", PNG, False), ("notes.txt", b"text " * 100, True)]
+
+    chunks = list(iter_zip(entries))
+    zip_file = read_zip(b"".join(chunks))
+
+    assert len(chunks) > len(entries)
+    assert [info.filename for info in zip_file.infolist()] == ["a.png", "notes.txt"]
+    assert [info.compress_type for info in zip_file.infolist()] == [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED]
+    assert [info.file_size for info in zip_file.infolist()] == [len(PNG), 500]
+    assert zip_file.read("a.png") == PNG
+
+
+def test_report_stores_images_and_deflates_the_summary():
+    zip_file = read_zip(LeetCodeProblemAnalyzerEnhanced.generate_zip(RESULTS))
+    infos = {info.filename: info for info in zip_file.infolist()}
+
+    # Failed charts have no entry
+    assert list(infos) == ["tag_frequency.png", "difficulty_distribution.png", "analysis_summary.txt"]
+    assert zip_file.read("tag_frequency.png") == PNG
+    assert zip_file.read("difficulty_distribution.png") == PNG[::-1]
+    assert infos["tag_frequency.png"].compress_type == zipfile.ZIP_STORED
+    assert infos["tag_frequency.png"].compress_size == infos["tag_frequency.png"].file_size
+    assert infos["analysis_summary.txt"].compress_type == zipfile.ZIP_DEFLATED
+    streamed = b"".join(LeetCodeProblemAnalyzerEnhanced.iter_zip(RESULTS))
+    assert streamed == LeetCodeProblemAnalyzerEnhanced.generate_zip(RESULTS)
+
+
+def test_iter_chunks_splits_without_losing_bytes():
+    async def scenario():
+        return [chunk async for chunk in iter_chunks(b"abcdefg", chunk_size=3)]
+
+    assert asyncio.run(scenario()) == [b"abc", b"def", b"g"]
+
+
+@pytest.fixture
+def report(monkeypatch, tmp_path):
+    renders = []
+
+    async def get_problem_set(id):
+        return [{"title": "Two Sum", "title_slug": "two-sum", "difficulty": "Easy", "tags": ["Array"], "acceptance_rate": 0.5}]
+
+    async def stream_report(problems, request=None):
+        renders.append(problems)
+        return iterate_in_threadpool(LeetCodeProblemAnalyzerEnhanced.iter_zip(RESULTS)), {}
+
+    user_id = str(ObjectId())
+    auth_cache = AuthCache()
+    auth_cache.put(user_id)
+    monkeypatch.setattr(user_authenticate, "auth_cache", auth_cache)
+    monkeypatch.setattr(ProblemController, "get_problem_set", staticmethod(get_problem_set))
+    monkeypatch.setattr(problem_controller.analysis_pool, "stream_report", stream_report)
+    monkeypatch.setattr(problem_controller, "analysis_cache", AnalysisCache(directory=str(tmp_path)))
+
+    token = jwt.encode({"_id": user_id, "exp": time.time() + 600}, params["SECRET_KEY"], algorithm="HS256")
+    headers = {"API-Key": params["API_KEY"], "token": token}
+    return TestClient(main.app), headers, renders
+
+
+def test_download_streams_a_zip_and_serves_the_next_one_from_the_cache(report):
+    client, headers, renders = report
+
+    first = client.get("/user/analysis/set-1/download", headers=headers)
+    second = client.get("/user/analysis/set-1/download", headers=headers)
+
+    for response in (first, second):
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/zip"
+        assert response.headers["content-disposition"] == 'attachment; filename="analysis-set-1.zip"'
+        assert read_zip(response.content).read("tag_frequency.png") == PNG
+    assert second.content == first.content
+    # The size is only known up front once the report is cached
+    assert "content-length" not in first.headers
+    assert second.headers["content-length"] == str(len(second.content))
+    assert len(renders) == 1
+
+
+def test_download_cut_short_is_not_cached(report):
+    _, _, renders = report
+
+    async def scenario():
+        stream = await ProblemController.analysis_report_stream("set-1")
+        chunks = stream["chunks"]
+        await chunks.__anext__()
+        await chunks.aclose()
+        again = await ProblemController.analysis_report_stream("set-1")
+        return b"".join([chunk async for chunk in again["chunks"]])
+
+    read_zip(asyncio.run(scenario()))
+    assert len(renders) == 2
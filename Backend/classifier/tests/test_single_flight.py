@@ -0,0 +1,123 @@
+"""
+Tests of single-flight coalescing, alone and behind the catalog cache.
+
+Run from Backend/classifier with `python -m pytest tests`.
+"""
+import asyncio
+
+import pytest
+
+from Controller.problem_cache import ProblemCatalogCache
+from Controller.problem_catalog import ProblemCatalog
+from Controller.single_flight import SingleFlight
+
+
+class Call:
+    def __init__(self, result="catalog"):
+        self.result = result
+        self.started = 0
+        self.release = None
+
+    async def __call__(self):
+        self.started += 1
+        await self.release.wait()
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+async def run_concurrently(flight: SingleFlight, call: Call, callers: int, key="catalog"):
+    call.release = asyncio.Event()
+    waiters = [asyncio.ensure_future(flight.do(key, call)) for _ in range(callers)]
+    await asyncio.sleep(0)
+    call.release.set()
+    return await asyncio.gather(*waiters, return_exceptions=True)
+
+
+def test_concurrent_calls_share_one_flight():
+    flight, call = SingleFlight(), Call()
+
+    results = asyncio.run(run_concurrently(flight, call, 5))
+
+    assert results == ["catalog"] * 5
+    assert call.started == 1
+    stats = flight.stats()
+    assert (stats["flights"], stats["coalesced_waiters"], stats["max_waiters"]) == (1, 4, 4)
+    assert not flight.in_flight("catalog")
+
+
+def test_every_waiter_gets_the_error():
+    flight, call = SingleFlight(), Call(RuntimeError("upstream down"))
+
+    results = asyncio.run(run_concurrently(flight, call, 3))
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert call.started == 1
+    assert flight.stats()["failed_flights"] == 1
+
+
+def test_calls_after_landing_start_a_new_flight():
+    flight, call = SingleFlight(), Call()
+
+    async def scenario():
+        await run_concurrently(flight, call, 2)
+        await run_concurrently(flight, call, 2)
+
+    asyncio.run(scenario())
+
+    assert call.started == 2
+
+
+def test_different_keys_do_not_coalesce():
+    flight, first, second = SingleFlight(), Call("first"), Call("second")
+
+    async def scenario():
+        first.release = second.release = asyncio.Event()
+        waiters = [asyncio.ensure_future(flight.do("a", first)), asyncio.ensure_future(flight.do("b", second))]
+        await asyncio.sleep(0)
+        first.release.set()
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(scenario()) == ["first", "second"]
+
+
+def test_cancelled_waiter_does_not_cancel_the_flight():
+    flight, call = SingleFlight(), Call()
+
+    async def scenario():
+        call.release = asyncio.Event()
+        cancelled = asyncio.ensure_future(flight.do("catalog", call))
+        waiting = asyncio.ensure_future(flight.do("catalog", call))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        call.release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        return await waiting
+
+    assert asyncio.run(scenario()) == "catalog"
+    assert call.started == 1
+
+
+def test_concurrent_cache_misses_load_the_catalog_once():
+    loads = []
+
+    async def loader(limit: int) -> ProblemCatalog:
+        loads.append(limit)
+        await asyncio.sleep(0.01)
+        return ProblemCatalog.from_problems(
+            {"title": str(number), "difficulty": "Easy", "tags": [], "acceptance_rate": 0.5}
+            for number in range(limit)
+        )
+
+    cache = ProblemCatalogCache(loader)
+
+    async def scenario():
+        return await asyncio.gather(*[cache.get(10) for _ in range(20)])
+
+    results = asyncio.run(scenario())
+
+    assert loads == [10]
+    assert all(len(result) == 10 for result in results)
+    assert cache.stats()["upstream_loads"]["coalesced_waiters"] == 19
@@ -0,0 +1,126 @@
+"""
+Tests of the tag co-occurrence counts and of the /user/catalog/tag-pairs route.
+
+Run from Backend/classifier with `python -m pytest tests`.
+"""
+import math
+import random
+from itertools import product
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import Controller.problem_controller as problem_controller
+from config import params
+from Controller.problem_catalog import ProblemCatalog
+from Controller.tag_cooccurrence import TagCooccurrence
+
+TAGS = ["Array", "Math", "String", "Graph", "Tree", "Greedy", "Sorting"]
+
+
+def make_problem(number: int, tags: list) -> dict:
+    return {"title": f"Problem {number}", "difficulty": "Medium", "acceptance_rate": 0.5, "tags": tags}
+
+
+def make_cooccurrence(tag_lists) -> TagCooccurrence:
+    return TagCooccurrence(ProblemCatalog.from_problems(
+        make_problem(number, tags) for number, tags in enumerate(tag_lists)
+    ))
+
+
+# A, B and C appear 3, 3 and 2 times; AB twice, AC once, BC twice; one untagged problem.
+SMALL = [["A", "B"], ["A", "B", "C"], ["A"], [], ["C", "B"]]
+
+
+def test_counts_match_a_brute_force_pair_count():
+    rng = random.Random(11)
+    tag_lists = [rng.sample(TAGS, rng.randint(0, 4)) for _ in range(300)]
+    cooccurrence = make_cooccurrence(tag_lists)
+
+    names = cooccurrence.tag_names
+    for i, j in product(range(len(names)), repeat=2):
+        expected = sum(names[i] in tags and names[j] in tags for tags in tag_lists)
+        assert cooccurrence.counts[i, j] == expected, (names[i], names[j])
+
+
+def test_diagonal_holds_tag_frequencies():
+    cooccurrence = make_cooccurrence(SMALL)
+    frequencies = dict(zip(cooccurrence.tag_names, cooccurrence.frequencies.tolist()))
+
+    assert frequencies == {"A": 3, "B": 3, "C": 2}
+    assert (cooccurrence.counts == cooccurrence.counts.T).all()
+    # Self pairs never show up as pairs
+    assert all(first != second for first, second, _ in cooccurrence.top_pairs(k=10))
+
+
+def test_jaccard_and_pmi_on_known_values():
+    cooccurrence = make_cooccurrence(SMALL)
+    a, b, c = (cooccurrence.tag_names.index(tag) for tag in "ABC")
+    jaccard, pmi = cooccurrence.jaccard(), cooccurrence.pmi()
+
+    assert jaccard[a, b] == pytest.approx(2 / 4)
+    assert jaccard[a, c] == pytest.approx(1 / 4)
+    assert jaccard[b, c] == pytest.approx(2 / 3)
+    assert jaccard[a, a] == pytest.approx(1.0)
+    assert pmi[a, b] == pytest.approx(math.log(2 * 5 / (3 * 3)))
+    assert pmi[a, c] == pytest.approx(math.log(1 * 5 / (3 * 2)))
+    assert pmi[b, c] == pytest.approx(math.log(2 * 5 / (3 * 2)))
+
+
+def test_top_pairs_are_ordered_and_limited():
+    cooccurrence = make_cooccurrence(SMALL)
+
+    assert cooccurrence.top_pairs(k=10) == [("A", "B", 2.0), ("B", "C", 2.0), ("A", "C", 1.0)]
+    assert cooccurrence.top_pairs(k=1, normalize="jaccard") == [("B", "C", pytest.approx(2 / 3))]
+    assert [pair[:2] for pair in cooccurrence.top_pairs(k=2, normalize="pmi")] == [("B", "C"), ("A", "B")]
+
+
+@pytest.mark.parametrize("tag_lists", [[], [[], []], [["A"], ["B"], [], ["A"]]])
+def test_catalogs_without_pairs(tag_lists):
+    cooccurrence = make_cooccurrence(tag_lists)
+
+    assert cooccurrence.counts.shape == (len(cooccurrence.tag_names),) * 2
+    assert cooccurrence.counts.sum() == sum(len(tags) for tags in tag_lists)
+    for normalize in (None, "jaccard", "pmi"):
+        assert cooccurrence.top_pairs(k=5, normalize=normalize) == []
+
+
+@pytest.fixture
+def client(monkeypatch):
+    cooccurrence = make_cooccurrence(SMALL)
+
+    async def get_tag_cooccurrence(limit):
+        return cooccurrence
+
+    monkeypatch.setattr(problem_controller.problem_catalog_cache, "get_tag_cooccurrence", get_tag_cooccurrence)
+    return TestClient(main.app)
+
+
+def get_pairs(client: TestClient, **query):
+    return client.get("/user/catalog/tag-pairs", params=query, headers={"API-Key": params["API_KEY"]})
+
+
+def test_tag_pairs_route(client):
+    response = get_pairs(client, k=2, normalize="jaccard")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "status": True,
+        "pairs": [
+            {"tags": ["B", "C"], "score": pytest.approx(2 / 3)},
+            {"tags": ["A", "B"], "score": pytest.approx(0.5)},
+        ],
+    }
+    assert len(get_pairs(client).json()["pairs"]) == 3
+    assert get_pairs(client, normalize="pmi").status_code == 200
+
+
+def test_tag_pairs_route_validates_its_parameters(client):
+    assert get_pairs(client, k=0).status_code == 422
+    assert get_pairs(client, k=501).status_code == 422
+    assert get_pairs(client, k=500).status_code == 200
+
+    response = get_pairs(client, normalize="cosine")
+    assert response.status_code == 400
+    assert response.json()["detail"] == {"status": False, "detail": "Unknown normalization: cosine"}
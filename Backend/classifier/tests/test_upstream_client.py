@@ -0,0 +1,107 @@
+"""
+Tests of the shared upstream client and of fetching catalog pages through it.
+
+Run from Backend/classifier with `python -m pytest tests`.
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+import Controller.problem_controller as problem_controller
+from Controller.problem_controller import ProblemController
+from Controller.upstream_client import GraphQLError, UpstreamClient
+
+QUESTIONS = [
+    {"title": "Two Sum", "titleSlug": "two-sum", "difficulty": "EASY",
+     "topicTags": [{"name": "Array"}, {"name": "Hash Table"}], "acRate": 0.51234},
+    {"title": "LRU Cache", "titleSlug": "lru-cache", "difficulty": "MEDIUM", "topicTags": [], "acRate": 0.4},
+]
+
+
+class Upstream:
+    """
+    MockTransport handler that records the GraphQL requests and answers with `response`.
+    """
+
+    def __init__(self, response: httpx.Response = None):
+        self.response = response
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(json.loads(request.content))
+        if self.response is not None:
+            return self.response
+        page = {"totalLength": 3000, "questions": QUESTIONS}
+        return httpx.Response(200, json={"data": {"problemsetQuestionListV2": page}})
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    handler = Upstream()
+    client = UpstreamClient()
+    client.start(url="https://upstream.test/graphql", transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(problem_controller, "upstream_client", client)
+    yield handler, client
+    asyncio.run(client.close())
+
+
+def test_page_is_requested_with_its_variables_and_formatted(upstream):
+    handler, _ = upstream
+
+    problems, total = asyncio.run(ProblemController.fetch_problem_page(100, 50))
+
+    assert handler.requests[0]["variables"] == {"skip": 100, "limit": 50}
+    assert "problemsetQuestionListV2" in handler.requests[0]["query"]
+    assert total == 3000
+    assert problems[0] == {
+        "title": "Two Sum",
+        "title_slug": "two-sum",
+        "difficulty": "Easy",
+        "tags": ["Array", "Hash Table"],
+        "acceptance_rate": 0.51,
+        "details_url": "",
+    }
+    assert problems[1]["difficulty"] == "Medium" and problems[1]["tags"] == []
+
+
+@pytest.mark.parametrize("response", [
+    httpx.Response(502, text="Bad Gateway"),
+    httpx.Response(429, json={"error": "rate limited"}),
+    httpx.Response(200, json={"errors": [{"message": "Variable $limit got invalid value"}], "data": None}),
+])
+def test_upstream_failures_map_to_a_500(upstream, response):
+    handler, _ = upstream
+    handler.response = response
+
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(ProblemController.fetch_problem_page(0, 50))
+
+    assert raised.value.status_code == 500
+    assert raised.value.detail.startswith("Error fetching data from LeetCode API")
+
+
+def test_graphql_errors_are_raised_with_their_messages(upstream):
+    handler, client = upstream
+    handler.response = httpx.Response(200, json={"errors": [{"message": "first"}, {"message": "second"}]})
+
+    with pytest.raises(GraphQLError, match="first; second"):
+        asyncio.run(client.post_graphql("{ q }"))
+
+
+def test_one_client_is_reused_across_calls(upstream):
+    handler, client = upstream
+
+    async def scenario():
+        first = client.client
+        await ProblemController.fetch_problem_page(0, 50)
+        await ProblemController.fetch_problem_page(50, 50)
+        return first
+
+    assert asyncio.run(scenario()) is client.client
+    assert len(handler.requests) == 2
+    # Starting again keeps the existing pool
+    client.start()
+    assert client.url == "https://upstream.test/graphql"
@@ -1,5 +1,5 @@
-from fastapi import APIRouter, HTTPException, Body, Depends, Request, UploadFile, File
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Body, Depends, Query, Request, UploadFile, File
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.security import APIKeyHeader
 from response_error import ErrorResponseModel
 from Controller.check_secret_key import authenticate_api_key
@@ -9,11 +9,12 @@ from Controller.user_authenticate import get_authenticate_user
 from Model.ProblemModel import ProblemBase
 from Model.UserModel import UserCreate
 from config import params
+import base64
 import jwt
 import zipfile
 import os
 import re
-from typing import List
+from typing import List, Optional
 
 UserRouter = APIRouter()
 
@@ -150,6 +151,21 @@ async def problem_details(request: Request, contest_id: int, index: str, api_key
         error_response = ErrorResponseModel(status=False, detail=str(e))
         raise HTTPException(status_code=500, detail=dict(error_response))
 
+@UserRouter.get("/user/catalog/tag-pairs")
+async def catalog_tag_pairs(
+    k: int = Query(10, ge=1, le=500),
+    normalize: Optional[str] = None,
+    api_key: str = Depends(get_api_key),
+):
+    """
+    Returns the most strongly co-occurring tag pairs of the problem catalog.
+
+    :param k: Number of pairs to return.
+    :param normalize: None for raw counts, "jaccard" or "pmi".
+    """
+    pairs = await ProblemController.tag_pairs(k, normalize)
+    return JSONResponse(content={"status": True, "pairs": pairs})
+
 @UserRouter.post("/user/login")
 async def user_login(data: dict = Body(...), api_key: str = Depends(get_api_key)):
     try:
@@ -218,20 +234,66 @@ async def classify_problems(data: dict,request: Request, api_key: str = Depends(
         )
 
 
+@UserRouter.post("/user/classify/batch")
+@get_authenticate_user
+async def classify_problems_batch(data: dict, request: Request, api_key: str = Depends(get_api_key)):
+    """
+    Classify problems for many skill/tag queries in one call.
+
+    :param data: {"queries": [{"skill": ..., "tags": [...]}, ...], "include_problems": true}
+    :param api_key: API key for authentication.
+    :return: JSON response with one recommendation set per query, in order.
+    """
+    try:
+        queries = data.get("queries")
+        if not isinstance(queries, list) or not all(isinstance(query, dict) for query in queries):
+            error_response = ErrorResponseModel(status=False, detail="queries must be a list of objects")
+            raise HTTPException(status_code=400, detail=dict(error_response))
+
+        results = await ProblemController.recommend_problems_batch(
+            queries, include_problems=bool(data.get("include_problems", True))
+        )
+        return JSONResponse(content={"status": True, "results": results})
+
+    except HTTPException as e:
+        return JSONResponse(status_code=e.status_code, content={"status": False, "detail": e.detail})
+    except Exception as e:
+        return JSONResponse(
+            status_code=500, content={"status": False, "detail": f"Internal server error: {e}"}
+        )
+
+
+@UserRouter.get("/user/analysis/charts")
+async def analysis_chart_keys(api_key: str = Depends(get_api_key)):
+    """
+    Lists the chart keys that can be requested from /user/analysis/{id}/charts.
+    """
+    return JSONResponse(content={"status": True, "charts": ProblemController.chart_keys()})
+
+
 @UserRouter.get("/user/analysis/{id}")
 @get_authenticate_user
-async def analysis(id: str,request: Request, api_key: str = Depends(get_api_key)):
+async def analysis(
+    id: str,
+    request: Request,
+    mode: str = Query("report", regex="^(report|data)$"),
+    api_key: str = Depends(get_api_key),
+):
     """
     Classify problems based on user-provided skill and tags.
 
     :param data: Input data containing user skill level and optional tags.
+    :param mode: "report" for the rendered report as a Base64 ZIP file, "data" for the chart data as JSON.
     :param api_key: API key for authentication.
     :return: JSON response with classified problems.
     """
     try:
         # print(problems)
         # Fetch recommended problems using the ProblemController
-        analysis_report = await ProblemController.analysis_problems(id)
+        if mode == "data":
+            analysis_report = await ProblemController.analysis_data(id, request)
+        else:
+            analysis_report = await ProblemController.analysis_problems(id, request)
 
         return JSONResponse(content={"status": True, "analysis": analysis_report})
 
@@ -241,3 +303,97 @@ async def analysis(id: str,request: Request, api_key: str = Depends(get_api_key)
         return JSONResponse(
             content={"status": False, "detail": f"Internal server error: {e}"}
         )
+
+
+@UserRouter.get("/user/analysis/{id}/download")
+@get_authenticate_user
+async def analysis_download(id: str, request: Request, api_key: str = Depends(get_api_key)):
+    """
+    Streams the analysis report of a problem set as a binary ZIP file.
+
+    :param id: The ID of the document containing the problems.
+    :param api_key: API key for authentication.
+    :return: The ZIP file, or a JSON error response.
+    """
+    try:
+        report = await ProblemController.analysis_report_stream(id, request)
+        if not report["status"]:
+            return JSONResponse(content={"status": False, "detail": report["detail"]})
+
+        headers = {"Content-Disposition": f'attachment; filename="analysis-{id}.zip"'}
+        if report["size"] is not None:
+            headers["Content-Length"] = str(report["size"])
+        if report["failed_charts"]:
+            headers["X-Failed-Charts"] = ",".join(report["failed_charts"])
+        return StreamingResponse(report["chunks"], media_type="application/zip", headers=headers)
+
+    except HTTPException as e:
+        return JSONResponse(content={"status": False, "detail": str(e.detail)})
+    except Exception as e:
+        return JSONResponse(
+            content={"status": False, "detail": f"Internal server error: {e}"}
+        )
+
+
+@UserRouter.get("/user/analysis/{id}/charts")
+@get_authenticate_user
+async def analysis_charts(
+    id: str,
+    request: Request,
+    names: List[str] = Query(...),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Renders only the named charts of a problem set.
+
+    :param id: The ID of the document containing the problems.
+    :param names: Chart keys, repeated, e.g. ?names=tag_frequency&names=difficulty_vs_acceptance.
+    :param api_key: API key for authentication.
+    :return: JSON response with the base64-encoded charts.
+    """
+    ProblemController.check_chart_keys(names)
+    try:
+        result = await ProblemController.analysis_charts(id, names, request)
+        if result["status"]:
+            result["charts"] = {
+                chart: base64.b64encode(image).decode("utf-8") if image else None
+                for chart, image in result["charts"].items()
+            }
+        return JSONResponse(content=result)
+
+    except HTTPException as e:
+        return JSONResponse(content={"status": False, "detail": str(e.detail)})
+    except Exception as e:
+        return JSONResponse(
+            content={"status": False, "detail": f"Internal server error: {e}"}
+        )
+
+
+@UserRouter.get("/user/analysis/{id}/charts/{chart}")
+@get_authenticate_user
+async def analysis_chart(id: str, chart: str, request: Request, api_key: str = Depends(get_api_key)):
+    """
+    Renders a single chart of a problem set and returns it as a PNG image.
+
+    :param id: The ID of the document containing the problems.
+    :param chart: A chart key, e.g. tag_frequency.
+    :param api_key: API key for authentication.
+    :return: The PNG image, or a JSON error response.
+    """
+    ProblemController.check_chart_keys([chart])
+    try:
+        result = await ProblemController.analysis_charts(id, [chart], request)
+        if not result["status"]:
+            return JSONResponse(content={"status": False, "detail": result["detail"]})
+        image = result["charts"][chart]
+        if not image:
+            detail = result["failed_charts"].get(chart, "Chart not available for this problem set")
+            return JSONResponse(content={"status": False, "detail": detail})
+        return Response(content=image, media_type="image/png")
+
+    except HTTPException as e:
+        return JSONResponse(content={"status": False, "detail": str(e.detail)})
+    except Exception as e:
+        return JSONResponse(
+            content={"status": False, "detail": f"Internal server error: {e}"}
+        )